@@ -0,0 +1,132 @@
+"""
+Compare the Graph round trips needed to resolve ACL refs one by one and with JSON batches.
+
+A local stand-in answers the Graph user and group queries, and JSON batches of them,
+after a fixed latency. Run from the project directory:
+
+    python -m benchmarks.graph_batch --refs 100 --latency 0.02
+"""  # noqa: E501
+
+import argparse
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import src.services.acl_service as acl_service
+from src.services.acl_service import AzureFabricApiService
+from src.utility.http_client import HttpClient
+
+
+class StaticTokenProvider:
+    def get_token(self, scope: str) -> str:
+        return "token"
+
+
+class GraphStandIn(BaseHTTPRequestHandler):
+    latency = 0.0
+    round_trips = 0
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.count()
+        parts = urlsplit(self.path)
+        status, body = self.answer(parts.path, parse_qs(parts.query))
+        self.reply(status, body)
+
+    def do_POST(self):
+        self.count()
+        length = int(self.headers["Content-Length"])
+        requests = json.loads(self.rfile.read(length))["requests"]
+        responses = []
+        for request in requests:
+            parts = urlsplit(request["url"])
+            status, body = self.answer(parts.path, parse_qs(parts.query))
+            responses.append({"id": request["id"], "status": status, "body": body})
+        self.reply(200, {"responses": responses})
+
+    def count(self):
+        with self.lock:
+            GraphStandIn.round_trips += 1
+        time.sleep(self.latency)
+
+    def answer(self, path, query):
+        # Lookups by id, as made by the original lookup-then-get resolution
+        if "/users/" in path or "/groups/" in path:
+            principal_id = path.rsplit("/", 1)[1]
+            return 200, self.principal(principal_id)
+        name = query["$filter"][0].split("eq '")[1][:-1]
+        return 200, {"value": [self.principal(name)]}
+
+    @staticmethod
+    def principal(name):
+        return {"id": name, "displayName": name, "mail": name, "mailNickname": name}
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def lookup_then_get(service: AzureFabricApiService, refs):
+    # The resolution used before single-query lookups and batching: a filtered
+    # query for the id, then a GET by id for the attributes
+    for ref in refs:
+        principal = service.resolve_principal(ref)
+        collection = "users" if principal.kind == "user" else "groups"
+        service.http_client.get(
+            f"{acl_service.GRAPH_API_URL}/{collection}/{principal.id}",
+            headers=service.headers,
+        )
+
+
+def one_by_one(service: AzureFabricApiService, refs):
+    for ref in refs:
+        service.resolve_principal(ref)
+
+
+def batched(service: AzureFabricApiService, refs):
+    service.resolve_principals(refs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--refs", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    GraphStandIn.latency = args.latency
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GraphStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    acl_service.GRAPH_API_URL = f"http://127.0.0.1:{server.server_port}/v1.0"
+
+    refs = [f"user:user-{i}_example.com" for i in range(args.refs // 2)]
+    refs += [f"group:group-{i}" for i in range(args.refs - len(refs))]
+    http_client = HttpClient()
+    try:
+        print(f"{'strategy':<18}{'round trips':>12}{'seconds':>10}")
+        for strategy in (lookup_then_get, one_by_one, batched):
+            service = AzureFabricApiService(StaticTokenProvider(), http_client)
+            GraphStandIn.round_trips = 0
+            start = time.perf_counter()
+            strategy(service, refs)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{strategy.__name__:<18}{GraphStandIn.round_trips:>12}{elapsed:>10.3f}"
+            )
+    finally:
+        http_client.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
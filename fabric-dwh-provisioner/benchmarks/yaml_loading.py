@@ -0,0 +1,67 @@
+"""
+Compare the time needed to load descriptors with PyYAML's pure-Python safe loader and
+with the libyaml one used by the provisioner.
+
+Descriptors of increasing size are generated from the output port test descriptor by
+repeating its components. Run from the project directory:
+
+    python -m benchmarks.yaml_loading --repeat 3
+"""  # noqa: E501
+
+import argparse
+import copy
+import time
+from pathlib import Path
+from typing import Callable
+
+import yaml
+
+from src.utility.yaml_loader import LIBYAML, load_yaml
+
+TEMPLATE = Path("tests/descriptors/descriptor_output_port_valid.yaml")
+# Number of copies of the template components in each descriptor
+SIZES = {"small": 1, "medium": 100, "large": 1000}
+
+
+def make_descriptor(copies: int) -> str:
+    descriptor = yaml.safe_load(TEMPLATE.read_text())
+    components = descriptor["dataProduct"]["components"]
+    descriptor["dataProduct"]["components"] = [
+        dict(copy.deepcopy(component), id=f"{component['id']}-{i}")
+        for i in range(copies)
+        for component in components
+    ]
+    return yaml.safe_dump(descriptor, sort_keys=False)
+
+
+def best_time(load: Callable[[str], object], descriptor: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load(descriptor)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not LIBYAML:
+        print("PyYAML was built without libyaml: both loaders are pure Python")
+    print(
+        f"{'descriptor':<10} {'size':>10} {'safe_load':>12} {'load_yaml':>12} {'speedup':>8}"
+    )
+    for name, copies in SIZES.items():
+        descriptor = make_descriptor(copies)
+        pure = best_time(yaml.safe_load, descriptor, args.repeat)
+        fast = best_time(load_yaml, descriptor, args.repeat)
+        print(
+            f"{name:<10} {len(descriptor) / 1024:>8.0f}kB {pure * 1000:>10.1f}ms "
+            f"{fast * 1000:>10.1f}ms {pure / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
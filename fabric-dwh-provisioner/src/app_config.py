@@ -1,8 +1,48 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from src.services.acl_service import AzureFabricApiService
+from src.services.fabric_service import FabricService
+from src.services.job_service import create_job_service
+from src.services.provisioning_service import ProvisioningService
+from src.utility.http_client import get_http_client
+from src.utility.logger import get_logger
+from src.utility.token_provider import get_token_provider
+
+logger = get_logger()
+
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """
+    Create the services shared by every request at startup and release them at shutdown.
+
+    No token is acquired here: credentials are probed lazily by the first request that needs them.
+    """  # noqa: E501
+    token_provider = get_token_provider()
+    http_client = get_http_client()
+    application.state.fabric_service = FabricService(token_provider, http_client)
+    application.state.azure_service = AzureFabricApiService(token_provider, http_client)
+    application.state.provisioning_service = ProvisioningService(
+        application.state.fabric_service, application.state.azure_service
+    )
+    application.state.job_service = create_job_service(
+        application.state.provisioning_service.execute
+    )
+    logger.info("Services initialized")
+    yield
+    application.state.job_service.close()
+    application.state.fabric_service.close()
+    http_client.close()
+    token_provider.close()
+    logger.info("Services closed")
+
+
 app = FastAPI(
     title="Specific Provisioner Micro Service",
     description="Microservice responsible to handle provisioning and access control requests for one or more data product components.",  # noqa: E501
     version="2.2.0",
     servers=[{"url": "/datamesh.specificprovisioner"}],
+    lifespan=lifespan,
 )
@@ -1,7 +1,6 @@
-from typing import Annotated, Tuple
+from typing import Annotated, Any, Optional, Tuple
 
-import yaml
-from fastapi import Depends
+from fastapi import Depends, Header, Request
 
 from src.models.api_models import (
     DescriptorKind,
@@ -9,15 +8,62 @@ from src.models.api_models import (
     UpdateAclRequest,
     ValidationError,
 )
-from src.models.data_product_descriptor import DataProduct
+from src.models.data_product_descriptor import (
+    DataProduct,
+    FabricOutputPort,
+    components_context,
+)
 from src.services.acl_service import AzureFabricApiService
 from src.services.fabric_service import FabricService
+from src.services.job_service import JobService
+from src.services.provisioning_service import ProvisioningService
 from src.services.schema_service import SQLSchemaMapper
+from src.utility.configuration_manager import get_config_value
+from src.utility.descriptor_cache import get_descriptor_cache
 from src.utility.logger import get_logger
 from src.utility.parsing_pydantic_models import parse_yaml_with_model
+from src.utility.yaml_loader import load_yaml
 
 logger = get_logger()
 
+# The component id is whatever the descriptor holds, as Witboost sends it
+ParsedDescriptor = Tuple[DataProduct | ValidationError, Any]
+
+
+def parse_component_descriptor(descriptor: str) -> ParsedDescriptor:
+    """
+    Parse a component descriptor into its data product and the id of the component
+    to provision.
+
+    Parsing results, errors included, are cached by descriptor content: Witboost
+    sends the same descriptor to validate and then to provision, and again on every
+    retry. With LAZY_COMPONENT_PARSING, the other components of the data product are
+    only validated when accessed.
+    """
+    return get_descriptor_cache().get_or_parse(descriptor, _load_component_descriptor)
+
+
+def _load_component_descriptor(descriptor: str) -> ParsedDescriptor:
+    try:
+        descriptor_dict = load_yaml(descriptor)
+        component_id = descriptor_dict.get("componentIdToProvision")
+        # The component to provision is parsed once, as the Fabric output port the
+        # services expect; with LAZY_COMPONENT_PARSING the others only when accessed
+        context = components_context(
+            component_id,
+            FabricOutputPort,
+            lazy=get_config_value("LAZY_COMPONENT_PARSING", False),
+        )
+        data_product = parse_yaml_with_model(
+            descriptor_dict.get("dataProduct"), DataProduct, context
+        )
+        return data_product, component_id
+    except Exception as ex:
+        return (
+            ValidationError(errors=["Unable to parse the descriptor.", str(ex)]),
+            None,
+        )
+
 
 async def unpack_provisioning_request(
     provisioning_request: ProvisioningRequest,
@@ -51,27 +97,21 @@ async def unpack_provisioning_request(
             f"platform team."
         )
         return ValidationError(errors=[error])
-    try:
-        descriptor_dict = yaml.safe_load(provisioning_request.descriptor)
-        data_product = parse_yaml_with_model(
-            descriptor_dict.get("dataProduct"), DataProduct
-        )
-        component_to_provision = descriptor_dict.get("componentIdToProvision")
-
-        if isinstance(data_product, DataProduct):
-            return data_product, component_to_provision
-        elif isinstance(data_product, ValidationError):
-            return data_product
+    data_product, component_to_provision = parse_component_descriptor(
+        provisioning_request.descriptor
+    )
 
-        else:
-            return ValidationError(
-                errors=[
-                    "An unexpected error occurred while parsing the provisioning request."  # noqa: E501
-                ]
-            )
+    if isinstance(data_product, DataProduct):
+        return data_product, component_to_provision
+    elif isinstance(data_product, ValidationError):
+        return data_product
 
-    except Exception as ex:
-        return ValidationError(errors=["Unable to parse the descriptor.", str(ex)])
+    else:
+        return ValidationError(
+            errors=[
+                "An unexpected error occurred while parsing the provisioning request."
+            ]
+        )
 
 
 UnpackedProvisioningRequestDep = Annotated[
@@ -155,9 +195,9 @@ async def unpack_update_acl_request(
     """  # noqa: E501
 
     try:
-        request = yaml.safe_load(update_acl_request.provisionInfo.request)
-        data_product = parse_yaml_with_model(request.get("dataProduct"), DataProduct)
-        component_to_provision = request.get("componentIdToProvision")
+        data_product, component_to_provision = parse_component_descriptor(
+            update_acl_request.provisionInfo.request
+        )
         if isinstance(data_product, DataProduct):
             return (
                 data_product,
@@ -186,14 +226,14 @@ UnpackedUpdateAclRequestDep = Annotated[
 #     return ConfigurationManager("ConnectToFabricDwh")
 
 
-def create_fabric_service() -> FabricService:
-    """
-    Factory to create a FabricService instance.
+def get_fabric_service(request: Request) -> FabricService:
     """
-    return FabricService()
+    Returns the FabricService instance shared across requests, created at application startup.
+    """  # noqa: E501
+    return request.app.state.fabric_service
 
 
-FabricServiceDep = Annotated[FabricService, Depends(create_fabric_service)]
+FabricServiceDep = Annotated[FabricService, Depends(get_fabric_service)]
 
 
 def create_schema_service() -> SQLSchemaMapper:
@@ -206,11 +246,37 @@ def create_schema_service() -> SQLSchemaMapper:
 SQLSchemaMapperDep = Annotated[SQLSchemaMapper, Depends(create_schema_service)]
 
 
-def create_azure_service() -> AzureFabricApiService:
+def get_azure_service(request: Request) -> AzureFabricApiService:
     """
-    Factory to create a AzureFabricApiService instance.
+    Returns the AzureFabricApiService instance shared across requests, created at application startup.
+    """  # noqa: E501
+    return request.app.state.azure_service
+
+
+AzureFabricServiceDep = Annotated[AzureFabricApiService, Depends(get_azure_service)]
+
+
+def get_provisioning_service(request: Request) -> ProvisioningService:
+    """
+    Returns the ProvisioningService instance shared across requests, created at application startup.
+    """  # noqa: E501
+    return request.app.state.provisioning_service
+
+
+ProvisioningServiceDep = Annotated[
+    ProvisioningService, Depends(get_provisioning_service)
+]
+
+
+def get_job_service(request: Request) -> JobService:
     """
-    return AzureFabricApiService()
+    Returns the JobService instance shared across requests, created at application startup.
+    """  # noqa: E501
+    return request.app.state.job_service
+
+
+JobServiceDep = Annotated[JobService, Depends(get_job_service)]
 
 
-AzureFabricServiceDep = Annotated[AzureFabricApiService, Depends(create_azure_service)]
+# Key sent by clients to identify the retries of the same request
+IdempotencyKeyHeader = Annotated[Optional[str], Header(alias="Idempotency-Key")]
@@ -5,23 +5,21 @@ from starlette.responses import Response
 from src.app_config import app
 from src.check_return_type import check_response
 from src.dependencies import (
-    AzureFabricServiceDep,
-    FabricServiceDep,
-    SQLSchemaMapperDep,
+    IdempotencyKeyHeader,
+    JobServiceDep,
     UnpackedProvisioningRequestDep,
     UnpackedUnprovisioningRequestDep,
     UnpackedUpdateAclRequestDep,
 )
 from src.models.api_models import (
     ProvisioningStatus,
-    Status1,
     SystemErr,
     ValidationError,
     ValidationRequest,
     ValidationResult,
     ValidationStatus,
 )
-from src.models.data_product_descriptor import FabricOutputPort, SinkKind
+from src.models.job_models import JobRequest, OperationKind
 from src.utility.logger import get_logger
 
 logger = get_logger()
@@ -40,9 +38,8 @@ logger = get_logger()
 )
 def provision(
     request: UnpackedProvisioningRequestDep,
-    fabricService: FabricServiceDep,
-    schemaService: SQLSchemaMapperDep,
-    azureServiceapi: AzureFabricServiceDep,
+    jobService: JobServiceDep,
+    idempotency_key: IdempotencyKeyHeader = None,
 ) -> Response:
     """
     Deploy a data product or a single component starting from a provisioning descriptor
@@ -51,38 +48,16 @@ def provision(
     if isinstance(request, ValidationError):
         return check_response(out_response=request)
 
-    # Var to SnakeCase
     data_product, component_id = request
-    logger.info("Provisioning component with id: " + component_id)
-    componentToProvision = data_product.get_typed_component_by_id(
-        component_id, FabricOutputPort
+    resp = jobService.run(
+        JobRequest(
+            operation=OperationKind.PROVISION,
+            data_product=data_product,
+            component_id=component_id,
+        ),
+        idempotency_key,
     )
-    dc_table_name = componentToProvision.specific.table
-    dc_schema_ = componentToProvision.dataContract.schema_
-    sink = componentToProvision.specific.sink
-    dev_group = "group:" + data_product.devGroup
-    if sink == SinkKind.DWH:
-        sql_schema = schemaService.generate_sql_schema(schema=dc_schema_, nullable=True)
-        try:
-            fabricService.get_sql_endpoint(
-                workspace_name=componentToProvision.specific.workspace,
-                dwh_name=componentToProvision.specific.warehouse,
-            )
-            if fabricService.create_table(table_name=dc_table_name, schema=sql_schema):
-                fabricService.apply_acl_to_dwh_table(
-                    azureServiceapi.update_acl([dev_group]), dc_table_name, True
-                )
-                resp: ProvisioningStatus | SystemErr = ProvisioningStatus(
-                    status=Status1.COMPLETED, result="Provisioning completed"
-                )
-            else:
-                resp = ProvisioningStatus(
-                    status=Status1.FAILED, result="Provisioning not completed"
-                )
-        except Exception as e:
-            resp = SystemErr(error=f"Provisioning not completed, the error is: {e}")
-        return check_response(out_response=resp)
-    return check_response(out_response=SystemErr(error=f"Unsupported sink {sink}"))
+    return check_response(out_response=resp)
 
 
 @app.get(
@@ -95,13 +70,14 @@ def provision(
     },
     tags=["SpecificProvisioner"],
 )
-def get_status(token: str) -> Response:
+def get_status(token: str, jobService: JobServiceDep) -> Response:
     """
     Get the status for a provisioning request
     """
 
-    # todo: define correct response
-    resp = SystemErr(error="Response not yet implemented")
+    resp: ProvisioningStatus | ValidationError | None = jobService.get_status(token)
+    if resp is None:
+        resp = ValidationError(errors=[f"Unknown token {token}"])
 
     return check_response(out_response=resp)
 
@@ -118,7 +94,9 @@ def get_status(token: str) -> Response:
     tags=["SpecificProvisioner"],
 )
 def unprovision(
-    request: UnpackedUnprovisioningRequestDep, fabricService: FabricServiceDep
+    request: UnpackedUnprovisioningRequestDep,
+    jobService: JobServiceDep,
+    idempotency_key: IdempotencyKeyHeader = None,
 ) -> Response:
     """
     Undeploy a data product or a single component
@@ -129,26 +107,15 @@ def unprovision(
         return check_response(out_response=request)
 
     data_product, component_id, remove_data = request
-
-    logger.info("Unprovisioning component with id: " + component_id)
-    componentToUnprovision = data_product.get_typed_component_by_id(
-        component_id, FabricOutputPort
+    resp = jobService.run(
+        JobRequest(
+            operation=OperationKind.UNPROVISION,
+            data_product=data_product,
+            component_id=component_id,
+            remove_data=remove_data,
+        ),
+        idempotency_key,
     )
-    fabricService.get_sql_endpoint(
-        componentToUnprovision.specific.workspace,
-        componentToUnprovision.specific.warehouse,
-    )
-    try:
-        if fabricService.drop_table(componentToUnprovision.specific.table):
-            resp: ProvisioningStatus | SystemErr = ProvisioningStatus(
-                status=Status1.COMPLETED, result="Unprovisioning completed"
-            )
-        else:
-            resp = ProvisioningStatus(
-                status=Status1.FAILED, result="Unprovisioning not completed"
-            )
-    except Exception as e:
-        resp = SystemErr(error=f"Response {e}")
     return check_response(out_response=resp)
 
 
@@ -165,8 +132,8 @@ def unprovision(
 )
 def updateacl(
     request: UnpackedUpdateAclRequestDep,
-    fabricService: FabricServiceDep,
-    azureServiceapi: AzureFabricServiceDep,
+    jobService: JobServiceDep,
+    idempotency_key: IdempotencyKeyHeader = None,
 ) -> Response:
     """
     Request the access to a specific provisioner component
@@ -176,26 +143,15 @@ def updateacl(
         return check_response(out_response=request)
 
     data_product, component_id, witboost_users = request
-    componentToProvision = data_product.get_typed_component_by_id(
-        component_id, FabricOutputPort
-    )
-    fabricService.get_sql_endpoint(
-        componentToProvision.specific.workspace, componentToProvision.specific.warehouse
+    resp = jobService.run(
+        JobRequest(
+            operation=OperationKind.UPDATE_ACL,
+            data_product=data_product,
+            component_id=component_id,
+            refs=witboost_users,
+        ),
+        idempotency_key,
     )
-
-    try:
-        if fabricService.apply_acl_to_dwh_table(
-            acl_entries=azureServiceapi.update_acl(witboost_users),
-            table_name=componentToProvision.specific.table,
-        ):
-            resp: ProvisioningStatus | SystemErr = ProvisioningStatus(
-                status=Status1.COMPLETED, result="Acl updated"
-            )
-        else:
-            resp = ProvisioningStatus(status=Status1.FAILED, result="Acl not updated")
-    except Exception as err:
-        resp = SystemErr(error=f"Error{err}")
-
     return check_response(out_response=resp)
 
 
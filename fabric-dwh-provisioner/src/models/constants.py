@@ -43,3 +43,7 @@ OPENMETADATA_SUPPORTED_DATATYPES = [
     "POLYGON",
     "BYTEA",
 ]
+
+FABRIC_API_SCOPE = "https://analysis.windows.net/powerbi/api/.default"
+GRAPH_API_SCOPE = "https://graph.microsoft.com/.default"
+DATABASE_SCOPE = "https://database.windows.net/.default"
@@ -1,6 +1,16 @@
 from datetime import datetime
 from enum import StrEnum
-from typing import Annotated, Any, List, Literal, Optional, Type
+from typing import (
+    Annotated,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Type,
+    TypeVar,
+)
 
 from pydantic import (
     AnyUrl,
@@ -8,6 +18,8 @@ from pydantic import (
     BeforeValidator,
     ConfigDict,
     Field,
+    PrivateAttr,
+    ValidationInfo,
     field_validator,
     model_validator,
 )
@@ -17,6 +29,13 @@ from src.utility.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Validation context keys of component parsing, see components_context
+LAZY_COMPONENTS = "lazy_components"
+TARGET_COMPONENT = "target_component"
+TARGET_TYPE = "target_type"
+
+C = TypeVar("C", bound=BaseModel)
+
 
 class ComponentKind(StrEnum):
     OUTPUTPORT = "outputport"
@@ -160,6 +179,8 @@ class SinkKind(StrEnum):
 class FabricOutputPortSpecific(BaseModel):
     workspace: str
     warehouse: str
+    workspaceId: Optional[str] = None
+    warehouseId: Optional[str] = None
     table: str
     sink: SinkKind
     file_path: str | None
@@ -296,6 +317,157 @@ def parse_component(data: dict | Component) -> Component:
         return component
 
 
+class RawComponent(Component):
+    """
+    Placeholder of a component whose validation is deferred. It keeps the component
+    as found in the descriptor, and is replaced by the parsed component when the
+    DataProduct methods access it.
+    """
+
+    _raw: dict = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def defer(cls, data: dict) -> "RawComponent":
+        component = cls.model_construct(**data)
+        component._raw = data
+        return component
+
+    def materialize(self) -> Component:
+        return parse_component(self._raw)
+
+    def validate_as(self, component_type: Type[C]) -> C:
+        return component_type(**self._raw)
+
+
+def components_context(
+    target_component: Optional[str] = None,
+    target_type: Optional[Type[Component]] = None,
+    lazy: bool = False,
+) -> dict:
+    """
+    Validation context of a DataProduct, e.g.
+    `DataProduct.model_validate(data, context=components_context(component_id, FabricOutputPort))`
+
+    :param target_component: Id of the component the request is about.
+    :param target_type: Model of the target component, a subclass of the model of its
+        kind. The target is validated as target_type when possible, so that
+        `get_typed_component_by_id` does not validate it again.
+    :param lazy: Whether to defer the validation of the components other than the
+        target until they are accessed.
+    """  # noqa: E501
+    return {
+        LAZY_COMPONENTS: lazy,
+        TARGET_COMPONENT: target_component,
+        TARGET_TYPE: target_type,
+    }
+
+
+def parse_component_in_context(
+    data: dict | Component, info: ValidationInfo
+) -> Component:
+    context = info.context or {}
+    if not isinstance(data, dict) or "id" not in data or "kind" not in data:
+        return parse_component(data)
+    if data["id"] != context.get(TARGET_COMPONENT):
+        if context.get(LAZY_COMPONENTS):
+            return RawComponent.defer(data)
+        return parse_component(data)
+    target_type = context.get(TARGET_TYPE)
+    kind_type = component_map.get(data["kind"])
+    if target_type is not None and kind_type and issubclass(target_type, kind_type):
+        try:
+            return target_type(**data)
+        except ValueError:
+            # Not a target_type, e.g. an output port of another platform: it is
+            # validated as its kind and get_typed_component_by_id reports the errors
+            pass
+    return parse_component(data)
+
+
+class ComponentList(list):
+    """
+    List of components counting its changes, so that an index of its components
+    knows when it is stale.
+    """
+
+    version = 0
+
+
+def _counting(method: Callable) -> Callable:
+    def mutate(self: ComponentList, *args: Any, **kwargs: Any) -> Any:
+        self.version += 1
+        return method(self, *args, **kwargs)
+
+    mutate.__name__ = method.__name__
+    return mutate
+
+
+for _method in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(ComponentList, _method, _counting(getattr(list, _method)))
+
+
+class ComponentIndex:
+    """
+    Positions of the components of a data product by id and by kind.
+
+    The index is rebuilt when the components list is replaced, or changed in place
+    as counted by the version of a ComponentList. Changes to other lists, e.g. of a
+    data product built with model_construct, cannot be detected, so the index of a
+    plain list is rebuilt on every lookup.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+        self._kinds: Dict[str, List[int]] = {}
+        self._components: List[Component] | None = None
+        self._version = -1
+
+    def build(self, components: List[Component]) -> None:
+        ids: Dict[str, int] = {}
+        kinds: Dict[str, List[int]] = {}
+        for i, component in enumerate(components):
+            # The first component wins, as with a linear scan
+            ids.setdefault(component.id, i)
+            kinds.setdefault(component.kind, []).append(i)
+        self._ids = ids
+        self._kinds = kinds
+        self._components = components
+        self._version = getattr(components, "version", -1)
+
+    def position(self, components: List[Component], component_id: str) -> int | None:
+        self._refresh(components)
+        return self._ids.get(component_id)
+
+    def positions(self, components: List[Component], kind: str) -> List[int]:
+        self._refresh(components)
+        return self._kinds.get(kind, [])
+
+    def _refresh(self, components: List[Component]) -> None:
+        if (
+            not isinstance(components, ComponentList)
+            or components is not self._components
+            or components.version != self._version
+        ):
+            self.build(components)
+
+    def __eq__(self, other: object) -> bool:
+        # Derived from the components, so it never makes two data products differ
+        return isinstance(other, ComponentIndex)
+
+
 class DataProduct(BaseModel):
     id: str
     name: str
@@ -316,7 +488,23 @@ class DataProduct(BaseModel):
     billing: Optional[dict] = None
     tags: List[OpenMetadataTagLabel]
     specific: dict
-    components: List[Annotated[Component, BeforeValidator(parse_component)]]
+    # Validated with a lazy components_context, components other than the target one
+    # are RawComponent placeholders until accessed through the methods below
+    components: List[Annotated[Component, BeforeValidator(parse_component_in_context)]]
+
+    _index: ComponentIndex = PrivateAttr(default_factory=ComponentIndex)
+
+    @model_validator(mode="after")
+    def index_components(self) -> "DataProduct":
+        self.components = ComponentList(self.components)
+        self._index.build(self.components)
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Assigned lists are tracked, so the index is rebuilt once per replacement
+        if name == "components" and not isinstance(value, ComponentList):
+            value = ComponentList(value)
+        super().__setattr__(name, value)
 
     def get_components_by_kind(self, kind: str) -> List[Component]:
         """
@@ -336,7 +524,7 @@ class DataProduct(BaseModel):
         """  # noqa: E501
 
         new_components_list = [
-            component for component in self.components if component.kind == kind
+            self._materialize(i) for i in self._index.positions(self.components, kind)
         ]
 
         return new_components_list
@@ -363,19 +551,48 @@ class DataProduct(BaseModel):
            ... else:
            ...     print("Component not found.")
         """  # noqa: E501
-        for component in self.components:
-            if component.id == component_id:
-                return component
-        return None
+        i = self._index.position(self.components, component_id)
+        if i is None:
+            return None
+        return self._materialize(i)
+
+    def _materialize(self, index: int) -> Component:
+        component = self.components[index]
+        if isinstance(component, RawComponent):
+            component = component.materialize()
+            self._replace(index, component)
+        return component
+
+    def _replace(self, index: int, component: Component) -> None:
+        # The parsed component has the id and kind of its placeholder: the index
+        # stays valid, so the change is not counted
+        list.__setitem__(self.components, index, component)
 
     def get_typed_component_by_id(
-        self, component_id: str, component_type: Type[BaseModel]
-    ):
-        component = self.get_component_by_id(component_id)
-        if component is not None:
-            return component_type.parse_obj(component.dict(by_alias=True))
-        else:
+        self, component_id: str, component_type: Type[C]
+    ) -> C | None:
+        """
+        Retrieve a component by id, as an instance of the given model.
+
+        Components already validated as component_type, e.g. thanks to the target_type
+        of components_context, and deferred components are validated at most once.
+        Other components are validated again as component_type.
+
+        Raises:
+            pydantic.ValidationError: If the component is not a valid component_type.
+        """
+        i = self._index.position(self.components, component_id)
+        if i is None:
             return None
+        component = self.components[i]
+        if isinstance(component, component_type):
+            return component
+        if isinstance(component, RawComponent):
+            typed = component.validate_as(component_type)
+            if isinstance(typed, Component):
+                self._replace(i, typed)
+            return typed
+        return component_type.model_validate(component.model_dump(by_alias=True))
 
     def get_output_ports(self) -> List[OutputPort]:
         """
@@ -395,7 +612,7 @@ class DataProduct(BaseModel):
 
         output_ports: List[OutputPort] = []
         for op in self.get_components_by_kind("outputport"):
-            if type(op) is OutputPort:
+            if isinstance(op, OutputPort):
                 output_ports.append(op)
         return output_ports
 
@@ -416,7 +633,7 @@ class DataProduct(BaseModel):
         """  # noqa: E501
         workloads: List[Workload] = []
         for wl in self.get_components_by_kind("workload"):
-            if type(wl) is Workload:
+            if isinstance(wl, Workload):
                 workloads.append(wl)
         return workloads
 
@@ -437,7 +654,7 @@ class DataProduct(BaseModel):
         """  # noqa: E501
         storage_areas: List[StorageArea] = []
         for st in self.get_components_by_kind("storage"):
-            if type(st) is StorageArea:
+            if isinstance(st, StorageArea):
                 storage_areas.append(st)
         return storage_areas
 
@@ -458,6 +675,6 @@ class DataProduct(BaseModel):
         """  # noqa: E501
         observability_APIs: List[Observability] = []
         for obs in self.get_components_by_kind("observability"):
-            if type(obs) is Observability:
+            if isinstance(obs, Observability):
                 observability_APIs.append(obs)
         return observability_APIs
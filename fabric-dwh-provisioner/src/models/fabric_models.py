@@ -0,0 +1,93 @@
+from enum import StrEnum
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict
+
+# SQL types whose definition includes a length, and a precision and scale
+CHARACTER_TYPES = frozenset({"char", "varchar", "nchar", "nvarchar", "varbinary"})
+DECIMAL_TYPES = frozenset({"decimal", "numeric"})
+# Character types accepting max as length
+MAX_LENGTH_TYPES = frozenset({"varchar", "nvarchar", "varbinary"})
+# The length of max columns, as in INFORMATION_SCHEMA.COLUMNS
+MAX_LENGTH = -1
+# The length of character columns declared without one
+DEFAULT_LENGTH = 1
+
+
+class WarehouseHandle(BaseModel):
+    """
+    Immutable reference to a resolved Fabric warehouse or lakehouse SQL endpoint.
+
+    It is returned by `FabricService.resolve_warehouse` and passed to every
+    operation that needs to reach the item, so the service itself keeps no
+    per-request state.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    workspace_name: str
+    workspace_id: str
+    item_name: str
+    item_id: str
+    sql_endpoint: str
+
+    @property
+    def database(self) -> str:
+        return self.item_name
+
+
+class PrincipalKind(StrEnum):
+    USER = "user"
+    GROUP = "group"
+
+
+class Principal(BaseModel):
+    """
+    Microsoft Entra user or group resolved from a Witboost identity ref.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    kind: PrincipalKind
+    id: str
+    display_name: Optional[str] = None
+    # The name used in T-SQL GRANT statements: the mail of users, the mailNickname of groups
+    acl_name: Optional[str] = None
+
+
+class ColumnDefinition(BaseModel):
+    """
+    Definition of a table column, as generated from a data contract or read from
+    INFORMATION_SCHEMA.COLUMNS.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    # Lowercase SQL type name, without length or precision, e.g. varchar or decimal
+    data_type: str
+    # Maximum length of character types: MAX_LENGTH for max, None when not declared
+    length: Optional[int] = None
+    precision: Optional[int] = None
+    scale: Optional[int] = None
+    nullable: bool = True
+
+    def matches(self, other: "ColumnDefinition") -> bool:
+        """
+        Whether two definitions describe the same column. Names are compared
+        case-insensitively, like SQL identifiers, and length, precision and scale
+        only for the types they apply to.
+        """
+        if self.name.casefold() != other.name.casefold():
+            return False
+        if (self.data_type, self.nullable) != (other.data_type, other.nullable):
+            return False
+        if self.data_type in CHARACTER_TYPES:
+            return (self.length or DEFAULT_LENGTH) == (other.length or DEFAULT_LENGTH)
+        if self.data_type in DECIMAL_TYPES:
+            # A decimal declared without precision and scale is a decimal(18,0)
+            return (self.precision or 18, self.scale or 0) == (
+                other.precision or 18,
+                other.scale or 0,
+            )
+        return True
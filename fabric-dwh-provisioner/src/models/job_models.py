@@ -0,0 +1,48 @@
+import hashlib
+from enum import StrEnum
+from typing import List, Tuple
+
+from pydantic import BaseModel
+
+from src.models.data_product_descriptor import DataProduct
+
+# Component id, operation and idempotency key of a request
+IdempotencyKey = Tuple[str, str, str]
+
+
+class OperationKind(StrEnum):
+    PROVISION = "provision"
+    UNPROVISION = "unprovision"
+    UPDATE_ACL = "update_acl"
+
+
+class JobRequest(BaseModel):
+    """
+    A provisioning operation with its arguments, which can be stored and run later,
+    possibly by another replica of the provisioner.
+    """
+
+    operation: OperationKind
+    data_product: DataProduct
+    component_id: str
+    remove_data: bool = False
+    refs: List[str] = []
+
+    def to_json(self) -> str:
+        # Components are declared as the base Component: serializing them as their
+        # actual type keeps the fields of output ports and storage areas
+        return self.model_dump_json(by_alias=True, serialize_as_any=True)
+
+    def fingerprint(self) -> str:
+        """
+        Hash of the whole request, descriptor included. The descriptor is hashed once
+        parsed, so YAML formatting does not matter.
+        """
+        return hashlib.sha256(self.to_json().encode()).hexdigest()
+
+    def coalescing_key(self, fingerprint: str | None = None) -> Tuple[str, str]:
+        """
+        Key shared by identical requests: the component id and the fingerprint.
+        :param fingerprint: The fingerprint of the request, if already computed.
+        """
+        return self.component_id, fingerprint or self.fingerprint()
@@ -1,188 +1,309 @@
-import requests
-from azure.identity import DefaultAzureCredential
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from urllib.parse import quote, urlencode
 
+from src.models.constants import GRAPH_API_SCOPE
+from src.models.fabric_models import Principal, PrincipalKind
+from src.utility.configuration_manager import get_config_value
+from src.utility.http_client import HttpClient, get_http_client
 from src.utility.logger import get_logger
+from src.utility.token_provider import TokenProvider, get_token_provider
+from src.utility.ttl_cache import TTLCache
+
+GRAPH_API_URL = "https://graph.microsoft.com/v1.0"
+
+# Define known prefixes for groups and users
+GROUP_PREFIX = "group:"
+USER_PREFIX = "user:"
+
+# Graph collection, attribute matched against the name and attribute used in GRANTs
+PRINCIPAL_LOOKUPS = {
+    PrincipalKind.USER: ("users", "userPrincipalName", "mail"),
+    PrincipalKind.GROUP: ("groups", "displayName", "mailNickname"),
+}
+# Only the attributes needed to build a Principal are requested
+SELECT = "id,mail,displayName,mailNickname"
+
+# Graph accepts at most 20 sub-requests in a JSON batch
+GRAPH_BATCH_SIZE = 20
+THROTTLED_STATUS_CODES = frozenset({429, 503})
+
+
+class PrincipalNotFoundError(ValueError):
+    """
+    Raised when a user or a group does not exist in Microsoft Entra ID.
+    """
+
+
+class PrincipalResolutionError(ValueError):
+    """
+    Raised when some refs of an ACL update cannot be resolved; lists all of them.
+    """
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+        details = "; ".join(f"{ref}: {error}" for ref, error in errors.items())
+        super().__init__(f"Unable to resolve {len(errors)} principal(s): {details}")
 
 
 class AzureFabricApiService:
-    def __init__(self):
+    def __init__(
+        self,
+        token_provider: TokenProvider | None = None,
+        http_client: HttpClient | None = None,
+    ):
         """
         Autentication Initialize with Azure ADD
-        """
-        self.credential = DefaultAzureCredential()
-        self.token = self.credential.get_token(
-            "https://graph.microsoft.com/.default"
-        ).token
-        self.headers = {"Authorization": f"Bearer {self.token}"}
+        :param token_provider: Token cache used to authenticate. Defaults to the process-wide one.
+        :param http_client: HTTP client used for the REST calls. Defaults to the process-wide one.
+        """  # noqa: E501
+        self.token_provider = token_provider or get_token_provider()
+        self.http_client = http_client or get_http_client()
         self.logger = get_logger(__name__)
+        # Resolved principals rarely change: repeated ACL updates for the same refs
+        # are served without calling Graph
+        self._principals: TTLCache[str, Principal] = TTLCache(
+            ttl=get_config_value("GRAPH_PRINCIPAL_CACHE_TTL", 600.0),
+            maxsize=get_config_value("GRAPH_PRINCIPAL_CACHE_SIZE", 4096),
+            negative_ttl=get_config_value("GRAPH_PRINCIPAL_CACHE_NEGATIVE_TTL", 60.0),
+            negative_errors=(PrincipalNotFoundError,),
+        )
 
-    def get_group_id(self, group_name, headers):
+    @property
+    def headers(self) -> dict:
         """
-        Retrieve the ID of a group from its display name using Microsoft Graph API.
-        :param group_name: The display name of the group.
-        :param headers: Headers containing the authorization token.
-        :return: The group ID.
+        Authorization headers for Microsoft Graph, built from the cached token on each access.
+        """  # noqa: E501
+        token = self.token_provider.get_token(GRAPH_API_SCOPE)
+        return {"Authorization": f"Bearer {token}"}
+
+    def parse_ref(self, entity: str) -> Tuple[PrincipalKind, str]:
         """
-        try:
-            graph_endpoint = f"https://graph.microsoft.com/v1.0/groups?$filter=displayName eq '{group_name}'"
-            response = requests.get(graph_endpoint, headers=headers)
-            if response.status_code != 200:
-                raise Exception(
-                    f"Failed to fetch group ID for '{group_name}': {response.text}"
-                )
+        Split a Witboost identity ref into the principal kind and its Entra name.
+        :param entity: A ref such as 'user:name_domain.com' or 'group:name'.
+        :return: The kind and the user principal name or group display name.
+        """
+        if entity.startswith(USER_PREFIX):
+            # Witboost replaces the '@' of user principal names with '_'
+            user_name = entity[len(USER_PREFIX) :]
+            return PrincipalKind.USER, "@".join(user_name.rsplit("_", 1))
+        if entity.startswith(GROUP_PREFIX):
+            return PrincipalKind.GROUP, entity[len(GROUP_PREFIX) :]
+        raise ValueError(
+            f"Unknown entity type for '{entity}'. Must start with '{USER_PREFIX}' or '{GROUP_PREFIX}'."
+        )
 
-            groups = response.json().get("value", [])
-            if not groups:
-                raise ValueError(f"Group '{group_name}' not found.")
+    def principal_query(self, kind: PrincipalKind, name: str) -> Tuple[str, dict]:
+        """
+        Build the Graph query returning the principal with the given name.
+        :return: The collection URL and the query parameters.
+        """
+        collection, name_attribute, _ = PRINCIPAL_LOOKUPS[kind]
+        escaped = name.replace("'", "''")
+        params = {"$filter": f"{name_attribute} eq '{escaped}'", "$select": SELECT}
+        return f"{GRAPH_API_URL}/{collection}", params
 
-            return groups[0]["id"]
-        except Exception:
-            self.logger.exception("Exception in get_group_id")
-            raise
+    def to_principal(self, kind: PrincipalKind, name: str, body: dict) -> Principal:
+        """
+        Build the Principal from the body of a query built by `principal_query`.
+        :raises PrincipalNotFoundError: If the query matched nothing.
+        """
+        matches = body.get("value", [])
+        if not matches:
+            raise PrincipalNotFoundError(f"{kind.capitalize()} '{name}' not found.")
+        data = matches[0]
+        _, _, acl_attribute = PRINCIPAL_LOOKUPS[kind]
+        self.logger.info(
+            f"Validated {kind}: {data.get('displayName', 'Unknown')} ({data['id']})"
+        )
+        return Principal(
+            kind=kind,
+            id=data["id"],
+            display_name=data.get("displayName"),
+            acl_name=data.get(acl_attribute),
+        )
 
-    def get_group_id_lk(self, group_name):
+    def find_principal(self, kind: PrincipalKind, name: str) -> Principal:
         """
-        Retrieve the ID of a group from its display name using Microsoft Graph API.
-        :param group_name: The display name of the group.
-        :param headers: Headers containing the authorization token.
-        :return: The group ID.
+        Retrieve a user from its user principal name, or a group from its display name,
+        with a single Graph query selecting only the attributes needed.
+        :param kind: Whether to look for a user or a group.
+        :param name: The user principal name (email) or the group display name.
+        :return: The principal found.
         """
         try:
-            graph_endpoint = f"https://graph.microsoft.com/v1.0/groups?$filter=displayName eq '{group_name}'"
-            response = requests.get(graph_endpoint, headers=self.headers)
+            url, params = self.principal_query(kind, name)
+            response = self.http_client.get(url, params=params, headers=self.headers)
             if response.status_code != 200:
-                raise Exception(
-                    f"Failed to fetch group ID for '{group_name}': {response.text}"
-                )
-
-            groups = response.json().get("value", [])
-            if not groups:
-                raise ValueError(f"Group '{group_name}' not found.")
-
-            return groups[0]["id"]
+                raise Exception(f"Failed to fetch {kind} '{name}': {response.text}")
+            return self.to_principal(kind, name, response.json())
         except Exception:
-            self.logger.exception("Exception in get_group_id_lk")
+            self.logger.exception("Exception in find_principal")
             raise
 
-    def get_user_id(self, user_name, headers):
+    def resolve_principal(self, entity: str) -> Principal:
         """
-        Retrieve the ID of a user from its user principal name (email) using Microsoft Graph API.
-        :param user_name: The user principal name (email) of the user.
-        :param headers: Headers containing the authorization token.
-        :return: The user ID.
+        Resolve a Witboost identity ref to the Microsoft Entra principal it refers to.
+        :param entity: A ref such as 'user:name_domain.com' or 'group:name'.
+        :return: The resolved principal.
         """
-        try:
-            graph_endpoint = f"https://graph.microsoft.com/v1.0/users?$filter=userPrincipalName eq '{user_name}'"
-            response = requests.get(graph_endpoint, headers=headers)
-            if response.status_code != 200:
-                raise Exception(
-                    f"Failed to fetch user ID for '{user_name}': {response.text}"
-                )
+        return self.find_principal(*self.parse_ref(entity))
 
-            users = response.json().get("value", [])
-            if not users:
-                raise ValueError(f"User '{user_name}' not found.")
+    def resolve_principals(
+        self, entities: List[str]
+    ) -> Tuple[Dict[str, Principal], Dict[str, Exception]]:
+        """
+        Resolve many Witboost identity refs with Graph JSON batches of up to 20 queries.
 
-            return users[0]["id"]
-        except Exception:
-            self.logger.exception("Exception in get_user_id")
-            raise
+        Batches are sent concurrently, at most GRAPH_MAX_CONCURRENCY at a time, and
+        sub-requests are answered independently: a ref that cannot be resolved does not
+        fail the others. Throttled sub-requests are sent again in a later batch, after
+        the longest Retry-After they returned; those asking to wait more than
+        GRAPH_BATCH_MAX_DELAY seconds are reported as failed instead.
+        :param entities: The refs to resolve. They are validated before any call is made.
+        :return: The principals resolved and the errors of the refs that were not, by ref.
+        """  # noqa: E501
+        pending = {entity: self.parse_ref(entity) for entity in dict.fromkeys(entities)}
+        resolved: Dict[str, Principal] = {}
+        errors: Dict[str, Exception] = {}
+        max_retries = get_config_value("GRAPH_BATCH_MAX_RETRIES", 3)
+        max_concurrency = get_config_value("GRAPH_MAX_CONCURRENCY", 4)
+        max_delay = get_config_value("GRAPH_BATCH_MAX_DELAY", 30.0)
+        attempt = 0
+        while pending:
+            throttled: Dict[str, Tuple[PrincipalKind, str]] = {}
+            delay = 0.0
+            refs = list(pending)
+            chunks = [
+                {ref: pending[ref] for ref in refs[start : start + GRAPH_BATCH_SIZE]}
+                for start in range(0, len(refs), GRAPH_BATCH_SIZE)
+            ]
+            if len(chunks) == 1:
+                responses = [self._send_batch(chunks[0])]
+            else:
+                workers = min(max_concurrency, len(chunks))
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    responses = list(executor.map(self._send_batch, chunks))
+            for chunk, chunk_responses in zip(chunks, responses):
+                for ref, response in chunk_responses.items():
+                    kind, name = chunk[ref]
+                    status = response.get("status")
+                    if status in THROTTLED_STATUS_CODES and attempt < max_retries:
+                        retry_after = self._retry_after(response, attempt)
+                        if retry_after > max_delay:
+                            # Waiting would hold the request thread too long
+                            errors[ref] = Exception(
+                                f"Failed to fetch {kind} '{name}': throttled by Graph for {retry_after:.0f}s"  # noqa: E501
+                            )
+                            continue
+                        throttled[ref] = chunk[ref]
+                        delay = max(delay, retry_after)
+                    elif status == 200:
+                        try:
+                            resolved[ref] = self.to_principal(
+                                kind, name, response.get("body", {})
+                            )
+                        except PrincipalNotFoundError as e:
+                            errors[ref] = e
+                    else:
+                        errors[ref] = Exception(
+                            f"Failed to fetch {kind} '{name}': {response.get('body')}"
+                        )
+            if throttled:
+                self.logger.warning(
+                    f"{len(throttled)} Graph sub-requests throttled, retrying in {delay:.2f}s"  # noqa: E501
+                )
+                time.sleep(delay)
+            pending = throttled
+            attempt += 1
+        return resolved, errors
 
-    def get_user_id_lk(self, user_name):
+    def _send_batch(
+        self, chunk: Dict[str, Tuple[PrincipalKind, str]]
+    ) -> Dict[str, dict]:
         """
-        Retrieve the ID of a user from its user principal name (email) using Microsoft Graph API.
-        :param user_name: The user principal name (email) of the user.
-        :param headers: Headers containing the authorization token.
-        :return: The user ID.
+        Send one JSON batch with a principal query per ref.
+        :return: The sub-responses by ref.
         """
-        try:
-            graph_endpoint = f"https://graph.microsoft.com/v1.0/users?$filter=userPrincipalName eq '{user_name}'"
-            response = requests.get(graph_endpoint, headers=self.headers)
-            if response.status_code != 200:
-                raise Exception(
-                    f"Failed to fetch user ID for '{user_name}': {response.text}"
-                )
+        ids = {str(i): ref for i, ref in enumerate(chunk)}
+        sub_requests = []
+        for request_id, ref in ids.items():
+            url, params = self.principal_query(*chunk[ref])
+            query = urlencode(params, quote_via=quote, safe="$,")
+            sub_requests.append(
+                {
+                    "id": request_id,
+                    "method": "GET",
+                    "url": f"{url[len(GRAPH_API_URL):]}?{query}",
+                }
+            )
+        response = self.http_client.post(
+            f"{GRAPH_API_URL}/$batch",
+            json={"requests": sub_requests},
+            headers=self.headers,
+        )
+        if response.status_code != 200:
+            raise Exception(f"Failed to send Graph batch: {response.text}")
+        # Sub-responses are not guaranteed to come back in the order they were sent
+        responses = {r["id"]: r for r in response.json().get("responses", [])}
+        return {
+            ref: responses.get(request_id, {"status": None, "body": "No response"})
+            for request_id, ref in ids.items()
+        }
 
-            users = response.json().get("value", [])
-            if not users:
-                raise ValueError(f"User '{user_name}' not found.")
-
-            return users[0]["id"]
-        except Exception:
-            self.logger.exception("Exception in get_user_id_lk")
-            raise
+    @staticmethod
+    def _retry_after(response: dict, attempt: int) -> float:
+        headers = {k.lower(): v for k, v in (response.get("headers") or {}).items()}
+        try:
+            return float(headers["retry-after"])
+        except (KeyError, ValueError):
+            return min(30.0, 0.5 * 2**attempt)
 
-    def update_acl(self, entities):
+    def update_acl(self, entities: List[str]) -> List[str]:
         """
         Update ACL in the DWH to assign read-only permissions to a specific table.
+        Principals are resolved through a cache, so refs seen recently do not reach Graph;
+        the others are resolved together with Graph JSON batches.
         :param entities: List of Azure AD group names/IDs or user principal names (emails).
-        :return: A list of ACL entries.
-        """
+        :return: A list of ACL entries, in the order of the entities. No entities give an empty ACL, which removes every reader.
+        :raises PrincipalResolutionError: If any entity cannot be resolved, listing all of them.
+        """  # noqa: E501
         try:
-            # Define known prefixes for groups and users
-            GROUP_PREFIX = "group:"
-            USER_PREFIX = "user:"
+            acl_entries = []
 
-            # Authentication via Azure CLI
-            token = self.credential.get_token(
-                "https://graph.microsoft.com/.default"
-            ).token
+            self.logger.info(f"Processing {len(entities)} entities...")
+            principals: Dict[str, Principal] = {}
+            errors: Dict[str, Exception] = {}
+            missing = []
+            for entity in entities:
+                try:
+                    principals[entity] = self._principals.get(entity)
+                except KeyError:
+                    missing.append(entity)
+                except PrincipalNotFoundError as e:
+                    errors[entity] = e
 
-            headers = {"Authorization": f"Bearer {token}"}
+            if missing:
+                resolved, failed = self.resolve_principals(missing)
+                for entity, principal in resolved.items():
+                    self._principals.set(entity, principal)
+                for entity, error in failed.items():
+                    if isinstance(error, PrincipalNotFoundError):
+                        self._principals.set_error(entity, error)
+                principals.update(resolved)
+                errors.update(failed)
 
-            acl_entries = []
+            if errors:
+                # Nothing is granted unless every ref is resolved
+                raise PrincipalResolutionError(
+                    {entity: errors[entity] for entity in entities if entity in errors}
+                )
 
-            self.logger.info(f"Processing {len(entities)} entities...")
             for entity in entities:
-                # Determines whether the entity is a group or a user based on the prefix
-                if entity.startswith(USER_PREFIX):
-                    # Convert the user's name to ID if necessary
-                    parts = entity.rsplit("_", 1)
-                    entity = "@".join(parts)
-                    user_name = entity[len(USER_PREFIX) :]
-                    user_id = self.get_user_id(user_name, headers)
-
-                    user_endpoint = f"https://graph.microsoft.com/v1.0/users/{user_id}"
-                    user_response = requests.get(user_endpoint, headers=headers)
-                    if user_response.status_code != 200:
-                        raise Exception(
-                            f"Failed to validate user {user_id}: {user_response.text}"
-                        )
-                    user_data = user_response.json()
-                    self.logger.info(
-                        f"Validated user: {user_data.get('displayName', 'Unknown')} ({user_id})"
-                    )
-                    mail = user_data.get("mail")
-                    acl_entries.append(f"{mail}")
-
-                elif entity.startswith(GROUP_PREFIX):
-                    group_name = entity[len(GROUP_PREFIX) :]
-                    group_id = self.get_group_id(group_name, headers)
-
-                    group_endpoint = (
-                        f"https://graph.microsoft.com/v1.0/groups/{group_id}"
-                    )
-                    group_response = requests.get(group_endpoint, headers=headers)
-                    if group_response.status_code != 200:
-                        raise Exception(
-                            f"Failed to validate group {group_id}: {group_response.text}"
-                        )
-                    group_data = group_response.json()
-                    mailNickName = group_data.get("mailNickname")
-                    self.logger.info(
-                        f"Validated group: {group_data.get('displayName', 'Unknown')} ({group_id})"
-                    )
-                    acl_entries.append(f"{mailNickName}")
-
-                else:
-                    raise ValueError(
-                        f"Unknown entity type for '{entity}'. Must start with '{USER_PREFIX}' or '{GROUP_PREFIX}'."
-                    )
-
-            if not acl_entries:
-                raise ValueError("No valid groups or users provided.")
-            else:
-                return acl_entries
+                acl_entries.append(f"{principals[entity].acl_name}")
+
+            return acl_entries
 
         except Exception:
             self.logger.exception("Exception in update_acl")
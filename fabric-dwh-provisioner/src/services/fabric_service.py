@@ -1,200 +1,649 @@
 import struct
+import threading
+from contextlib import contextmanager
 from itertools import chain, repeat
-from typing import Any, List
+from typing import Any, Dict, Iterator, List, Set, Tuple
 
 import pyodbc  # type: ignore
 import requests
-from azure.identity import DefaultAzureCredential
 
+from src.models.constants import DATABASE_SCOPE, FABRIC_API_SCOPE
+from src.models.data_product_descriptor import SinkKind
+from src.models.fabric_models import ColumnDefinition, WarehouseHandle
+from src.services.schema_service import SQLSchemaMapper
+from src.utility.configuration_manager import get_config_value
+from src.utility.connection_pool import ConnectionPool, PoolStats
+from src.utility.http_client import HttpClient, get_http_client
 from src.utility.logger import get_logger
+from src.utility.token_provider import TokenProvider, get_token_provider
+from src.utility.tsql import (
+    quote_name,
+    quote_qualified_name,
+    quote_string,
+    split_name,
+)
+from src.utility.ttl_cache import TTLCache
+
+# Permissions that can be granted on a table
+TABLE_PERMISSIONS = frozenset({"SELECT", "ALL PRIVILEGES"})
+
+# Permissions granted on an object (class 1) as a whole (minor_id 0), by principal
+TABLE_GRANTS_QUERY = """
+SELECT pr.name, p.permission_name
+FROM sys.database_permissions AS p
+JOIN sys.database_principals AS pr ON pr.principal_id = p.grantee_principal_id
+WHERE p.class = 1 AND p.major_id = OBJECT_ID(?) AND p.minor_id = 0
+  AND p.state IN ('G', 'W')
+"""
+
+# Columns of a table, in the default schema of the user when none is given
+TABLE_COLUMNS_QUERY = """
+SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, NUMERIC_PRECISION,
+       NUMERIC_SCALE, IS_NULLABLE
+FROM INFORMATION_SCHEMA.COLUMNS
+WHERE TABLE_SCHEMA = COALESCE(?, SCHEMA_NAME()) AND TABLE_NAME = ?
+ORDER BY ORDINAL_POSITION
+"""
+
+
+class FabricItemNotFoundError(ValueError):
+    """
+    Raised when a workspace, warehouse or lakehouse does not exist.
+    """
+
+
+class SchemaConflictError(ValueError):
+    """
+    Raised when an existing table cannot be changed to the desired schema
+    without losing data.
+    """
+
+
+def _is_not_found(error: requests.HTTPError) -> bool:
+    return error.response is not None and error.response.status_code == 404
 
 
 class FabricService:
-    def __init__(self):
-        """
-        Initialize the FabricService with optional Azure credentials.
+    """
+    Client for the Fabric REST API and the warehouse SQL endpoints.
+
+    The service keeps no per-request state: endpoint resolution returns an immutable
+    `WarehouseHandle` that is passed to every operation, so a single instance can be
+    shared by concurrent requests. SQL connections are pooled per
+    (sql_endpoint, database) pair, and name-to-id resolutions are cached for
+    `FABRIC_RESOLUTION_CACHE_TTL` seconds (not-found results for
+    `FABRIC_RESOLUTION_CACHE_NEGATIVE_TTL` seconds).
+    """
+
+    def __init__(
+        self,
+        token_provider: TokenProvider | None = None,
+        http_client: HttpClient | None = None,
+    ):
         """
-        self.credential = DefaultAzureCredential()
-        self.workspace_name = None
-        self.dwh_name = None
-        self.connection = None
-        self.sql_endpoint = None
-        self.lakehouse_name = None
+        Initialize the FabricService.
+        :param token_provider: Token cache used to authenticate. Defaults to the process-wide one.
+        :param http_client: HTTP client used for the REST calls. Defaults to the process-wide one.
+        """  # noqa: E501
+        self.token_provider = token_provider or get_token_provider()
+        self.http_client = http_client or get_http_client()
         self.logger = get_logger(__name__)
+        self.pool_size = get_config_value("FABRIC_SQL_POOL_SIZE", 5)
+        self.pool_timeout = get_config_value("FABRIC_SQL_POOL_TIMEOUT", 30.0)
+        self._pools: Dict[Tuple[str, str], ConnectionPool] = {}
+        self._pools_lock = threading.Lock()
+        cache_ttl = get_config_value("FABRIC_RESOLUTION_CACHE_TTL", 300.0)
+        negative_ttl = get_config_value("FABRIC_RESOLUTION_CACHE_NEGATIVE_TTL", 30.0)
+        self._workspaces: TTLCache[str, dict] = TTLCache(
+            ttl=cache_ttl,
+            negative_ttl=negative_ttl,
+            negative_errors=(FabricItemNotFoundError,),
+        )
+        self._handles: TTLCache[Tuple[str, SinkKind, str], WarehouseHandle] = TTLCache(
+            ttl=cache_ttl,
+            negative_ttl=negative_ttl,
+            negative_errors=(FabricItemNotFoundError,),
+        )
 
     def get_headers(self, scope: str) -> dict:
-        token = self.credential.get_token(scope).token
+        token = self.token_provider.get_token(scope)
         return {"Authorization": f"Bearer {token}"}
 
-    def find_workspace(self) -> dict:
-        url = "https://api.powerbi.com/v1.0/myorg/groups"
-        headers = self.get_headers("https://analysis.windows.net/powerbi/api/.default")
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+    def iter_items(self, url: str, params: dict | None = None) -> Iterator[dict]:
+        """
+        Lazily iterate over the items of a Fabric list endpoint, following continuation tokens.
+        Pages are only requested when the caller consumes the previous one.
+        :param url: The list endpoint.
+        :param params: Optional query parameters for the first page.
+        """  # noqa: E501
+        params = dict(params or {})
+        while True:
+            headers = self.get_headers(FABRIC_API_SCOPE)
+            response = self.http_client.get(url, headers=headers, params=params)
+            response.raise_for_status()
+            body = response.json()
+            yield from body.get("value", [])
+            continuation_token = body.get("continuationToken")
+            if not continuation_token:
+                return
+            params = {**params, "continuationToken": continuation_token}
 
-        workspaces = response.json()["value"]
+    def find_workspace(self, workspace_name: str) -> dict:
+        url = "https://api.powerbi.com/v1.0/myorg/groups"
+        # Let the service filter the workspaces instead of downloading all of them
+        escaped_name = workspace_name.replace("'", "''")
+        params = {"$filter": f"name eq '{escaped_name}'", "$top": 1}
         workspace = next(
-            (w for w in workspaces if w["name"] == self.workspace_name), None
+            (w for w in self.iter_items(url, params) if w["name"] == workspace_name),
+            None,
         )
         if not workspace:
-            raise ValueError(f"Workspace '{self.workspace_name}' not found.")
+            raise FabricItemNotFoundError(f"Workspace '{workspace_name}' not found.")
         return workspace
 
-    def find_dwh(self, workspace_id: str) -> dict:
+    def find_dwh(self, workspace_id: str, dwh_name: str) -> dict:
         url = (
             f"https://api.fabric.microsoft.com/v1/workspaces/{workspace_id}/warehouses"
         )
-        headers = self.get_headers("https://analysis.windows.net/powerbi/api/.default")
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-
-        warehouses = response.json()["value"]
-        dwh = next((w for w in warehouses if w["displayName"] == self.dwh_name), None)
+        dwh = next(
+            (w for w in self.iter_items(url) if w["displayName"] == dwh_name), None
+        )
         if not dwh:
-            raise ValueError(
-                f"DWH '{self.dwh_name}' not found in workspace '{self.workspace_name}'."
+            raise FabricItemNotFoundError(
+                f"DWH '{dwh_name}' not found in workspace '{workspace_id}'."
             )
         return dwh
 
-    def find_lakehouse(self, workspace_id: str) -> dict:
+    def find_lakehouse(self, workspace_id: str, lakehouse_name: str) -> dict:
         url = (
             f"https://api.fabric.microsoft.com/v1/workspaces/{workspace_id}/lakehouses"
         )
-        headers = self.get_headers("https://analysis.windows.net/powerbi/api/.default")
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        warehouses = response.json()["value"]
         lakehouse = next(
-            (w for w in warehouses if w["displayName"] == self.lakehouse_name), None
+            (w for w in self.iter_items(url) if w["displayName"] == lakehouse_name),
+            None,
         )
         if not lakehouse:
-            raise ValueError(
-                f"DWH '{self.lakehouse_name}' not found in workspace.'{self.workspace_name}'"
+            raise FabricItemNotFoundError(
+                f"Lakehouse '{lakehouse_name}' not found in workspace '{workspace_id}'."
             )
         return lakehouse
 
-    def get_sql_endpoint(
+    def get_item(self, workspace_id: str, kind: SinkKind, item_id: str) -> dict:
+        """
+        Retrieve a warehouse or a lakehouse, including its properties, by id.
+        :param workspace_id: Id of the workspace containing the item.
+        :param kind: Whether the item is a warehouse or a lakehouse.
+        :param item_id: Id of the item.
+        """
+        collection = "warehouses" if kind == SinkKind.DWH else "lakehouses"
+        url = f"https://api.fabric.microsoft.com/v1/workspaces/{workspace_id}/{collection}/{item_id}"  # noqa: E501
+        headers = self.get_headers(FABRIC_API_SCOPE)
+        response = self.http_client.get(url, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    def resolve_warehouse(
         self,
         workspace_name: str,
         dwh_name: str | None = None,
         lakehouse_name: str | None = None,
-    ) -> str:
-        self.workspace_name = workspace_name
-        self.dwh_name = dwh_name
-        self.lakehouse_name = lakehouse_name
+        workspace_id: str | None = None,
+        item_id: str | None = None,
+    ) -> WarehouseHandle:
+        """
+        Resolve the SQL endpoint of a warehouse or of a lakehouse, using the resolution cache when possible.
+        When the ids are already known the item is fetched directly, without listing workspaces and items.
+        :param workspace_name: Name of the workspace containing the item.
+        :param dwh_name: Name of the warehouse. Mutually exclusive with lakehouse_name.
+        :param lakehouse_name: Name of the lakehouse. Mutually exclusive with dwh_name.
+        :param workspace_id: Optional id of the workspace, skipping the workspace lookup.
+        :param item_id: Optional id of the warehouse or lakehouse, used together with workspace_id.
+        :return: An immutable handle to be passed to the table operations.
+        """  # noqa: E501
         if dwh_name is not None and lakehouse_name is None:
-            workspace = self.find_workspace()
-            dwh = self.find_dwh(workspace["id"])
-            url = f"https://api.fabric.microsoft.com/v1/workspaces/{workspace['id']}/warehouses/{dwh['id']}"
-            headers = self.get_headers(
-                "https://analysis.windows.net/powerbi/api/.default"
-            )
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            self.sql_endpoint = response.json()["properties"]["connectionString"]
-            self.logger.info(f"SQL Endpoint found: {self.sql_endpoint}")
-            return self.sql_endpoint
+            key = (workspace_name, SinkKind.DWH, dwh_name)
         elif dwh_name is None and lakehouse_name is not None:
-            # This code could be useful to get sqlEndpoint for lakehouse, with this could be possible to do ql
-            workspace = self.find_workspace()
-            lake = self.find_lakehouse(workspace["id"])
-            lakehouse = lake["properties"]["sqlEndpointProperties"]["connectionString"]
-            return lakehouse
-        raise ValueError("Unable to determine the SQL Endpoint")
-
-    def connect(self):
-        if not self.sql_endpoint:
-            self.get_sql_endpoint()
-
-        self.connection_string = (
+            key = (workspace_name, SinkKind.LAKEHOUSE, lakehouse_name)
+        else:
+            raise ValueError("Unable to determine the SQL Endpoint")
+        return self._handles.get_or_load(
+            key, lambda: self._resolve_item(*key, workspace_id, item_id)
+        )
+
+    def invalidate_cache(self, workspace_name: str | None = None) -> None:
+        """
+        Drop cached resolutions, for a single workspace or for all of them.
+        :param workspace_name: Name of the workspace to forget. If None, the whole cache is cleared.
+        """  # noqa: E501
+        if workspace_name is None:
+            self._workspaces.clear()
+            self._handles.clear()
+        else:
+            self._workspaces.invalidate(workspace_name)
+            self._handles.invalidate_where(lambda key: key[0] == workspace_name)
+
+    def _get_workspace(self, workspace_name: str) -> dict:
+        return self._workspaces.get_or_load(
+            workspace_name, lambda: self.find_workspace(workspace_name)
+        )
+
+    def _find_item(self, workspace_id: str, kind: SinkKind, item_name: str) -> dict:
+        if kind == SinkKind.DWH:
+            return self.find_dwh(workspace_id, item_name)
+        return self.find_lakehouse(workspace_id, item_name)
+
+    def _resolve_item(
+        self,
+        workspace_name: str,
+        kind: SinkKind,
+        item_name: str,
+        workspace_id: str | None = None,
+        item_id: str | None = None,
+    ) -> WarehouseHandle:
+        if workspace_id is not None and item_id is not None:
+            try:
+                item = self.get_item(workspace_id, kind, item_id)
+                return self._to_handle(workspace_name, workspace_id, kind, item)
+            except requests.HTTPError as e:
+                if not _is_not_found(e):
+                    raise
+                self.logger.info(
+                    f"Item '{item_id}' not found by id, resolving '{item_name}' by name"
+                )
+                workspace_id = None
+
+        from_cache = workspace_id is None
+        if workspace_id is None:
+            workspace_id = self._get_workspace(workspace_name)["id"]
+        try:
+            item = self._find_item(workspace_id, kind, item_name)
+        except requests.HTTPError as e:
+            if not (from_cache and _is_not_found(e)):
+                raise
+            # The cached workspace id is stale: resolve the workspace again, once
+            self.logger.info(
+                f"Workspace '{workspace_name}' not found by id, refreshing"
+            )
+            self._workspaces.invalidate(workspace_name)
+            workspace_id = self._get_workspace(workspace_name)["id"]
+            item = self._find_item(workspace_id, kind, item_name)
+        return self._to_handle(workspace_name, workspace_id, kind, item)
+
+    def _to_handle(
+        self, workspace_name: str, workspace_id: str, kind: SinkKind, item: dict
+    ) -> WarehouseHandle:
+        sql_endpoint = self._connection_string(kind, item)
+        if not sql_endpoint:
+            # Not every listing carries the item properties: fetch the item itself
+            item = self.get_item(workspace_id, kind, item["id"])
+            sql_endpoint = self._connection_string(kind, item)
+        if not sql_endpoint:
+            raise ValueError(
+                f"Unable to determine the SQL Endpoint of '{item['displayName']}'"
+            )
+        self.logger.info(f"SQL Endpoint found: {sql_endpoint}")
+        return WarehouseHandle(
+            workspace_name=workspace_name,
+            workspace_id=workspace_id,
+            item_name=item["displayName"],
+            item_id=item["id"],
+            sql_endpoint=sql_endpoint,
+        )
+
+    @staticmethod
+    def _connection_string(kind: SinkKind, item: dict) -> str | None:
+        properties = item.get("properties") or {}
+        if kind == SinkKind.LAKEHOUSE:
+            properties = properties.get("sqlEndpointProperties") or {}
+        return properties.get("connectionString")
+
+    def connect(self, handle: WarehouseHandle) -> Tuple[Any, float]:
+        """
+        Open a new connection to the SQL endpoint of the given warehouse.
+        :param handle: The resolved warehouse.
+        :return: A pyodbc connection and the expiry timestamp of the token it was opened with.
+        """  # noqa: E501
+        connection_string = (
             f"Driver={{ODBC Driver 18 for SQL Server}};"
-            f"Server={self.sql_endpoint};"
-            f"Database={self.dwh_name};"
+            f"Server={handle.sql_endpoint};"
+            f"Database={handle.database};"
             f"TrustServerCertificate=Yes;"
         )
 
-        token_object = self.credential.get_token(
-            "https://database.windows.net/.default"
-        )
+        token_object = self.token_provider.get_access_token(DATABASE_SCOPE)
         token_as_bytes = bytes(token_object.token, "UTF-8")
         encoded_bytes = bytes(chain.from_iterable(zip(token_as_bytes, repeat(0))))
         token_bytes = struct.pack("<i", len(encoded_bytes)) + encoded_bytes
         attrs_before = {1256: token_bytes}
 
-        self.connection = pyodbc.connect(
-            self.connection_string, attrs_before=attrs_before
-        )
+        connection = pyodbc.connect(connection_string, attrs_before=attrs_before)
         self.logger.info("Connection to DWH successfully established.")
+        return connection, token_object.expires_on
+
+    @contextmanager
+    def connection(self, handle: WarehouseHandle) -> Iterator[Any]:
+        """
+        Borrow a pooled connection to the SQL endpoint of the given warehouse.
+        :param handle: The resolved warehouse.
+        """
+        with self._get_pool(handle).connection() as connection:
+            yield connection
+
+    def pool_stats(self) -> Dict[str, PoolStats]:
+        """
+        Return size and wait-time metrics of every connection pool, keyed by endpoint/database.
+        """  # noqa: E501
+        with self._pools_lock:
+            pools = dict(self._pools)
+        return {
+            f"{endpoint}/{db}": pool.stats() for (endpoint, db), pool in pools.items()
+        }
+
+    def _get_pool(self, handle: WarehouseHandle) -> ConnectionPool:
+        key = (handle.sql_endpoint, handle.database)
+        with self._pools_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(
+                    lambda: self.connect(handle),
+                    max_size=self.pool_size,
+                    acquire_timeout=self.pool_timeout,
+                )
+                self._pools[key] = pool
+            return pool
 
-    def execute_definition_query(self, query: str, params: List[Any] | None = None):
-        if not self.connection:
-            self.connect()
-        cursor = self.connection.cursor()
+    def execute_definition_query(
+        self, handle: WarehouseHandle, query: str, params: List[Any] | None = None
+    ):
+        with self.connection(handle) as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(query, params or [])
+                connection.commit()
+                self.logger.info("Operation completed successfully.")
+            except (pyodbc.Error, pyodbc.ProgrammingError):
+                self.logger.exception("Exception in execute_definition_query")
+                raise
+            finally:
+                cursor.close()
+
+    def get_table_columns(self, connection, table_name: str) -> List[ColumnDefinition]:
+        """
+        Read the column definitions of a table with a single INFORMATION_SCHEMA query.
+        :param connection: A connection to the warehouse containing the table.
+        :param table_name: The table, optionally qualified by its schema.
+        :return: The columns in ordinal order; empty if the table does not exist.
+        """
+        parts = split_name(table_name)
+        schema, table = (None, parts[-1]) if len(parts) == 1 else parts[-2:]
+        cursor = connection.cursor()
         try:
-            cursor.execute(query, params or [])
-            self.connection.commit()
-            self.logger.info("Operation completed successfully.")
-        except (pyodbc.Error, pyodbc.ProgrammingError):
-            self.logger.exception("Exception in execute_definition_query")
-            raise
+            cursor.execute(TABLE_COLUMNS_QUERY, [schema, table])
+            return [
+                ColumnDefinition(
+                    name=name,
+                    data_type=data_type.lower(),
+                    length=length,
+                    precision=precision,
+                    scale=scale,
+                    nullable=is_nullable == "YES",
+                )
+                for name, data_type, length, precision, scale, is_nullable in cursor.fetchall()  # noqa: E501
+            ]
         finally:
             cursor.close()
 
-    def create_table(self, table_name: str, schema: str) -> bool:
+    @staticmethod
+    def diff_columns(
+        table_name: str,
+        existing: List[ColumnDefinition],
+        desired: List[ColumnDefinition],
+    ) -> List[ColumnDefinition]:
         """
-        Create a table in the DWH.
-        :param table_name: Name of the table to create.
-        :param schema: The SQL schema for the table.
+        Compare the columns of an existing table with the desired ones.
+        :return: The desired columns missing from the table, which can be added to it.
+        :raises SchemaConflictError: If an existing column differs or is not desired anymore, or a missing column is NOT NULL.
+        """  # noqa: E501
+        current = {column.name.casefold(): column for column in existing}
+        wanted = {column.name.casefold() for column in desired}
+        conflicts = [
+            f"column '{column.name}' is not in the schema"
+            for key, column in current.items()
+            if key not in wanted
+        ]
+        added = []
+        for column in desired:
+            existing_column = current.get(column.name.casefold())
+            if existing_column is None:
+                if not column.nullable:
+                    conflicts.append(f"new column '{column.name}' is NOT NULL")
+                added.append(column)
+            elif not existing_column.matches(column):
+                conflicts.append(
+                    f"column '{column.name}' is {SQLSchemaMapper.column_to_sql(existing_column)}"  # noqa: E501
+                    f" instead of {SQLSchemaMapper.column_to_sql(column)}"
+                )
+        if conflicts:
+            raise SchemaConflictError(
+                f"Table '{table_name}' cannot be updated: {'; '.join(conflicts)}"
+            )
+        return added
+
+    def create_table(
+        self, handle: WarehouseHandle, table_name: str, columns: List[ColumnDefinition]
+    ) -> bool:
         """
-        query = f"CREATE TABLE {table_name} ({schema})"
-        self.logger.info(f"Creating table '{table_name}' with schema: {schema}")
-        self.execute_definition_query(query)
+        Create a table in the DWH, or bring an existing one up to date.
+
+        The current columns are read first: an identical table is left as it is, and
+        the missing columns of a compatible one are added with ALTER TABLE.
+        :param handle: The warehouse where the table is created.
+        :param table_name: Name of the table to create.
+        :param columns: The columns of the table, e.g. from SQLSchemaMapper.generate_column_definitions.
+        :raises SchemaConflictError: If the table exists with columns that cannot be changed without losing data.
+        """  # noqa: E501
+        table = quote_qualified_name(table_name)
+        with self.connection(handle) as connection:
+            existing = self.get_table_columns(connection, table_name)
+            if not existing:
+                definitions = ", ".join(map(SQLSchemaMapper.column_to_sql, columns))
+                query = f"CREATE TABLE {table} ({definitions})"
+                self.logger.info(f"Creating table '{table_name}': {query}")
+            else:
+                added = self.diff_columns(table_name, existing, columns)
+                if not added:
+                    self.logger.info(f"Table '{table_name}' is up to date")
+                    return True
+                definitions = ", ".join(map(SQLSchemaMapper.column_to_sql, added))
+                query = f"ALTER TABLE {table} ADD {definitions}"
+                self.logger.info(f"Adding columns to table '{table_name}': {query}")
+            cursor = connection.cursor()
+            try:
+                cursor.execute(query)
+                connection.commit()
+            finally:
+                cursor.close()
         return True
 
-    def drop_table(self, table_name: str) -> bool:
+    def drop_table(self, handle: WarehouseHandle, table_name: str) -> bool:
         """
         Delete a table from the DWH, if it exists.
+        :param handle: The warehouse containing the table.
         :param table_name: Name of the table to delete.
         """
-        query = f"DROP TABLE IF EXISTS {table_name}"
+        query = f"DROP TABLE IF EXISTS {quote_qualified_name(table_name)}"
         self.logger.info(f"Drop table: '{table_name}' if exist")
-        self.execute_definition_query(query)
+        self.execute_definition_query(handle, query)
         return True
 
+    def grant_on_table(
+        self,
+        handle: WarehouseHandle,
+        table_name: str,
+        principals: List[str],
+        permission: str = "SELECT",
+    ) -> Dict[str, str]:
+        """
+        Grant a permission on a table to many principals with a single T-SQL batch.
+
+        The GRANTs are sent in one round trip and run in one transaction, committed
+        only if all of them succeed.
+        :param handle: The warehouse containing the table.
+        :param table_name: The table, optionally qualified by its schema.
+        :param principals: The names of the users or groups to grant the permission to.
+        :param permission: One of TABLE_PERMISSIONS.
+        :return: The error message of each principal whose GRANT failed; empty if the transaction was committed.
+        """  # noqa: E501
+        if permission not in TABLE_PERMISSIONS:
+            raise ValueError(f"Unsupported permission '{permission}'")
+        principals = list(dict.fromkeys(principals))
+        if not principals:
+            return {}
+        table = quote_qualified_name(table_name)
+        self.logger.info(
+            f"Granting {permission} on {table} to {len(principals)} principal(s)"
+        )
+        with self.connection(handle) as connection:
+            return self._run_permission_batch(
+                connection,
+                [
+                    (p, f"GRANT {permission} ON {table} TO {quote_name(p)};")
+                    for p in principals
+                ],
+            )
+
+    def get_table_grants(self, connection, table_name: str) -> Dict[str, Set[str]]:
+        """
+        Read the permissions granted on a table with a single catalog query.
+        :param connection: A connection to the warehouse containing the table.
+        :param table_name: The table, optionally qualified by its schema.
+        :return: The permissions of each principal, by principal name.
+        """
+        cursor = connection.cursor()
+        try:
+            cursor.execute(TABLE_GRANTS_QUERY, [quote_qualified_name(table_name)])
+            grants: Dict[str, Set[str]] = {}
+            for name, permission in cursor.fetchall():
+                grants.setdefault(name, set()).add(permission)
+            return grants
+        finally:
+            cursor.close()
+
+    def reconcile_table_acl(
+        self, handle: WarehouseHandle, table_name: str, principals: List[str]
+    ) -> Dict[str, str]:
+        """
+        Make the given principals the only readers of a table.
+
+        The current grants are read with one catalog query and compared with the
+        desired ones: only the missing SELECTs are granted, and SELECT is revoked
+        from the principals no longer listed, in a single batch and transaction.
+        Principals holding any permission other than SELECT on the table, like the
+        development group, are never revoked. When nothing changes, the catalog
+        query is the only statement run.
+        :param handle: The warehouse containing the table.
+        :param table_name: The table, optionally qualified by its schema.
+        :param principals: The names of the users or groups that must be able to read the table.
+        :return: The error message of each principal whose GRANT or REVOKE failed; empty if the transaction was committed.
+        """  # noqa: E501
+        table = quote_qualified_name(table_name)
+        desired = {p.casefold(): p for p in principals}
+        with self.connection(handle) as connection:
+            grants = self.get_table_grants(connection, table_name)
+            readers = {
+                name.casefold(): name
+                for name, permissions in grants.items()
+                if "SELECT" in permissions
+            }
+            # Principals with other permissions are not managed through the ACL
+            managed = {
+                name.casefold(): name
+                for name, permissions in grants.items()
+                if permissions == {"SELECT"}
+            }
+            to_grant = [p for key, p in desired.items() if key not in readers]
+            to_revoke = [p for key, p in managed.items() if key not in desired]
+            self.logger.info(
+                f"ACL of {table}: {len(to_grant)} to grant, {len(to_revoke)} to revoke"
+            )
+            if not to_grant and not to_revoke:
+                return {}
+            changes = [
+                (p, f"GRANT SELECT ON {table} TO {quote_name(p)};") for p in to_grant
+            ] + [
+                (p, f"REVOKE SELECT ON {table} FROM {quote_name(p)};")
+                for p in to_revoke
+            ]
+            return self._run_permission_batch(connection, changes)
+
+    def _run_permission_batch(
+        self, connection, changes: List[Tuple[str, str]]
+    ) -> Dict[str, str]:
+        """
+        Run permission statements as one batch and one transaction.
+
+        Each statement is wrapped in TRY/CATCH, and a failing one returns a result
+        set with its principal and the error message. The transaction is committed
+        only if no statement failed.
+        :param changes: The principal and the statement of each change.
+        :return: The error message by principal of the statements that failed.
+        """
+        statements = ["SET NOCOUNT ON;"]
+        for principal, statement in changes:
+            statements.append(
+                f"BEGIN TRY {statement} END TRY "
+                f"BEGIN CATCH SELECT {quote_string(principal)} AS principal, ERROR_MESSAGE() AS error; END CATCH;"  # noqa: E501
+            )
+        cursor = connection.cursor()
+        try:
+            cursor.execute("\n".join(statements))
+            failures = {}
+            while True:
+                if cursor.description is not None:
+                    for principal, error in cursor.fetchall():
+                        failures[principal] = error
+                if not cursor.nextset():
+                    break
+            if failures:
+                connection.rollback()
+            else:
+                connection.commit()
+            return failures
+        finally:
+            cursor.close()
+
     def apply_acl_to_dwh_table(
-        self, acl_entries, table_name, provisioning=False
+        self, handle: WarehouseHandle, acl_entries, table_name, provisioning=False
     ) -> bool:
         """
         Connect to the DWH and apply ACL entries to a specific table.
+        When provisioning, all privileges are granted to the entries. Otherwise the
+        entries become the readers of the table: missing SELECTs are granted and
+        readers no longer listed are revoked. Changes are applied all together, or
+        not at all.
+        :param handle: The warehouse containing the table.
         :param acl_entries: List of ACL entries (e.g., groups or users).
         :param table_name: The table in the DWH for which to assign permissions.
+        :param provisioning: Grant all privileges instead of SELECT only.
         """
-        if not self.connection:
-            self.connect()
         try:
-            self.logger.info("Connecting to DWH...")
-            cursor = self.connection.cursor()
-            for acl_entry in acl_entries:
-                if provisioning:
-                    grant_query = f"""
-                            GRANT ALL PRIVILEGES ON {table_name} TO [{acl_entry}];
-                        """
-                    self.logger.info(f"Executing query: {grant_query}")
-                    cursor.execute(grant_query)
-                else:
-                    # Assign permission trough T-SQL
-                    grant_query = f"""
-                            GRANT SELECT ON {table_name} TO [{acl_entry}];
-                        """
-                    self.logger.info(f"Executing query: {grant_query}")
-                    cursor.execute(grant_query)
-
-            cursor.commit()
-            self.logger.info(f"Successfully updated ACL for table '{table_name}'.")
-            return True
+            if provisioning:
+                failures = self.grant_on_table(
+                    handle, table_name, acl_entries, permission="ALL PRIVILEGES"
+                )
+            else:
+                failures = self.reconcile_table_acl(handle, table_name, acl_entries)
         except Exception:
             self.logger.exception("Error applying ACL to table")
             return False
+        for principal, error in failures.items():
+            self.logger.error(
+                f"Unable to update the permissions of '{principal}' on '{table_name}': {error}"  # noqa: E501
+            )
+        if failures:
+            return False
+        self.logger.info(f"Successfully updated ACL for table '{table_name}'.")
+        return True
 
     def load_table(
         self,
@@ -211,12 +660,8 @@ class FabricService:
         :param table_name: Name of a new Table
         :relative_path: File path for create Table
         """
-        self.workspace_name = workspace_id
-        workspace_id_f = self.find_workspace()
-        self.lakehouse_name = lakehouse_id
-        lakehouse_id_f = self.find_lakehouse(workspace_id_f["id"])
-        url = f"https://api.fabric.microsoft.com/v1/workspaces/{workspace_id_f['id']}/lakehouses/{lakehouse_id_f['id']}/tables/{table_name}/load"
-        headers = self.get_headers("https://analysis.windows.net/powerbi/api/.default")
+        lakehouse = self.resolve_warehouse(workspace_id, lakehouse_name=lakehouse_id)
+        headers = self.get_headers(FABRIC_API_SCOPE)
         # The entire payload can be customized
         payload = {
             "relativePath": relative_path,
@@ -226,7 +671,20 @@ class FabricService:
             "formatOptions": {"format": file_format, "header": True, "delimiter": ","},
         }
 
-        response = requests.post(url, headers=headers, json=payload)
+        response = self.http_client.post(
+            self._load_table_url(lakehouse, table_name), headers=headers, json=payload
+        )
+        if response.status_code == 404:
+            # The cached ids are stale: resolve the lakehouse again, once
+            self.invalidate_cache(workspace_id)
+            lakehouse = self.resolve_warehouse(
+                workspace_id, lakehouse_name=lakehouse_id
+            )
+            response = self.http_client.post(
+                self._load_table_url(lakehouse, table_name),
+                headers=headers,
+                json=payload,
+            )
         if response.status_code == 202:
             self.logger.info(
                 f"Table '{table_name}' loaded successfully from '{relative_path}'."
@@ -238,10 +696,16 @@ class FabricService:
             )
             return False
 
+    @staticmethod
+    def _load_table_url(lakehouse: WarehouseHandle, table_name: str) -> str:
+        return f"https://api.fabric.microsoft.com/v1/workspaces/{lakehouse.workspace_id}/lakehouses/{lakehouse.item_id}/tables/{table_name}/load"  # noqa: E501
+
     def close(self):
         """
-        Close the connection to DWH
+        Close every pooled connection to the DWHs
         """
-        if self.connection:
-            self.connection.close()
-            self.logger.info("Connection to DWH closed")
+        with self._pools_lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+        self.logger.info("Connections to DWH closed")
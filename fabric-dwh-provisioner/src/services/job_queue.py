@@ -0,0 +1,437 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+from pydantic import BaseModel
+
+from src.models.api_models import ProvisioningStatus, Status1
+from src.models.job_models import IdempotencyKey
+from src.utility.configuration_manager import get_config_value
+from src.utility.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Connection factory of a DB-API 2.0 driver using the qmark paramstyle,
+# e.g. sqlite3 or pyodbc
+Connect = Callable[[], Any]
+
+QUEUED = "QUEUED"
+RUNNING = Status1.RUNNING.value
+FINISHED_STATES = (Status1.COMPLETED.value, Status1.FAILED.value)
+
+# Portable DDL: TEXT, FLOAT and INTEGER are understood by SQLite, SQL Server,
+# PostgreSQL and MySQL. Times are seconds since the epoch, as seen by the replicas.
+CREATE_JOBS_TABLE = """
+CREATE TABLE provisioning_jobs (
+    token VARCHAR(36) NOT NULL PRIMARY KEY,
+    state VARCHAR(16) NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    owner VARCHAR(255),
+    lease_expires_at FLOAT,
+    attempts INTEGER NOT NULL,
+    created_at FLOAT NOT NULL,
+    updated_at FLOAT NOT NULL
+)
+"""
+CREATE_JOBS_INDEX = """
+CREATE INDEX provisioning_jobs_state_lease
+ON provisioning_jobs (state, lease_expires_at)
+"""
+
+# Completed outcomes returned to the replays of their request, until expires_at.
+# Idempotency keys are hashed, as clients can send keys of any length.
+CREATE_OUTCOMES_TABLE = """
+CREATE TABLE provisioning_outcomes (
+    component_id VARCHAR(450) NOT NULL,
+    operation VARCHAR(16) NOT NULL,
+    key_hash VARCHAR(64) NOT NULL,
+    status VARCHAR(16) NOT NULL,
+    result TEXT,
+    expires_at FLOAT NOT NULL,
+    PRIMARY KEY (component_id, operation, key_hash)
+)
+"""
+
+# Jobs nobody works on: queued, or running under a lease that was not renewed
+CLAIMABLE = "(state = ? OR (state = ? AND lease_expires_at < ?))"
+
+
+class ClaimedJob(BaseModel):
+    """
+    A job leased to a worker, which must renew the lease until it completes the job.
+    """
+
+    token: str
+    request: str
+    attempts: int
+
+
+class JobQueue:
+    """
+    Provisioning jobs kept in a database shared by every replica of the provisioner.
+
+    Any replica can enqueue a job and any worker can claim it. A claim is a
+    conditional UPDATE which only succeeds if the job is still claimable, so two
+    workers never get the same job: the winner holds a lease that it renews with
+    `heartbeat` while it runs the job. When a replica dies, its leases expire and
+    the jobs are claimed again by the other replicas, up to `max_attempts` times.
+
+    The queue also keeps the outcomes of completed requests by idempotency key, so
+    that replays are recognized, and forgotten, by every replica.
+
+    Every method commits its own transaction, on a connection per thread.
+    """
+
+    def __init__(
+        self,
+        connect: Connect,
+        lease_duration: float = 30.0,
+        max_attempts: int = 3,
+        retention: float = 86400.0,
+    ):
+        """
+        :param connect: Opens a connection to the shared database.
+        :param lease_duration: Seconds a claim lasts without heartbeats.
+        :param max_attempts: Number of claims after which a job is marked FAILED.
+        :param retention: Seconds a finished job can still be read.
+        """
+        self.connect = connect
+        self.lease_duration = lease_duration
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._local = threading.local()
+        self._connections: List[Any] = []
+        self._connections_lock = threading.Lock()
+
+    def create_schema(self) -> None:
+        """
+        Create the jobs and outcomes tables unless they exist.
+        """
+        self._create_table("provisioning_jobs", CREATE_JOBS_TABLE, CREATE_JOBS_INDEX)
+        self._create_table("provisioning_outcomes", CREATE_OUTCOMES_TABLE)
+
+    def _create_table(self, table: str, *statements: str) -> None:
+        if self._table_exists(table):
+            return
+        connection = self._connection()
+        cursor = connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            # Replicas starting together race to create the table: one of them
+            # wins and the others fail with a duplicate object error
+            if not self._table_exists(table):
+                raise
+            logger.info(f"The {table} table was created by another replica")
+
+    def _table_exists(self, table: str) -> bool:
+        connection = self._connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(f"SELECT 1 FROM {table} WHERE 1 = 0")
+            cursor.fetchall()
+            connection.commit()
+            return True
+        except Exception:
+            connection.rollback()
+            return False
+
+    def enqueue(self, token: str, request: str) -> None:
+        """
+        Add a job, to be run by the first worker that claims it.
+        """
+        now = time.time()
+        self._execute(
+            """
+            INSERT INTO provisioning_jobs (token, state, request, attempts, created_at, updated_at)
+            VALUES (?, ?, ?, 0, ?, ?)
+            """,  # noqa: E501
+            (token, QUEUED, request, now, now),
+        )
+
+    def claim(self, owner: str) -> Optional[ClaimedJob]:
+        """
+        Lease the oldest claimable job to a worker.
+        :param owner: Unique id of the worker.
+        :return: The job, or None if there is nothing to do.
+        """
+        connection = self._connection()
+        cursor = connection.cursor()
+        now = time.time()
+        cursor.execute(
+            f"SELECT token FROM provisioning_jobs WHERE {CLAIMABLE} ORDER BY created_at",
+            (QUEUED, RUNNING, now),
+        )
+        # The first candidates are enough: losing them all to other workers only
+        # delays this worker to its next poll
+        candidates = [row[0] for row in cursor.fetchmany(10)]
+        connection.commit()
+        for token in candidates:
+            cursor.execute(
+                f"""
+                UPDATE provisioning_jobs
+                SET state = ?, owner = ?, lease_expires_at = ?, attempts = attempts + 1,
+                    updated_at = ?
+                WHERE token = ? AND {CLAIMABLE}
+                """,
+                (RUNNING, owner, now + self.lease_duration, now, token)
+                + (QUEUED, RUNNING, now),
+            )
+            claimed = cursor.rowcount == 1
+            connection.commit()
+            if not claimed:
+                continue
+            cursor.execute(
+                "SELECT request, attempts FROM provisioning_jobs WHERE token = ?",
+                (token,),
+            )
+            request, attempts = cursor.fetchone()
+            connection.commit()
+            if attempts > self.max_attempts:
+                logger.warning(f"Job {token} abandoned after {attempts - 1} attempts")
+                self.complete(
+                    token,
+                    owner,
+                    ProvisioningStatus(
+                        status=Status1.FAILED,
+                        result=f"The operation was interrupted {attempts - 1} times",
+                    ),
+                )
+                continue
+            logger.info(f"Job {token} claimed by {owner}, attempt {attempts}")
+            return ClaimedJob(token=token, request=request, attempts=attempts)
+        return None
+
+    def heartbeat(self, tokens: Iterable[str], owner: str) -> List[str]:
+        """
+        Renew the leases of the jobs run by a worker.
+        :return: The tokens whose lease was lost, because it expired and another
+            worker claimed the job.
+        """
+        lost = []
+        expires_at = time.time() + self.lease_duration
+        for token in tokens:
+            rowcount = self._execute(
+                """
+                UPDATE provisioning_jobs SET lease_expires_at = ?
+                WHERE token = ? AND owner = ? AND state = ?
+                """,
+                (expires_at, token, owner, RUNNING),
+            )
+            if rowcount != 1:
+                lost.append(token)
+        return lost
+
+    def complete(self, token: str, owner: str, status: ProvisioningStatus) -> bool:
+        """
+        Record the outcome of a job, unless its lease was lost.
+        :return: Whether the outcome was recorded.
+        """
+        rowcount = self._execute(
+            """
+            UPDATE provisioning_jobs
+            SET state = ?, result = ?, owner = NULL, lease_expires_at = NULL, updated_at = ?
+            WHERE token = ? AND owner = ? AND state = ?
+            """,  # noqa: E501
+            (status.status.value, status.result, time.time(), token, owner, RUNNING),
+        )
+        return rowcount == 1
+
+    def get(self, token: str) -> ProvisioningStatus | None:
+        """
+        Return the status of a job, or None if the token is unknown or expired.
+        Queued jobs are reported as RUNNING.
+        """
+        connection = self._connection()
+        cursor = connection.cursor()
+        cursor.execute(
+            "SELECT state, result, updated_at FROM provisioning_jobs WHERE token = ?",
+            (token,),
+        )
+        row = cursor.fetchone()
+        connection.commit()
+        if row is None:
+            return None
+        state, result, updated_at = row
+        if state not in FINISHED_STATES:
+            return ProvisioningStatus(status=Status1.RUNNING, result="")
+        if time.time() - updated_at > self.retention:
+            return None
+        return ProvisioningStatus(status=Status1(state), result=result or "")
+
+    def record_outcome(
+        self, key: IdempotencyKey, status: ProvisioningStatus, ttl: float
+    ) -> None:
+        """
+        Keep the outcome of a completed request for the replays of its request,
+        wherever they are received.
+        :param ttl: Seconds the outcome is returned to replays.
+        """
+        component_id, operation, key_hash = self._outcome_key(key)
+        connection = self._connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(
+                """
+                DELETE FROM provisioning_outcomes
+                WHERE component_id = ? AND operation = ? AND key_hash = ?
+                """,
+                (component_id, operation, key_hash),
+            )
+            cursor.execute(
+                """
+                INSERT INTO provisioning_outcomes (component_id, operation, key_hash, status, result, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,  # noqa: E501
+                (component_id, operation, key_hash)
+                + (status.status.value, status.result, time.time() + ttl),
+            )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    def get_outcome(self, key: IdempotencyKey) -> ProvisioningStatus | None:
+        """
+        Return the stored outcome of a request, or None if unknown or expired.
+        """
+        connection = self._connection()
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT status, result FROM provisioning_outcomes
+            WHERE component_id = ? AND operation = ? AND key_hash = ? AND expires_at >= ?
+            """,  # noqa: E501
+            self._outcome_key(key) + (time.time(),),
+        )
+        row = cursor.fetchone()
+        connection.commit()
+        if row is None:
+            return None
+        return ProvisioningStatus(status=Status1(row[0]), result=row[1] or "")
+
+    def forget_outcomes(self, key: IdempotencyKey) -> int:
+        """
+        Delete the stored outcomes of a component, except the one of the given key.
+        :return: The number of outcomes deleted.
+        """
+        component_id, operation, key_hash = self._outcome_key(key)
+        return self._execute(
+            """
+            DELETE FROM provisioning_outcomes
+            WHERE component_id = ? AND NOT (operation = ? AND key_hash = ?)
+            """,
+            (component_id, operation, key_hash),
+        )
+
+    def compact(self) -> int:
+        """
+        Delete the finished jobs older than the retention and the expired outcomes.
+        :return: The number of jobs and outcomes deleted.
+        """
+        now = time.time()
+        jobs = self._execute(
+            "DELETE FROM provisioning_jobs WHERE state IN (?, ?) AND updated_at < ?",
+            FINISHED_STATES + (now - self.retention,),
+        )
+        outcomes = self._execute(
+            "DELETE FROM provisioning_outcomes WHERE expires_at < ?", (now,)
+        )
+        return jobs + outcomes
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                logger.exception("Unable to close a job queue connection")
+
+    @staticmethod
+    def _outcome_key(key: IdempotencyKey) -> IdempotencyKey:
+        component_id, operation, idempotency_key = key
+        return (
+            component_id,
+            operation,
+            hashlib.sha256(idempotency_key.encode()).hexdigest(),
+        )
+
+    def _execute(self, query: str, params: tuple) -> int:
+        connection = self._connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query, params)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return cursor.rowcount
+
+    def _connection(self) -> Any:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self.connect()
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+
+def sqlite_connector(path: str) -> Connect:
+    """
+    Connection factory of a SQLite database, for tests and single-node setups.
+    """
+
+    def connect() -> sqlite3.Connection:
+        # Connections are used by one thread but closed by the one closing the queue
+        connection = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    return connect
+
+
+def odbc_connector(connection_string: str) -> Connect:
+    """
+    Connection factory of a database reached through ODBC, e.g. Azure SQL.
+    """
+
+    def connect() -> Any:
+        import pyodbc  # type: ignore
+
+        return pyodbc.connect(connection_string)
+
+    return connect
+
+
+def create_job_queue() -> JobQueue:
+    """
+    Create the JobQueue configured with JOB_QUEUE_DATABASE, either "sqlite:<path>"
+    or "odbc:<connection string>", JOB_LEASE_DURATION, JOB_MAX_ATTEMPTS and
+    JOB_RETENTION.
+    """
+    database = get_config_value("JOB_QUEUE_DATABASE", "sqlite:jobs.db")
+    scheme, _, target = database.partition(":")
+    if scheme == "sqlite":
+        connect = sqlite_connector(target)
+    elif scheme == "odbc":
+        connect = odbc_connector(target)
+    else:
+        raise ValueError(
+            f"Unknown JOB_QUEUE_DATABASE scheme '{scheme}': expected 'sqlite' or 'odbc'"
+        )
+    queue = JobQueue(
+        connect,
+        lease_duration=get_config_value("JOB_LEASE_DURATION", 30.0),
+        max_attempts=get_config_value("JOB_MAX_ATTEMPTS", 3),
+        retention=get_config_value("JOB_RETENTION", 86400.0),
+    )
+    queue.create_schema()
+    return queue
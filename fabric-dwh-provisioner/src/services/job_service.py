@@ -0,0 +1,445 @@
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Set, Tuple
+
+from src.models.api_models import ProvisioningStatus, Status1, SystemErr
+from src.models.data_product_descriptor import components_context
+from src.models.job_models import IdempotencyKey, JobRequest
+from src.services.job_queue import JobQueue, create_job_queue
+from src.services.job_store import InMemoryJobStore, JobStore, create_job_store
+from src.utility.configuration_manager import get_config_value
+from src.utility.logger import get_logger
+from src.utility.single_flight import SingleFlight
+from src.utility.ttl_cache import TTLCache
+
+Executor = Callable[[JobRequest], ProvisioningStatus | SystemErr]
+
+
+class JobService:
+    """
+    Runs provisioning operations, either in the caller thread or in the background.
+
+    When asynchronous, `run` submits the operation to a thread pool and returns a
+    token at once; the outcome is then read with `get_status`, which reports
+    RUNNING until the operation ends and COMPLETED or FAILED afterwards. Statuses
+    are kept in a JobStore.
+
+    Identical requests arriving while one of them is in flight, e.g. retries or
+    double clicks, are coalesced: synchronous callers wait for the outcome of the
+    first one, asynchronous callers get the token of its job.
+
+    Completed outcomes are kept for `idempotency_retention` seconds, by idempotency
+    key: replays of a request get the stored status without running the operation
+    again. Running another request on the same component forgets them.
+    """
+
+    def __init__(
+        self,
+        execute: Executor,
+        asynchronous: bool = False,
+        max_workers: int = 4,
+        store: JobStore | None = None,
+        idempotency_retention: float = 3600.0,
+    ):
+        """
+        :param execute: Runs the operation of a job request, e.g. ProvisioningService.execute.
+        :param asynchronous: Whether operations run in the background.
+        :param max_workers: Maximum number of operations running at the same time.
+        :param store: Where job statuses are kept. Defaults to an InMemoryJobStore.
+        :param idempotency_retention: Seconds a completed outcome is returned to replays.
+        """  # noqa: E501
+        self.execute = execute
+        self.asynchronous = asynchronous
+        self.store = store or InMemoryJobStore()
+        self.logger = get_logger(__name__)
+        self._in_flight: SingleFlight[
+            Tuple[str, str], ProvisioningStatus | SystemErr
+        ] = SingleFlight()
+        # Token of the last job submitted for each coalescing key. Entries only speed
+        # up duplicates, so they can expire before long jobs end
+        self._submitted: TTLCache[Tuple[str, str], str] = TTLCache(ttl=3600.0)
+        self._submit_lock = threading.Lock()
+        self.idempotency_retention = idempotency_retention
+        self._completed: TTLCache[IdempotencyKey, ProvisioningStatus] = TTLCache(
+            ttl=idempotency_retention
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="provisioning"
+        )
+        # Tokens of the jobs submitted to the executor which have not started yet
+        self._queued: Set[str] = set()
+        self._queued_lock = threading.Lock()
+
+    def run(
+        self, request: JobRequest, idempotency_key: str | None = None
+    ) -> ProvisioningStatus | SystemErr | str:
+        """
+        Run an operation.
+        :param idempotency_key: Identifies the retries of the request. Defaults to the
+            fingerprint of the request.
+        :return: The outcome of the operation or, when asynchronous, the token of its
+            job; the stored outcome if the request was already completed.
+        """
+        # Serializing a large descriptor is costly: hash it once for both keys
+        fingerprint = None if idempotency_key else request.fingerprint()
+        key = self.idempotency_key(request, idempotency_key or fingerprint)
+        completed = self.stored_outcome(key)
+        if completed is not None:
+            self.logger.info(f"Replay of the completed {key[1]} on {key[0]}")
+            return completed
+        if self.asynchronous:
+            return self.submit(request, key, fingerprint)
+        flight_key = request.coalescing_key(fingerprint)
+        if self._in_flight.in_flight(flight_key):
+            self.logger.info(f"Waiting for the identical request on {key[0]}")
+        return self._in_flight.do(flight_key, partial(self._run_now, request, key))
+
+    @staticmethod
+    def idempotency_key(
+        request: JobRequest, idempotency_key: str | None = None
+    ) -> IdempotencyKey:
+        return (
+            request.component_id,
+            request.operation.value,
+            idempotency_key or request.fingerprint(),
+        )
+
+    def stored_outcome(self, key: IdempotencyKey) -> ProvisioningStatus | None:
+        """
+        Return the completed outcome of a request, or None if it must run.
+        """
+        try:
+            return self._completed.get(key)
+        except KeyError:
+            return None
+
+    def record_outcome(
+        self,
+        key: IdempotencyKey,
+        outcome: ProvisioningStatus | SystemErr,
+    ) -> None:
+        """
+        Keep a completed outcome for the replays of its request.
+        """
+        if (
+            isinstance(outcome, ProvisioningStatus)
+            and outcome.status == Status1.COMPLETED
+        ):
+            self._completed.set(key, outcome)
+
+    def _run_now(
+        self, request: JobRequest, key: IdempotencyKey
+    ) -> ProvisioningStatus | SystemErr:
+        self._forget_other_outcomes(key)
+        outcome = self.execute(request)
+        self.record_outcome(key, outcome)
+        return outcome
+
+    def _forget_other_outcomes(self, key: IdempotencyKey) -> None:
+        # Any other run changes the component: a provisioning completed before an
+        # unprovisioning, or an ACL replaced since, must run again
+        component_id = key[0]
+        self._completed.invalidate_where(lambda k: k[0] == component_id and k != key)
+
+    def submit(
+        self,
+        request: JobRequest,
+        key: IdempotencyKey | None = None,
+        fingerprint: str | None = None,
+    ) -> str:
+        """
+        Start an operation in the background, unless an identical one is running.
+        :param key: The idempotency key of the request, see `idempotency_key`.
+        :param fingerprint: The fingerprint of the request, if already computed.
+        :return: The token used to read the status of the job.
+        """
+        if key is None:
+            fingerprint = fingerprint or request.fingerprint()
+            key = self.idempotency_key(request, fingerprint)
+        flight_key = request.coalescing_key(fingerprint)
+        with self._submit_lock:
+            try:
+                token = self._submitted.get(flight_key)
+            except KeyError:
+                token = None
+            if token is not None:
+                status = self.get_status(token)
+                if status is not None and status.status == Status1.RUNNING:
+                    self.logger.info(f"Request coalesced with job {token}")
+                    return token
+            self._forget_other_outcomes(key)
+            token = self._start(request, key)
+            self._submitted.set(flight_key, token)
+        return token
+
+    def _start(self, request: JobRequest, key: IdempotencyKey) -> str:
+        token = str(uuid.uuid4())
+        self.store.put(token, ProvisioningStatus(status=Status1.RUNNING, result=""))
+        with self._queued_lock:
+            self._queued.add(token)
+        self._executor.submit(self._run_job, token, request, key)
+        self.logger.info(f"Job {token} submitted")
+        return token
+
+    def get_status(self, token: str) -> ProvisioningStatus | None:
+        """
+        Return the status of a job, or None if the token is unknown.
+        """
+        return self.store.get(token)
+
+    def close(self) -> None:
+        """
+        Wait for the running jobs to end, stop accepting new ones and close the store.
+        Jobs that did not start are cancelled and reported as FAILED.
+        """
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._queued_lock:
+            cancelled, self._queued = self._queued, set()
+        for token in cancelled:
+            self.store.put(
+                token,
+                ProvisioningStatus(
+                    status=Status1.FAILED,
+                    result="The operation was cancelled by a shutdown of the provisioner",
+                ),
+            )
+        if cancelled:
+            self.logger.warning(f"{len(cancelled)} queued job(s) cancelled")
+        self.store.close()
+
+    def _run_job(self, token: str, request: JobRequest, key: IdempotencyKey) -> None:
+        with self._queued_lock:
+            self._queued.discard(token)
+        status = self.execute_job(token, request)
+        self.record_outcome(key, status)
+        self.store.put(token, status)
+
+    def execute_job(self, token: str, request: JobRequest) -> ProvisioningStatus:
+        """
+        Run the operation of a job, turning errors into a FAILED status.
+        """
+        try:
+            outcome = self.execute(request)
+        except Exception as e:
+            self.logger.exception(f"Job {token} failed")
+            outcome = SystemErr(error=f"Unexpected error: {e}")
+        if isinstance(outcome, SystemErr):
+            status = ProvisioningStatus(status=Status1.FAILED, result=outcome.error)
+        else:
+            status = outcome
+        self.logger.info(f"Job {token} ended with status {status.status}")
+        return status
+
+
+class DistributedJobService(JobService):
+    """
+    JobService sharing its jobs with the other replicas of the provisioner through
+    a JobQueue.
+
+    Submitted jobs are enqueued, and every replica runs `max_workers` workers which
+    claim queued jobs, so work spreads over all the replicas and any replica can
+    report the status of any job. A heartbeat thread renews the leases of the jobs
+    running in this replica; when a replica dies, its jobs are taken over by the
+    others once their leases expire. A job may then run twice, which is safe
+    because provisioning operations are idempotent. Completed outcomes are kept in
+    the queue too, so that a replay received by any replica is recognized, and a
+    request run on any replica forgets the outcomes it makes stale. The heartbeat
+    thread also deletes the finished jobs older than the retention of the queue, and
+    the expired outcomes, every `compaction_interval` seconds.
+
+    Synchronous operations still run in the caller thread and skip the queue.
+    """
+
+    def __init__(
+        self,
+        execute: Executor,
+        queue: JobQueue,
+        asynchronous: bool = True,
+        max_workers: int = 4,
+        poll_interval: float = 1.0,
+        idempotency_retention: float = 3600.0,
+        compaction_interval: float = 600.0,
+    ):
+        """
+        :param execute: Runs the operation of a job request, e.g. ProvisioningService.execute.
+        :param queue: The queue shared by the replicas.
+        :param asynchronous: Whether operations run in the background.
+        :param max_workers: Number of jobs this replica runs at the same time.
+        :param poll_interval: Seconds an idle worker waits before looking for jobs again.
+        :param idempotency_retention: Seconds a completed outcome is returned to replays.
+        :param compaction_interval: Seconds between two compactions of the queue.
+        """  # noqa: E501
+        super().__init__(
+            execute,
+            asynchronous,
+            max_workers=max_workers,
+            idempotency_retention=idempotency_retention,
+        )
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.compaction_interval = compaction_interval
+        self.replica_id = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        # Token of the job run by each worker, by worker id
+        self._running: Dict[str, str] = {}
+        self._running_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._wake = threading.Event()
+        # Idempotency keys of the jobs submitted to this replica, by token
+        self._job_keys: TTLCache[str, IdempotencyKey] = TTLCache(ttl=3600.0)
+        for i in range(max_workers):
+            self._executor.submit(self._work, f"{self.replica_id}-{i}")
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat, name="job-heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def _start(self, request: JobRequest, key: IdempotencyKey) -> str:
+        token = str(uuid.uuid4())
+        self._job_keys.set(token, key)
+        self.queue.enqueue(token, request.to_json())
+        self._wake.set()
+        self.logger.info(f"Job {token} queued")
+        return token
+
+    def get_status(self, token: str) -> ProvisioningStatus | None:
+        return self.queue.get(token)
+
+    def stored_outcome(self, key: IdempotencyKey) -> ProvisioningStatus | None:
+        if self.idempotency_retention <= 0:
+            return None
+        try:
+            return self.queue.get_outcome(key)
+        except Exception:
+            # Running the request again is safe, operations being idempotent
+            self.logger.exception("Unable to read the stored outcomes")
+            return None
+
+    def record_outcome(
+        self,
+        key: IdempotencyKey,
+        outcome: ProvisioningStatus | SystemErr,
+    ) -> None:
+        if (
+            self.idempotency_retention <= 0
+            or not isinstance(outcome, ProvisioningStatus)
+            or outcome.status != Status1.COMPLETED
+        ):
+            return
+        try:
+            self.queue.record_outcome(key, outcome, self.idempotency_retention)
+        except Exception:
+            self.logger.exception("Unable to store the outcome of a request")
+
+    def _forget_other_outcomes(self, key: IdempotencyKey) -> None:
+        # Raising keeps a stale outcome from being replayed by any replica
+        self.queue.forget_outcomes(key)
+
+    def close(self) -> None:
+        """
+        Wait for the running jobs to end and stop claiming new ones. Queued jobs
+        are left to the other replicas.
+        """
+        self._stopped.set()
+        self._wake.set()
+        self._heartbeat_thread.join()
+        super().close()
+        self.queue.close()
+
+    def _work(self, owner: str) -> None:
+        while not self._stopped.is_set():
+            try:
+                job = self.queue.claim(owner)
+            except Exception:
+                self.logger.exception("Unable to claim a job")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            with self._running_lock:
+                self._running[owner] = job.token
+            try:
+                # The request was validated when submitted: only its component is needed
+                request = JobRequest.model_validate_json(
+                    job.request, context=components_context(lazy=True)
+                )
+                status = self.execute_job(job.token, request)
+                self.record_outcome(self._job_key(job.token, request), status)
+                if not self.queue.complete(job.token, owner, status):
+                    self.logger.warning(
+                        f"Job {job.token} was taken over by another replica, "
+                        "its outcome is discarded"
+                    )
+            except Exception:
+                # The lease expires and the job is claimed again
+                self.logger.exception(f"Unable to complete job {job.token}")
+            finally:
+                with self._running_lock:
+                    del self._running[owner]
+
+    def _job_key(self, token: str, request: JobRequest) -> IdempotencyKey:
+        # Jobs submitted to other replicas are recorded by fingerprint
+        try:
+            key = self._job_keys.get(token)
+        except KeyError:
+            return self.idempotency_key(request)
+        self._job_keys.invalidate(token)
+        return key
+
+    def _heartbeat(self) -> None:
+        next_compaction = time.monotonic() + self.compaction_interval
+        # Renew leases three times per lease duration, so one missed beat is harmless
+        while not self._stopped.wait(self.queue.lease_duration / 3):
+            with self._running_lock:
+                running = list(self._running.items())
+            for owner, token in running:
+                try:
+                    if self.queue.heartbeat([token], owner):
+                        self.logger.warning(f"Lost the lease of job {token}")
+                except Exception:
+                    self.logger.exception(f"Unable to renew the lease of job {token}")
+            if time.monotonic() >= next_compaction:
+                next_compaction = time.monotonic() + self.compaction_interval
+                self._compact()
+
+    def _compact(self) -> None:
+        try:
+            deleted = self.queue.compact()
+        except Exception:
+            self.logger.exception("Unable to compact the job queue")
+            return
+        if deleted:
+            self.logger.info(f"{deleted} finished job(s) deleted from the queue")
+
+
+def create_job_service(execute: Executor) -> JobService:
+    """
+    Create the JobService configured with ASYNC_PROVISIONING,
+    ASYNC_PROVISIONING_WORKERS and IDEMPOTENCY_RETENTION. With JOB_STORE set to "shared", jobs go through the
+    JobQueue shared by the replicas, polled every JOB_POLL_INTERVAL seconds and
+    compacted every JOB_COMPACTION_INTERVAL seconds; otherwise they are kept in the JobStore of this replica.
+    """
+    asynchronous = get_config_value("ASYNC_PROVISIONING", False)
+    max_workers = get_config_value("ASYNC_PROVISIONING_WORKERS", 4)
+    idempotency_retention = get_config_value("IDEMPOTENCY_RETENTION", 3600.0)
+    if get_config_value("JOB_STORE", "memory") == "shared":
+        return DistributedJobService(
+            execute,
+            create_job_queue(),
+            asynchronous=asynchronous,
+            max_workers=max_workers,
+            poll_interval=get_config_value("JOB_POLL_INTERVAL", 1.0),
+            compaction_interval=get_config_value("JOB_COMPACTION_INTERVAL", 600.0),
+            idempotency_retention=idempotency_retention,
+        )
+    return JobService(
+        execute,
+        asynchronous=asynchronous,
+        max_workers=max_workers,
+        store=create_job_store(),
+        idempotency_retention=idempotency_retention,
+    )
@@ -0,0 +1,264 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Tuple
+
+from src.models.api_models import ProvisioningStatus, Status1
+from src.utility.configuration_manager import get_config_value
+from src.utility.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class JobStore(ABC):
+    """
+    Keeps the status of provisioning jobs by token.
+
+    Jobs that are over (COMPLETED or FAILED) are deleted once they have not changed
+    for `retention` seconds; running jobs are never deleted.
+    """
+
+    def __init__(self, retention: float):
+        """
+        :param retention: Seconds a finished job can still be read.
+        """
+        self.retention = retention
+
+    @abstractmethod
+    def put(self, token: str, status: ProvisioningStatus) -> None:
+        """
+        Create or update the status of a job.
+        """
+
+    @abstractmethod
+    def get(self, token: str) -> ProvisioningStatus | None:
+        """
+        Return the status of a job, or None if the token is unknown or expired.
+        """
+
+    @abstractmethod
+    def compact(self) -> int:
+        """
+        Delete the finished jobs older than the retention.
+        :return: The number of jobs deleted.
+        """
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryJobStore(JobStore):
+    """
+    JobStore kept in the memory of the process: jobs are lost on restart.
+    Compaction runs on writes, at most once every `retention / 10` seconds.
+    """
+
+    def __init__(self, retention: float = 86400.0):
+        super().__init__(retention)
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Tuple[ProvisioningStatus, float]] = {}
+        self._next_compaction = time.monotonic() + retention / 10
+
+    def put(self, token: str, status: ProvisioningStatus) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._jobs[token] = (status, now)
+        if now >= self._next_compaction:
+            self._next_compaction = now + self.retention / 10
+            self.compact()
+
+    def get(self, token: str) -> ProvisioningStatus | None:
+        with self._lock:
+            job = self._jobs.get(token)
+        if job is None or self._expired(*job, time.monotonic()):
+            return None
+        return job[0]
+
+    def compact(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [t for t, job in self._jobs.items() if self._expired(*job, now)]
+            for token in expired:
+                del self._jobs[token]
+        return len(expired)
+
+    def _expired(
+        self, status: ProvisioningStatus, updated_at: float, now: float
+    ) -> bool:
+        return status.status != Status1.RUNNING and now - updated_at > self.retention
+
+
+class SQLiteJobStore(JobStore):
+    """
+    JobStore persisted in a SQLite database in WAL mode, so that jobs survive
+    restarts of the process.
+
+    Writes are batched: `put` records the status in memory and a background thread
+    writes the pending statuses every `flush_interval` seconds in one transaction.
+    Reads see pending statuses first, then the database, where tokens are the
+    primary key. Jobs still RUNNING when the store is opened were interrupted by a
+    restart, and are marked FAILED.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        retention: float = 86400.0,
+        flush_interval: float = 0.05,
+        compaction_interval: float = 600.0,
+    ):
+        """
+        :param path: Path of the database file.
+        :param retention: Seconds a finished job can still be read.
+        :param flush_interval: Maximum seconds a status waits before being written.
+        :param compaction_interval: Seconds between two compactions.
+        """
+        super().__init__(retention)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.compaction_interval = compaction_interval
+        self._pending: Dict[str, Tuple[ProvisioningStatus, float]] = {}
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._writer = self._connect()
+        self._writer.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                token TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_state_updated_at ON jobs (state, updated_at);
+            """)
+        self._fail_interrupted_jobs()
+        self._reader = self._connect()
+        self._reader_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name="job-store-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put(self, token: str, status: ProvisioningStatus) -> None:
+        with self._pending_lock:
+            self._pending[token] = (status, time.time())
+        self._wake.set()
+
+    def get(self, token: str) -> ProvisioningStatus | None:
+        with self._pending_lock:
+            pending = self._pending.get(token)
+        if pending is not None:
+            return pending[0]
+        with self._reader_lock:
+            row = self._reader.execute(
+                "SELECT payload, updated_at FROM jobs WHERE token = ?", (token,)
+            ).fetchone()
+        if row is None:
+            return None
+        status = ProvisioningStatus.model_validate_json(row[0])
+        if status.status != Status1.RUNNING and time.time() - row[1] > self.retention:
+            return None
+        return status
+
+    def compact(self) -> int:
+        with self._reader_lock:
+            with self._reader:
+                cursor = self._reader.execute(
+                    "DELETE FROM jobs WHERE state != ? AND updated_at < ?",
+                    (Status1.RUNNING.value, time.time() - self.retention),
+                )
+        return cursor.rowcount
+
+    def flush(self) -> None:
+        """
+        Write the pending statuses now.
+        """
+        with self._pending_lock:
+            pending = dict(self._pending)
+        if not pending:
+            return
+        rows = [
+            (token, status.status.value, status.model_dump_json(), updated_at)
+            for token, (status, updated_at) in pending.items()
+        ]
+        with self._writer:
+            self._writer.executemany(
+                """
+                INSERT INTO jobs (token, state, payload, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (token) DO UPDATE SET
+                    state = excluded.state,
+                    payload = excluded.payload,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+        # Statuses stay readable from memory until written, unless replaced meanwhile
+        with self._pending_lock:
+            for token, entry in pending.items():
+                if self._pending.get(token) is entry:
+                    del self._pending[token]
+
+    def close(self) -> None:
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        self._reader.close()
+        self._writer.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last transactions on power loss
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _fail_interrupted_jobs(self) -> None:
+        interrupted = ProvisioningStatus(
+            status=Status1.FAILED,
+            result="The operation was interrupted by a restart of the provisioner",
+        )
+        with self._writer:
+            cursor = self._writer.execute(
+                "UPDATE jobs SET state = ?, payload = ?, updated_at = ? WHERE state = ?",
+                (
+                    interrupted.status.value,
+                    interrupted.model_dump_json(),
+                    time.time(),
+                    Status1.RUNNING.value,
+                ),
+            )
+        if cursor.rowcount:
+            logger.warning(f"{cursor.rowcount} interrupted job(s) marked as failed")
+
+    def _run(self) -> None:
+        next_compaction = time.monotonic() + self.compaction_interval
+        while not self._closed.is_set():
+            self._wake.wait(self.compaction_interval)
+            # Give concurrent transitions the time to join the same transaction
+            self._closed.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() >= next_compaction:
+                    next_compaction = time.monotonic() + self.compaction_interval
+                    self.compact()
+            except sqlite3.Error:
+                logger.exception("Unable to write the job statuses")
+        self.flush()
+
+
+def create_job_store() -> JobStore:
+    """
+    Create the JobStore configured with JOB_STORE ("memory" or "sqlite"),
+    JOB_STORE_PATH and JOB_RETENTION.
+    """
+    kind = get_config_value("JOB_STORE", "memory")
+    retention = get_config_value("JOB_RETENTION", 86400.0)
+    if kind == "memory":
+        return InMemoryJobStore(retention)
+    if kind == "sqlite":
+        return SQLiteJobStore(
+            get_config_value("JOB_STORE_PATH", "jobs.db"), retention=retention
+        )
+    raise ValueError(f"Unknown JOB_STORE '{kind}': expected 'memory' or 'sqlite'")
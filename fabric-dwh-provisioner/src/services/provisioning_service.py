@@ -0,0 +1,140 @@
+from typing import List
+
+from src.models.api_models import ProvisioningStatus, Status1, SystemErr
+from src.models.data_product_descriptor import DataProduct, FabricOutputPort, SinkKind
+from src.models.fabric_models import WarehouseHandle
+from src.models.job_models import JobRequest, OperationKind
+from src.services.acl_service import AzureFabricApiService
+from src.services.fabric_service import FabricService
+from src.services.schema_service import SQLSchemaMapper
+from src.utility.logger import get_logger
+
+
+class ProvisioningService:
+    """
+    Provisioning, unprovisioning and ACL update of Fabric output ports.
+
+    The operations do not depend on the HTTP request they come from, so the routes
+    can run them in the request thread or hand them over to the JobService.
+    """
+
+    def __init__(
+        self,
+        fabric_service: FabricService,
+        azure_service: AzureFabricApiService,
+        schema_service: SQLSchemaMapper | None = None,
+    ):
+        self.fabric_service = fabric_service
+        self.azure_service = azure_service
+        self.schema_service = schema_service or SQLSchemaMapper()
+        self.logger = get_logger(__name__)
+
+    def resolve_warehouse(self, component: FabricOutputPort) -> WarehouseHandle:
+        return self.fabric_service.resolve_warehouse(
+            workspace_name=component.specific.workspace,
+            dwh_name=component.specific.warehouse,
+            workspace_id=component.specific.workspaceId,
+            item_id=component.specific.warehouseId,
+        )
+
+    def execute(self, request: JobRequest) -> ProvisioningStatus | SystemErr:
+        """
+        Run the operation described by a job request.
+        """
+        if request.operation == OperationKind.PROVISION:
+            return self.provision(request.data_product, request.component_id)
+        if request.operation == OperationKind.UNPROVISION:
+            return self.unprovision(
+                request.data_product, request.component_id, request.remove_data
+            )
+        return self.update_acl(request.data_product, request.component_id, request.refs)
+
+    def provision(
+        self, data_product: DataProduct, component_id: str
+    ) -> ProvisioningStatus | SystemErr:
+        """
+        Create the table of an output port and grant all privileges on it to the
+        development group of the data product.
+        """
+        self.logger.info("Provisioning component with id: " + component_id)
+        component = data_product.get_typed_component_by_id(
+            component_id, FabricOutputPort
+        )
+        if component is None:
+            return SystemErr(error=f"Component {component_id} not found")
+        sink = component.specific.sink
+        if sink != SinkKind.DWH:
+            return SystemErr(error=f"Unsupported sink {sink}")
+        columns = self.schema_service.generate_column_definitions(
+            schema=component.dataContract.schema_, nullable=True
+        )
+        dev_group = "group:" + data_product.devGroup
+        try:
+            warehouse = self.resolve_warehouse(component)
+            if self.fabric_service.create_table(
+                warehouse, table_name=component.specific.table, columns=columns
+            ):
+                self.fabric_service.apply_acl_to_dwh_table(
+                    warehouse,
+                    self.azure_service.update_acl([dev_group]),
+                    component.specific.table,
+                    True,
+                )
+                return ProvisioningStatus(
+                    status=Status1.COMPLETED, result="Provisioning completed"
+                )
+            return ProvisioningStatus(
+                status=Status1.FAILED, result="Provisioning not completed"
+            )
+        except Exception as e:
+            return SystemErr(error=f"Provisioning not completed, the error is: {e}")
+
+    def unprovision(
+        self, data_product: DataProduct, component_id: str, remove_data: bool
+    ) -> ProvisioningStatus | SystemErr:
+        """
+        Drop the table of an output port.
+        """
+        self.logger.info("Unprovisioning component with id: " + component_id)
+        component = data_product.get_typed_component_by_id(
+            component_id, FabricOutputPort
+        )
+        if component is None:
+            return SystemErr(error=f"Component {component_id} not found")
+        try:
+            warehouse = self.resolve_warehouse(component)
+            if self.fabric_service.drop_table(warehouse, component.specific.table):
+                return ProvisioningStatus(
+                    status=Status1.COMPLETED, result="Unprovisioning completed"
+                )
+            return ProvisioningStatus(
+                status=Status1.FAILED, result="Unprovisioning not completed"
+            )
+        except Exception as e:
+            return SystemErr(error=f"Response {e}")
+
+    def update_acl(
+        self, data_product: DataProduct, component_id: str, refs: List[str]
+    ) -> ProvisioningStatus | SystemErr:
+        """
+        Make the given users and groups the readers of the table of an output port.
+        """
+        self.logger.info("Updating the ACL of component with id: " + component_id)
+        component = data_product.get_typed_component_by_id(
+            component_id, FabricOutputPort
+        )
+        if component is None:
+            return SystemErr(error=f"Component {component_id} not found")
+        try:
+            warehouse = self.resolve_warehouse(component)
+            if self.fabric_service.apply_acl_to_dwh_table(
+                warehouse,
+                acl_entries=self.azure_service.update_acl(refs),
+                table_name=component.specific.table,
+            ):
+                return ProvisioningStatus(
+                    status=Status1.COMPLETED, result="Acl updated"
+                )
+            return ProvisioningStatus(status=Status1.FAILED, result="Acl not updated")
+        except Exception as err:
+            return SystemErr(error=f"Error{err}")
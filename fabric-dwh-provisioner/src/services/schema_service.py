@@ -1,3 +1,15 @@
+from typing import List
+
+from src.models.fabric_models import (
+    CHARACTER_TYPES,
+    DECIMAL_TYPES,
+    MAX_LENGTH,
+    MAX_LENGTH_TYPES,
+    ColumnDefinition,
+)
+from src.utility.tsql import quote_name
+
+
 class SQLSchemaMapper:
     @staticmethod
     def map_data_type(column):
@@ -22,26 +34,70 @@ class SQLSchemaMapper:
             return column.dataType.lower()
 
     @staticmethod
-    def generate_sql_schema(schema, nullable=True):
+    def generate_column_definitions(schema, nullable=True) -> List[ColumnDefinition]:
         """
-        Generate SQL schema based on the provided columns.
+        Generate the definitions of the columns of a table.
         :param schema: List of OpenMetadataColumn objects.
-        :param nullable: If True, adds 'NULL' to each column.
-        :return: String with the complete SQL schema.
+        :param nullable: If True, the columns accept NULL.
+        :return: The column definitions, in the order of the schema.
         """
-        sql_columns = []
+        columns = []
         for col in schema:
             sql_type = SQLSchemaMapper.map_data_type(col)
-            nullability = "NULL" if nullable else "NOT NULL"
             if sql_type.startswith("varchar"):
-                sql_columns.append(
-                    f"\t[{col.name}] [varchar]({col.dataLength}) {nullability}"
+                column = ColumnDefinition(
+                    name=col.name,
+                    data_type="varchar",
+                    length=col.dataLength or MAX_LENGTH,
+                    nullable=nullable,
                 )
             elif "decimal" in sql_type:
-                sql_columns.append(
-                    f"\t[{col.name}] [decimal]({col.precision},{col.scale}) {nullability}"
+                column = ColumnDefinition(
+                    name=col.name,
+                    data_type="decimal",
+                    precision=col.precision,
+                    scale=col.scale,
+                    nullable=nullable,
+                )
+            elif sql_type in CHARACTER_TYPES:
+                column = ColumnDefinition(
+                    name=col.name,
+                    data_type=sql_type,
+                    length=col.dataLength,
+                    nullable=nullable,
                 )
             else:
-                sql_columns.append(f"\t[{col.name}] [{sql_type}] {nullability}")
+                column = ColumnDefinition(
+                    name=col.name, data_type=sql_type, nullable=nullable
+                )
+            columns.append(column)
+        return columns
 
-        return ",\n".join(sql_columns)
+    @staticmethod
+    def column_to_sql(column: ColumnDefinition) -> str:
+        """
+        Render a column definition as used in CREATE TABLE and ALTER TABLE ADD.
+        """
+        data_type = quote_name(column.data_type)
+        if column.data_type in CHARACTER_TYPES and column.length is not None:
+            if column.length != MAX_LENGTH:
+                data_type += f"({column.length})"
+            elif column.data_type in MAX_LENGTH_TYPES:
+                data_type += "(max)"
+        elif column.data_type in DECIMAL_TYPES and column.precision is not None:
+            data_type += f"({column.precision},{column.scale or 0})"
+        nullability = "NULL" if column.nullable else "NOT NULL"
+        return f"{quote_name(column.name)} {data_type} {nullability}"
+
+    @staticmethod
+    def generate_sql_schema(schema, nullable=True):
+        """
+        Generate SQL schema based on the provided columns.
+        :param schema: List of OpenMetadataColumn objects.
+        :param nullable: If True, adds 'NULL' to each column.
+        :return: String with the complete SQL schema.
+        """
+        return ",\n".join(
+            f"\t{SQLSchemaMapper.column_to_sql(column)}"
+            for column in SQLSchemaMapper.generate_column_definitions(schema, nullable)
+        )
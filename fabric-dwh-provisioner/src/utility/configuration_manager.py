@@ -1,4 +1,7 @@
 import os
+from typing import TypeVar
+
+T = TypeVar("T", bool, int, float, str)
 
 
 class ConfigurationManager:
@@ -6,3 +9,34 @@ class ConfigurationManager:
         self.value = os.getenv(configuration_key)
         if self.value is None:
             raise ValueError(f"Required environment key {configuration_key} not found")
+
+
+def get_config_value(configuration_key: str, default: T) -> T:
+    """
+    Read an optional environment key, converting it to the type of the default value.
+
+    Args:
+        configuration_key (str): The environment key to read.
+        default (bool | int | float | str): Value returned when the key is not set.
+
+    Returns:
+        The value of the environment key, or the default if the key is not set.
+
+    Raises:
+        ValueError: If the value cannot be converted to the type of the default.
+    """
+    value = os.getenv(configuration_key)
+    if value is None:
+        return default
+    if isinstance(default, bool):
+        if value.lower() in ("true", "1", "yes"):
+            return True  # type: ignore[return-value]
+        if value.lower() in ("false", "0", "no"):
+            return False  # type: ignore[return-value]
+        raise ValueError(f"Environment key {configuration_key} must be a boolean")
+    try:
+        return type(default)(value)
+    except ValueError:
+        raise ValueError(
+            f"Environment key {configuration_key} must be of type {type(default).__name__}"
+        )
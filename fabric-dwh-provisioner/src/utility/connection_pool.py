@@ -0,0 +1,225 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Tuple
+
+from pydantic import BaseModel
+
+from src.utility.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """
+    Raised when no connection becomes available within the acquire timeout.
+    """
+
+
+class PoolStats(BaseModel):
+    size: int
+    idle: int
+    in_use: int
+    max_size: int
+    acquisitions: int
+    created: int
+    recycled: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+
+class _PooledConnection:
+    def __init__(self, connection: Any, expires_on: float):
+        self.connection = connection
+        self.expires_on = expires_on
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections towards a single database.
+
+    Connections are created through the `connect` callable, which returns the
+    connection together with the expiry timestamp of the credential embedded in it.
+    A connection is recycled once it gets closer than `recycle_margin` seconds to that
+    expiry, and it is validated with `ping_query` before being reused if it has been
+    idle for more than `ping_after` seconds.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Tuple[Any, float]],
+        max_size: int = 5,
+        acquire_timeout: float = 30.0,
+        recycle_margin: float = 300.0,
+        ping_after: float = 10.0,
+        ping_query: str = "SELECT 1",
+    ):
+        """
+        :param connect: Callable returning a new connection and the epoch timestamp at which its token expires.
+        :param max_size: Maximum number of open connections.
+        :param acquire_timeout: Seconds to wait for a free connection before raising PoolTimeoutError.
+        :param recycle_margin: Seconds before token expiry after which a connection is closed instead of reused.
+        :param ping_after: Idle seconds after which a connection is validated before being reused.
+        :param ping_query: Query used to validate a connection.
+        """  # noqa: E501
+        self._connect = connect
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.recycle_margin = recycle_margin
+        self.ping_after = ping_after
+        self.ping_query = ping_query
+        self._condition = threading.Condition()
+        self._idle: List[_PooledConnection] = []
+        self._size = 0
+        self._closed = False
+        self._acquisitions = 0
+        self._created = 0
+        self._recycled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Borrow a connection for the duration of the `with` block.
+
+        When the block ends, the pending transaction is rolled back, so the next
+        borrower never inherits one, e.g. the implicit transaction of a SELECT; a
+        connection that cannot be rolled back is discarded instead of being returned
+        to the pool.
+        """
+        pooled = self._acquire()
+        try:
+            yield pooled.connection
+        finally:
+            self._release(pooled, healthy=self._rollback(pooled))
+
+    def stats(self) -> PoolStats:
+        with self._condition:
+            return PoolStats(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                max_size=self.max_size,
+                acquisitions=self._acquisitions,
+                created=self._created,
+                recycled=self._recycled,
+                total_wait_seconds=self._total_wait,
+                max_wait_seconds=self._max_wait,
+            )
+
+    def close(self) -> None:
+        """
+        Close every idle connection. Connections in use are closed when released.
+        """
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close(pooled)
+
+    def _acquire(self) -> _PooledConnection:
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        while True:
+            candidate = None
+            create = False
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError("The connection pool is closed")
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No connection available after {self.acquire_timeout}s"
+                        )
+                    self._condition.wait(remaining)
+
+            if create:
+                candidate = self._create()
+            elif candidate is not None and not self._usable(candidate):
+                self._discard(candidate)
+                continue
+
+            waited = time.monotonic() - start
+            with self._condition:
+                self._acquisitions += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            if waited > 1:
+                logger.info(f"Waited {waited:.2f}s for a pooled connection")
+            return candidate  # type: ignore[return-value]
+
+    def _create(self) -> _PooledConnection:
+        try:
+            connection, expires_on = self._connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._created += 1
+        return _PooledConnection(connection, expires_on)
+
+    def _usable(self, pooled: _PooledConnection) -> bool:
+        if time.time() >= pooled.expires_on - self.recycle_margin:
+            with self._condition:
+                self._recycled += 1
+            return False
+        if time.monotonic() - pooled.last_used < self.ping_after:
+            return True
+        try:
+            cursor = pooled.connection.cursor()
+            try:
+                cursor.execute(self.ping_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding a pooled connection that failed pre-ping: {e}")
+            return False
+
+    def _rollback(self, pooled: _PooledConnection) -> bool:
+        try:
+            pooled.connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _release(self, pooled: _PooledConnection, healthy: bool) -> None:
+        if not healthy:
+            self._discard(pooled)
+            return
+        pooled.last_used = time.monotonic()
+        with self._condition:
+            if not self._closed:
+                self._idle.append(pooled)
+                self._condition.notify()
+                return
+            self._size -= 1
+        self._close(pooled)
+
+    def _discard(self, pooled: _PooledConnection) -> None:
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        self._close(pooled)
+
+    @staticmethod
+    def _close(pooled: _PooledConnection) -> None:
+        try:
+            pooled.connection.close()
+        except Exception:
+            logger.debug("Error closing a pooled connection", exc_info=True)
@@ -0,0 +1,97 @@
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Tuple, TypeVar
+
+from src.utility.configuration_manager import get_config_value
+
+T = TypeVar("T")
+
+
+class DescriptorCache:
+    """
+    Thread-safe LRU cache of parsed descriptors, keyed by a hash of their content.
+
+    The cache is bounded both in entries and in memory. An entry accounts for the
+    size of its descriptor times `weight_factor`, an estimate of how much larger
+    the parsed objects are than the YAML they come from; descriptors that could not
+    fit alone are not cached.
+
+    Cached values are never handed out: every call returns a deep copy, so callers
+    can mutate what they get without affecting the other requests.
+    """
+
+    def __init__(
+        self, max_bytes: int, max_entries: int = 256, weight_factor: int = 8
+    ) -> None:
+        """
+        :param max_bytes: Memory budget of the cache, in estimated bytes.
+        :param max_entries: Maximum number of descriptors kept.
+        :param weight_factor: Estimated ratio between the size of parsed objects and
+            the size of their descriptor.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.weight_factor = weight_factor
+        self.size = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, Tuple[Any, int]] = OrderedDict()
+
+    @staticmethod
+    def key(descriptor: str) -> str:
+        # Line endings and surrounding whitespace do not change the parsed descriptor
+        normalized = descriptor.replace("\r\n", "\n").strip()
+        return hashlib.sha256(normalized.encode()).hexdigest()
+
+    def get_or_parse(self, descriptor: str, parse: Callable[[str], T]) -> T:
+        """
+        Return a copy of the parsed descriptor, calling parse and caching its result
+        on a miss.
+        """
+        key = self.key(descriptor)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            value = parse(descriptor)
+            self._store(key, value, len(descriptor) * self.weight_factor)
+        else:
+            value = entry[0]
+        return copy.deepcopy(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _store(self, key: str, value: Any, weight: int) -> None:
+        if weight > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (value, weight)
+            self.size += weight
+            while self.size > self.max_bytes or len(self._entries) > self.max_entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+
+@lru_cache
+def get_descriptor_cache() -> DescriptorCache:
+    """
+    Return the DescriptorCache shared by the requests, configured with
+    DESCRIPTOR_CACHE_MAX_BYTES and DESCRIPTOR_CACHE_MAX_ENTRIES.
+    """
+    return DescriptorCache(
+        max_bytes=get_config_value("DESCRIPTOR_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        max_entries=get_config_value("DESCRIPTOR_CACHE_MAX_ENTRIES", 256),
+    )
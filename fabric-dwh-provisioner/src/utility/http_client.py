@@ -0,0 +1,182 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import Callable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.utility.configuration_manager import get_config_value
+from src.utility.logger import get_logger
+
+logger = get_logger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of the traffic.
+
+    Every request deposits `ratio` tokens, up to `max_tokens`, and every retry
+    withdraws one, so that a failing dependency cannot be flooded with retries.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class HttpClient:
+    """
+    HTTP client shared by the services calling the Fabric, Power BI and Graph APIs.
+
+    Connections are kept alive in per-host pools shared by all threads. Every request
+    has connect and read timeouts. Throttled (429) and unavailable (502/503/504)
+    responses are retried honoring `Retry-After`, otherwise with exponential backoff
+    and full jitter; connection errors are retried for idempotent methods only.
+    Retries are bounded per request by `max_retries` and globally by a RetryBudget.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        retry_budget: RetryBudget | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        :param pool_connections: Number of per-host connection pools to keep.
+        :param pool_maxsize: Maximum number of kept-alive connections per host.
+        :param connect_timeout: Seconds to wait for a connection to be established.
+        :param read_timeout: Seconds to wait for the server to send data.
+        :param max_retries: Maximum number of retries for a single request.
+        :param backoff_base: Base delay in seconds of the exponential backoff.
+        :param backoff_max: Maximum delay in seconds between two attempts, including Retry-After.
+        :param retry_budget: Budget shared by all requests. Defaults to a new RetryBudget.
+        :param sleep: Function used to wait between attempts.
+        """  # noqa: E501
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget or RetryBudget()
+        self._sleep = sleep
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        # Sessions are not thread-safe, so each thread gets its own one; the adapter,
+        # and with it the connection pools, is shared.
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying it when it is throttled or fails transiently.
+        :return: The last response received. Non-retryable error statuses are returned as they are.
+        :raises requests.RequestException: If the last attempt failed without a response.
+        """  # noqa: E501
+        kwargs.setdefault("timeout", self.timeout)
+        self.retry_budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if method.upper() not in IDEMPOTENT_METHODS or not self._can_retry(
+                    attempt
+                ):
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{method} {url} failed ({e}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    return response
+                retry_after = self._retry_after(response)
+                delay = self._backoff(attempt) if retry_after is None else retry_after
+                if delay > self.backoff_max or not self._can_retry(attempt):
+                    return response
+                logger.warning(
+                    f"{method} {url} returned {response.status_code}, retrying in {delay:.2f}s"  # noqa: E501
+                )
+                response.close()
+            self._sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self._adapter.close()
+
+    def _can_retry(self, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if not self.retry_budget.withdraw():
+            logger.warning("Retry budget exhausted, not retrying")
+            return False
+        return True
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            delay = float(value)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        # A little jitter avoids all throttled callers coming back at the same time
+        return max(0.0, delay) * random.uniform(1.0, 1.1)
+
+
+@lru_cache(maxsize=None)
+def get_http_client() -> HttpClient:
+    """
+    Return the process-wide HttpClient, configured from the environment.
+    """
+    return HttpClient(
+        pool_maxsize=get_config_value("HTTP_POOL_MAXSIZE", 20),
+        connect_timeout=get_config_value("HTTP_CONNECT_TIMEOUT", 5.0),
+        read_timeout=get_config_value("HTTP_READ_TIMEOUT", 60.0),
+        max_retries=get_config_value("HTTP_MAX_RETRIES", 4),
+    )
@@ -0,0 +1,42 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Coalesces concurrent calls sharing a key: the first caller runs the function
+    and the callers arriving while it runs wait for its outcome, value or error,
+    instead of running it again. Nothing is cached once the call is over.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[K, Future] = {}
+
+    def do(self, key: K, fn: Callable[[], V]) -> V:
+        """
+        Run fn, unless a call with the same key is in flight, and return its result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+        try:
+            call.set_result(fn())
+        except BaseException as e:
+            call.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return call.result()
+
+    def in_flight(self, key: K) -> bool:
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,130 @@
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import Callable, Dict
+
+from azure.core.credentials import AccessToken, TokenCredential
+from azure.identity import DefaultAzureCredential
+
+from src.utility.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenProvider:
+    """
+    Thread-safe cache of Azure access tokens keyed by scope.
+
+    Tokens are reused until `expiry_margin` seconds before their `expires_on`.
+    Once a token enters the last `refresh_margin` seconds of its lifetime, the
+    next caller still receives the cached token while a background thread fetches
+    a new one. Concurrent acquisitions for the same scope are deduplicated, so at
+    most one `get_token` call per scope is in flight at any time.
+    """
+
+    def __init__(
+        self,
+        credential_factory: Callable[[], TokenCredential] = DefaultAzureCredential,
+        refresh_margin: int = 600,
+        expiry_margin: int = 60,
+    ):
+        """
+        :param credential_factory: Callable building the credential. It is invoked lazily on the first token request.
+        :param refresh_margin: Seconds before expiry after which a background refresh is started.
+        :param expiry_margin: Seconds before expiry after which a cached token is no longer handed out.
+        """  # noqa: E501
+        self._credential_factory = credential_factory
+        self._credential: TokenCredential | None = None
+        self.refresh_margin = refresh_margin
+        self.expiry_margin = expiry_margin
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, AccessToken] = {}
+        self._in_flight: Dict[str, Future] = {}
+
+    @property
+    def credential(self) -> TokenCredential:
+        with self._lock:
+            if self._credential is None:
+                self._credential = self._credential_factory()
+            return self._credential
+
+    def get_token(self, scope: str) -> str:
+        """
+        Return a bearer token string for the given scope.
+        :param scope: The scope to request, e.g. https://graph.microsoft.com/.default
+        """
+        return self.get_access_token(scope).token
+
+    def get_access_token(self, scope: str) -> AccessToken:
+        """
+        Return the cached access token for the given scope, acquiring it if needed.
+        :param scope: The scope to request.
+        :return: The `AccessToken`, including its `expires_on` timestamp.
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._tokens.get(scope)
+            if cached is not None and now < cached.expires_on - self.expiry_margin:
+                if (
+                    now >= cached.expires_on - self.refresh_margin
+                    and scope not in self._in_flight
+                ):
+                    future = self._register_refresh(scope)
+                    threading.Thread(
+                        target=self._refresh, args=(scope, future), daemon=True
+                    ).start()
+                return cached
+            in_flight = self._in_flight.get(scope)
+            owner = in_flight is None
+            future = in_flight or self._register_refresh(scope)
+        if owner:
+            self._refresh(scope, future)
+        return future.result()
+
+    def invalidate(self, scope: str) -> None:
+        """
+        Drop the cached token for a scope, e.g. after the service rejected it.
+        :param scope: The scope whose token is discarded.
+        """
+        with self._lock:
+            self._tokens.pop(scope, None)
+
+    def close(self) -> None:
+        """
+        Discard every cached token and close the underlying credential.
+        """
+        with self._lock:
+            self._tokens.clear()
+            credential, self._credential = self._credential, None
+        close = getattr(credential, "close", None)
+        if close is not None:
+            close()
+
+    def _register_refresh(self, scope: str) -> Future:
+        # Must be called with self._lock held
+        future: Future = Future()
+        self._in_flight[scope] = future
+        return future
+
+    def _refresh(self, scope: str, future: Future) -> None:
+        try:
+            token = self.credential.get_token(scope)
+        except Exception as e:
+            logger.warning(f"Unable to acquire a token for scope {scope}: {e}")
+            with self._lock:
+                self._in_flight.pop(scope, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            self._tokens[scope] = token
+            self._in_flight.pop(scope, None)
+        future.set_result(token)
+
+
+@lru_cache(maxsize=None)
+def get_token_provider() -> TokenProvider:
+    """
+    Return the process-wide TokenProvider shared by every service.
+    """
+    return TokenProvider()
@@ -0,0 +1,71 @@
+from typing import List
+
+# Longest identifier accepted by SQL Server, and by QUOTENAME
+MAX_IDENTIFIER_LENGTH = 128
+
+
+def quote_name(identifier: str) -> str:
+    """
+    Quote an identifier the way T-SQL QUOTENAME does: wrap it in brackets and
+    double any closing bracket, so it cannot end the identifier early.
+
+    Raises:
+        ValueError: If the identifier is empty or longer than 128 characters.
+    """
+    if not identifier or len(identifier) > MAX_IDENTIFIER_LENGTH:
+        raise ValueError(
+            f"Invalid identifier '{identifier}': it must have 1 to {MAX_IDENTIFIER_LENGTH} characters"  # noqa: E501
+        )
+    return "[" + identifier.replace("]", "]]") + "]"
+
+
+def split_name(name: str) -> List[str]:
+    """
+    Split a multi-part name, such as `schema.table` or `[my schema].[my.table]`,
+    into its unquoted parts.
+
+    Raises:
+        ValueError: If a bracketed part is not closed.
+    """
+    parts = []
+    i = 0
+    while True:
+        if name.startswith("[", i):
+            part = []
+            i += 1
+            while True:
+                end = name.find("]", i)
+                if end < 0:
+                    raise ValueError(f"Unclosed bracket in name '{name}'")
+                part.append(name[i:end])
+                if name.startswith("]]", end):
+                    part.append("]")
+                    i = end + 2
+                else:
+                    i = end + 1
+                    break
+            parts.append("".join(part))
+        else:
+            end = name.find(".", i)
+            end = len(name) if end < 0 else end
+            parts.append(name[i:end].strip())
+            i = end
+        if i >= len(name):
+            return parts
+        if name[i] != ".":
+            raise ValueError(f"Unexpected character '{name[i]}' in name '{name}'")
+        i += 1
+
+
+def quote_qualified_name(name: str) -> str:
+    """
+    Quote every part of a multi-part name, e.g. `dbo.sales` becomes `[dbo].[sales]`.
+    """
+    return ".".join(quote_name(part) for part in split_name(name))
+
+
+def quote_string(value: str) -> str:
+    """
+    Quote a value as a Unicode string literal, doubling single quotes.
+    """
+    return "N'" + value.replace("'", "''") + "'"
@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Tuple, Type, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Entry(Generic[V]):
+    __slots__ = ("value", "error", "expires_at")
+
+    def __init__(self, value: V | None, error: Exception | None, expires_at: float):
+        self.value = value
+        self.error = error
+        self.expires_at = expires_at
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after a time-to-live.
+
+    Besides values, the cache can hold errors (negative caching): a cached error is
+    raised again by `get` until it expires, which avoids repeating lookups that are
+    known to fail.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        maxsize: int = 1024,
+        negative_ttl: float | None = None,
+        negative_errors: Tuple[Type[Exception], ...] = (),
+    ):
+        """
+        Args:
+            ttl (float): Seconds a value stays valid.
+            maxsize (int): Maximum number of entries; the least recently used one is evicted first.
+            negative_ttl (float, optional): Seconds an error stays valid. Defaults to `ttl`.
+            negative_errors (tuple): Exception types cached by `get_or_load` when raised by the loader.
+        """  # noqa: E501
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.negative_errors = negative_errors
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[K, _Entry[V]] = OrderedDict()
+
+    def get(self, key: K) -> V:
+        """
+        Return the cached value for key.
+
+        Raises:
+            KeyError: If the key is not cached or its entry expired.
+            Exception: The cached error, if the key holds a negative entry.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                raise KeyError(key)
+            if time.monotonic() >= entry.expires_at:
+                del self._entries[key]
+                raise KeyError(key)
+            self._entries.move_to_end(key)
+        if entry.error is not None:
+            raise entry.error.with_traceback(None)
+        return entry.value  # type: ignore[return-value]
+
+    def set(self, key: K, value: V) -> None:
+        self._store(key, _Entry(value, None, time.monotonic() + self.ttl))
+
+    def set_error(self, key: K, error: Exception) -> None:
+        self._store(key, _Entry(None, error, time.monotonic() + self.negative_ttl))
+
+    def get_or_load(self, key: K, loader: Callable[[], V]) -> V:
+        """
+        Return the cached value for key, calling loader and caching its result on a miss.
+
+        Errors raised by the loader whose type is listed in `negative_errors` are cached
+        as well; any other error is propagated without being cached.
+        """  # noqa: E501
+        try:
+            return self.get(key)
+        except KeyError:
+            pass
+        try:
+            value = loader()
+        except self.negative_errors as e:
+            self.set_error(key, e)
+            raise
+        self.set(key, value)
+        return value
+
+    def invalidate(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[K], bool]) -> None:
+        """
+        Drop every entry whose key satisfies the predicate.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _store(self, key: K, entry: _Entry[V]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
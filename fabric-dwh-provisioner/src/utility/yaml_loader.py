@@ -0,0 +1,18 @@
+from typing import Any
+
+import yaml
+
+try:
+    # The libyaml bindings parse several times faster, but PyYAML may be built without them
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader  # type: ignore[assignment]
+
+LIBYAML = SafeLoader is not yaml.SafeLoader
+
+
+def load_yaml(stream: str) -> Any:
+    """
+    Same as `yaml.safe_load`, through libyaml when it is available.
+    """
+    return yaml.load(stream, Loader=SafeLoader)
@@ -0,0 +1,236 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs, urlsplit
+
+from src.models.fabric_models import PrincipalKind
+from src.services.acl_service import (
+    AzureFabricApiService,
+    PrincipalNotFoundError,
+    PrincipalResolutionError,
+)
+
+USERS = {
+    "john@example.com": {
+        "id": "user-id",
+        "displayName": "John",
+        "mail": "john@example.com",
+    }
+}
+GROUPS = {
+    "devs": {"id": "group-id", "displayName": "devs", "mailNickname": "devs-nick"}
+}
+
+
+def json_response(payload, status_code=200):
+    response = Mock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    response.text = str(payload)
+    return response
+
+
+class FakeGraphApi:
+    def __init__(self, throttled=(), latency=0.0):
+        self.calls = []
+        self.batches = []
+        # Names whose first sub-request is throttled
+        self.throttled = set(throttled)
+        self.retry_after = "0"
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url, params=None, **kwargs):
+        params = params or {}
+        self.calls.append((url, params))
+        status, body = self.query(url, params)
+        return json_response(body, status)
+
+    def post(self, url, json=None, **kwargs):
+        with self.lock:
+            self.calls.append((url, json))
+            self.batches.append(json["requests"])
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        assert url.endswith("/$batch")
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+        responses = []
+        for request in reversed(json["requests"]):
+            parts = urlsplit(request["url"])
+            params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            status, body = self.query(parts.path, params)
+            headers = {}
+            if self.name(params) in self.throttled:
+                self.throttled.discard(self.name(params))
+                status, body, headers = 429, {}, {"Retry-After": self.retry_after}
+            responses.append(
+                {
+                    "id": request["id"],
+                    "status": status,
+                    "headers": headers,
+                    "body": body,
+                }
+            )
+        return json_response({"responses": responses})
+
+    @staticmethod
+    def name(params):
+        return params["$filter"].split("eq '")[1][:-1].replace("''", "'")
+
+    def query(self, url, params):
+        name = self.name(params)
+        if url.endswith("/users"):
+            return 200, {"value": [USERS[name]] if name in USERS else []}
+        if url.endswith("/groups"):
+            return 200, {"value": [GROUPS[name]] if name in GROUPS else []}
+        raise AssertionError(f"Unexpected url {url}")
+
+
+class TestAzureFabricApiService(unittest.TestCase):
+    def setUp(self):
+        token_provider = Mock()
+        token_provider.get_token.return_value = "token"
+        self.api = FakeGraphApi()
+        self.service = AzureFabricApiService(token_provider, http_client=self.api)
+
+    def test_resolve_user(self):
+        principal = self.service.resolve_principal("user:john_example.com")
+
+        self.assertEqual(principal.kind, PrincipalKind.USER)
+        self.assertEqual(principal.id, "user-id")
+        self.assertEqual(principal.acl_name, "john@example.com")
+
+    def test_resolve_group(self):
+        principal = self.service.resolve_principal("group:devs")
+
+        self.assertEqual(principal.kind, PrincipalKind.GROUP)
+        self.assertEqual(principal.id, "group-id")
+        self.assertEqual(principal.acl_name, "devs-nick")
+
+    def test_principal_is_resolved_with_a_single_query(self):
+        self.service.resolve_principal("user:john_example.com")
+
+        self.assertEqual(len(self.api.calls), 1)
+        url, params = self.api.calls[0]
+        self.assertEqual(params["$filter"], "userPrincipalName eq 'john@example.com'")
+        self.assertEqual(params["$select"], "id,mail,displayName,mailNickname")
+
+    def test_quotes_in_names_are_escaped(self):
+        with self.assertRaises(PrincipalNotFoundError):
+            self.service.resolve_principal("group:o'brien")
+
+        url, params = self.api.calls[0]
+        self.assertEqual(params["$filter"], "displayName eq 'o''brien'")
+
+    def test_update_acl_returns_acl_names_in_order(self):
+        acl_entries = self.service.update_acl(["user:john_example.com", "group:devs"])
+        self.assertEqual(acl_entries, ["john@example.com", "devs-nick"])
+
+        acl_entries = self.service.update_acl(["group:devs", "user:john_example.com"])
+        self.assertEqual(acl_entries, ["devs-nick", "john@example.com"])
+
+    def test_empty_acl_has_no_entries(self):
+        self.assertEqual(self.service.update_acl([]), [])
+        self.assertEqual(self.api.calls, [])
+
+    def test_repeated_update_acl_does_not_call_graph(self):
+        self.service.update_acl(["user:john_example.com", "group:devs"])
+        calls = len(self.api.calls)
+
+        self.service.update_acl(["user:john_example.com", "group:devs"])
+
+        self.assertEqual(len(self.api.calls), calls)
+
+    def test_unknown_principal_is_cached(self):
+        for _ in range(2):
+            with self.assertRaises(PrincipalResolutionError) as context:
+                self.service.update_acl(["group:unknown"])
+            self.assertIsInstance(
+                context.exception.errors["group:unknown"], PrincipalNotFoundError
+            )
+
+        self.assertEqual(len(self.api.calls), 1)
+
+    def test_update_acl_lists_every_unresolved_ref(self):
+        refs = ["group:missing-1", "user:john_example.com", "group:missing-2"]
+
+        with self.assertRaises(PrincipalResolutionError) as context:
+            self.service.update_acl(refs)
+
+        self.assertEqual(
+            list(context.exception.errors), ["group:missing-1", "group:missing-2"]
+        )
+
+    def test_batches_are_sent_concurrently(self):
+        self.api.latency = 0.05
+        refs = [f"group:group-{i}" for i in range(50)]
+
+        resolved, errors = self.service.resolve_principals(refs)
+
+        self.assertEqual(len(self.api.batches), 3)
+        self.assertEqual(self.api.max_in_flight, 3)
+
+    @patch.dict("os.environ", {"GRAPH_MAX_CONCURRENCY": "2"})
+    def test_concurrency_is_capped(self):
+        self.api.latency = 0.05
+        refs = [f"group:group-{i}" for i in range(100)]
+
+        self.service.resolve_principals(refs)
+
+        self.assertEqual(len(self.api.batches), 5)
+        self.assertEqual(self.api.max_in_flight, 2)
+
+    def test_update_acl_resolves_refs_in_one_batch(self):
+        self.service.update_acl(["user:john_example.com", "group:devs"])
+
+        self.assertEqual(len(self.api.calls), 1)
+
+    def test_refs_are_sent_in_batches_of_twenty(self):
+        refs = [f"group:group-{i}" for i in range(45)]
+
+        resolved, errors = self.service.resolve_principals(refs)
+
+        self.assertEqual(len(errors), 45)
+        self.assertEqual([len(batch) for batch in self.api.batches], [20, 20, 5])
+
+    def test_batch_failures_are_reported_per_ref(self):
+        resolved, errors = self.service.resolve_principals(
+            ["user:john_example.com", "group:unknown"]
+        )
+
+        self.assertEqual(resolved["user:john_example.com"].id, "user-id")
+        self.assertIsInstance(errors["group:unknown"], PrincipalNotFoundError)
+
+    def test_throttled_sub_requests_are_retried(self):
+        self.api.throttled = {"devs"}
+
+        resolved, errors = self.service.resolve_principals(
+            ["user:john_example.com", "group:devs"]
+        )
+
+        self.assertEqual(errors, {})
+        self.assertEqual(resolved["group:devs"].id, "group-id")
+        self.assertEqual([len(batch) for batch in self.api.batches], [2, 1])
+
+    def test_long_retry_after_is_reported_as_failed(self):
+        self.api.throttled = {"devs"}
+        self.api.retry_after = "3600"
+
+        started = time.monotonic()
+        resolved, errors = self.service.resolve_principals(
+            ["user:john_example.com", "group:devs"]
+        )
+
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(list(resolved), ["user:john_example.com"])
+        self.assertIn("throttled", str(errors["group:devs"]))
+        self.assertEqual(len(self.api.batches), 1)
+
+    def test_unknown_entity_type_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.service.update_acl(["bigData"])
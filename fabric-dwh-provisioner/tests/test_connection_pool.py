@@ -0,0 +1,208 @@
+import threading
+import time
+import unittest
+
+from src.utility.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, *args):
+        if self.connection.broken:
+            raise RuntimeError("connection lost")
+        self.connection.queries.append(query)
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+        self.rolled_back = False
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise RuntimeError("connection lost")
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionFactory:
+    def __init__(self, lifetime=3600):
+        self.lifetime = lifetime
+        self.connections = []
+
+    def __call__(self):
+        connection = FakeConnection()
+        self.connections.append(connection)
+        return connection, time.time() + self.lifetime
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_connection_is_reused(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory)
+
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertEqual(len(factory.connections), 1)
+        stats = pool.stats()
+        self.assertEqual(stats.size, 1)
+        self.assertEqual(stats.idle, 1)
+        self.assertEqual(stats.acquisitions, 2)
+
+    def test_connection_close_to_token_expiry_is_recycled(self):
+        factory = ConnectionFactory(lifetime=100)
+        pool = ConnectionPool(factory, recycle_margin=300)
+
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats().recycled, 1)
+        self.assertEqual(pool.stats().size, 1)
+
+    def test_idle_connection_failing_pre_ping_is_replaced(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory, ping_after=0)
+
+        with pool.connection() as first:
+            pass
+        first.broken = True
+        with pool.connection() as second:
+            pass
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(second.queries, [])
+        self.assertEqual(pool.stats().size, 1)
+
+    def test_recently_used_connection_skips_pre_ping(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory, ping_after=60)
+
+        with pool.connection():
+            pass
+        with pool.connection() as connection:
+            pass
+
+        self.assertEqual(connection.queries, [])
+
+    def test_error_in_block_rolls_back(self):
+        pool = ConnectionPool(ConnectionFactory())
+
+        with self.assertRaises(ValueError):
+            with pool.connection() as connection:
+                raise ValueError("boom")
+
+        self.assertTrue(connection.rolled_back)
+        self.assertEqual(pool.stats().idle, 1)
+
+    def test_transaction_is_ended_before_reuse(self):
+        pool = ConnectionPool(ConnectionFactory())
+
+        with pool.connection() as connection:
+            connection.cursor().execute("SELECT name FROM sys.tables")
+
+        self.assertTrue(connection.rolled_back)
+        self.assertEqual(pool.stats().idle, 1)
+
+    def test_connection_failing_to_end_its_transaction_is_discarded(self):
+        pool = ConnectionPool(ConnectionFactory())
+
+        with pool.connection() as connection:
+            connection.broken = True
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats().size, 0)
+
+    def test_broken_connection_is_discarded_after_error(self):
+        pool = ConnectionPool(ConnectionFactory())
+
+        with self.assertRaises(ValueError):
+            with pool.connection() as connection:
+                connection.broken = True
+                raise ValueError("boom")
+
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats().size, 0)
+
+    def test_pool_is_bounded(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory, max_size=1, acquire_timeout=0.1)
+
+        with pool.connection():
+            with self.assertRaises(PoolTimeoutError):
+                with pool.connection():
+                    pass
+
+        self.assertEqual(len(factory.connections), 1)
+
+    def test_waiting_caller_gets_released_connection(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory, max_size=1, acquire_timeout=5)
+        acquired = threading.Event()
+        received = []
+
+        def borrow():
+            with pool.connection() as connection:
+                received.append(connection)
+
+        with pool.connection() as connection:
+            thread = threading.Thread(target=borrow)
+            thread.start()
+            acquired.wait(0.1)
+        thread.join()
+
+        self.assertEqual(received, [connection])
+        self.assertGreater(pool.stats().max_wait_seconds, 0)
+
+    def test_failed_connect_frees_the_slot(self):
+        calls = []
+
+        def failing_connect():
+            calls.append(1)
+            raise RuntimeError("login failed")
+
+        pool = ConnectionPool(failing_connect, max_size=1, acquire_timeout=0.1)
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                with pool.connection():
+                    pass
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(pool.stats().size, 0)
+
+    def test_close_closes_idle_connections(self):
+        factory = ConnectionFactory()
+        pool = ConnectionPool(factory)
+        with pool.connection() as connection:
+            pass
+
+        pool.close()
+
+        self.assertTrue(connection.closed)
+        with self.assertRaises(PoolTimeoutError):
+            with pool.connection():
+                pass
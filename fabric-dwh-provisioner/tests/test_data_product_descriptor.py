@@ -1,5 +1,6 @@
 import unittest
 from pathlib import Path
+from unittest.mock import patch
 
 import pydantic_core
 import pytest
@@ -7,20 +8,34 @@ import yaml
 
 from src.models.api_models import ValidationError
 from src.models.data_product_descriptor import (
+    ComponentIndex,
     ComponentKind,
+    ComponentList,
     ConnectionTypeWorkload,
     DataContract,
     DataProduct,
     DataSharingAgreement,
+    FabricOutputPort,
     InputWorkload,
     Observability,
     OpenMetadataColumn,
     OutputPort,
+    RawComponent,
     StorageArea,
     Workload,
+    components_context,
 )
 from src.utility.parsing_pydantic_models import parse_yaml_with_model
 
+FABRIC_SPECIFIC = {
+    "workspace": "sales",
+    "warehouse": "dwh",
+    "table": "orders",
+    "sink": "datawarehouse",
+    "file_path": None,
+    "fileFormat": "parquet",
+}
+
 
 class TestDataProductDescriptor(unittest.TestCase):
     def setUp(self):
@@ -495,3 +510,222 @@ class TestDataProductDescriptor(unittest.TestCase):
             data_product.get_typed_component_by_id(
                 invalid_component_to_provision, OutputPort
             )
+
+
+class TestLazyComponentParsing(unittest.TestCase):
+    def setUp(self):
+        request = yaml.safe_load(
+            Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        )
+        self.data = request["dataProduct"]
+        self.component_id = request["componentIdToProvision"]
+
+    def parse(self, component_id=None) -> DataProduct:
+        return DataProduct.model_validate(
+            self.data, context=components_context(component_id, lazy=True)
+        )
+
+    def test_only_the_target_component_is_validated(self):
+        data_product = self.parse(self.component_id)
+
+        kinds = [type(component) for component in data_product.components]
+        self.assertEqual(kinds, [RawComponent, OutputPort])
+
+    def test_components_are_validated_on_access(self):
+        data_product = self.parse()
+        storage_id = data_product.components[0].id
+
+        self.assertIsInstance(data_product.get_component_by_id(storage_id), StorageArea)
+        self.assertIsInstance(data_product.components[0], StorageArea)
+        self.assertEqual(len(data_product.get_output_ports()), 1)
+        self.assertEqual(data_product, parse_yaml_with_model(self.data, DataProduct))
+
+    def test_invalid_components_fail_on_access(self):
+        self.data["components"][0]["dependsOn"] = "not a list"
+        data_product = self.parse(self.component_id)
+
+        self.assertIsInstance(
+            data_product.get_component_by_id(self.component_id), OutputPort
+        )
+        with pytest.raises(pydantic_core.ValidationError):
+            data_product.get_storage_areas()
+
+    def test_the_target_component_is_validated_eagerly(self):
+        self.data["components"][1]["dependsOn"] = "not a list"
+
+        result = parse_yaml_with_model(
+            self.data, DataProduct, components_context(self.component_id, lazy=True)
+        )
+
+        self.assertIsInstance(result, ValidationError)
+
+    def test_deferred_components_serialize_as_found(self):
+        data_product = self.parse(self.component_id)
+
+        dumped = data_product.model_dump(by_alias=True, serialize_as_any=True)
+
+        self.assertLessEqual(
+            self.data["components"][0].items(), dumped["components"][0].items()
+        )
+
+
+class TestTypedComponentParsing(unittest.TestCase):
+    def setUp(self):
+        request = yaml.safe_load(
+            Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        )
+        self.data = request["dataProduct"]
+        self.component_id = request["componentIdToProvision"]
+        self.data["components"][1]["specific"] = FABRIC_SPECIFIC
+
+    def parse(self, lazy=False) -> DataProduct:
+        return DataProduct.model_validate(
+            self.data,
+            context=components_context(self.component_id, FabricOutputPort, lazy),
+        )
+
+    def test_the_target_is_parsed_as_the_target_type(self):
+        data_product = self.parse()
+
+        component = data_product.get_typed_component_by_id(
+            self.component_id, FabricOutputPort
+        )
+
+        self.assertIsInstance(component, FabricOutputPort)
+        self.assertIs(component, data_product.components[1])
+        self.assertEqual(data_product.get_output_ports(), [component])
+
+    def test_other_platforms_fall_back_to_the_model_of_their_kind(self):
+        self.data["components"][1]["specific"] = {"database": "HEALTHCARE"}
+        data_product = self.parse()
+
+        self.assertIs(type(data_product.components[1]), OutputPort)
+        with pytest.raises(pydantic_core.ValidationError):
+            data_product.get_typed_component_by_id(self.component_id, FabricOutputPort)
+
+    def test_other_kinds_are_not_parsed_as_the_target_type(self):
+        self.component_id = self.data["components"][0]["id"]
+
+        data_product = self.parse()
+
+        self.assertIsInstance(data_product.components[0], StorageArea)
+
+    def test_deferred_components_are_validated_as_the_requested_type(self):
+        self.component_id = None
+        data_product = self.parse(lazy=True)
+        component_id = data_product.components[1].id
+
+        component = data_product.get_typed_component_by_id(
+            component_id, FabricOutputPort
+        )
+
+        self.assertIsInstance(component, FabricOutputPort)
+        self.assertIs(data_product.components[1], component)
+
+    def test_unknown_components(self):
+        data_product = self.parse()
+
+        self.assertIsNone(
+            data_product.get_typed_component_by_id("unknown", FabricOutputPort)
+        )
+
+
+class TestComponentIndex(unittest.TestCase):
+    def setUp(self):
+        request = yaml.safe_load(
+            Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        )
+        self.data_product = DataProduct.model_validate(request["dataProduct"])
+        self.storage, self.output_port = self.data_product.components
+
+    def test_lookups_by_kind_after_reordering(self):
+        self.data_product.components.reverse()
+
+        self.assertEqual(self.data_product.get_storage_areas(), [self.storage])
+        self.assertEqual(self.data_product.get_output_ports(), [self.output_port])
+
+    def test_lookups_by_id_after_reordering(self):
+        self.data_product.components.reverse()
+
+        self.assertIs(
+            self.data_product.get_component_by_id(self.storage.id), self.storage
+        )
+
+    def test_replaced_components_are_indexed_again(self):
+        self.data_product.components = [self.output_port]
+
+        self.assertIsNone(self.data_product.get_component_by_id(self.storage.id))
+        self.assertEqual(self.data_product.get_storage_areas(), [])
+        self.assertEqual(self.data_product.get_output_ports(), [self.output_port])
+
+    def test_added_components_are_indexed(self):
+        storage = self.storage.model_copy(update={"id": "new-storage"})
+
+        self.data_product.components.append(storage)
+
+        self.assertIs(self.data_product.get_component_by_id("new-storage"), storage)
+        self.assertEqual(self.data_product.get_storage_areas(), [self.storage, storage])
+
+    def test_components_replaced_in_place_are_found(self):
+        storage = self.storage.model_copy(update={"id": "new-storage"})
+
+        self.data_product.components[0] = storage
+
+        self.assertIs(self.data_product.get_component_by_id("new-storage"), storage)
+        self.assertIsNone(self.data_product.get_component_by_id(self.storage.id))
+
+    def test_components_of_another_kind_replaced_in_place_are_found(self):
+        output_port = self.output_port.model_copy(update={"id": "new-output-port"})
+
+        self.data_product.components[0] = output_port
+
+        self.assertEqual(self.data_product.get_storage_areas(), [])
+        self.assertEqual(
+            self.data_product.get_output_ports(), [output_port, self.output_port]
+        )
+
+    def test_assigned_lists_are_indexed_once(self):
+        self.data_product.components = [self.storage, self.output_port]
+        self.assertIsInstance(self.data_product.components, ComponentList)
+
+        with patch.object(
+            ComponentIndex, "build", autospec=True, side_effect=ComponentIndex.build
+        ) as build:
+            self.data_product.get_output_ports()
+            self.data_product.get_storage_areas()
+            self.data_product.components[0] = self.output_port.model_copy(
+                update={"id": "new-output-port"}
+            )
+            self.assertEqual(len(self.data_product.get_output_ports()), 2)
+
+        self.assertEqual(build.call_count, 2)
+
+    def test_materialized_components_keep_the_index(self):
+        request = yaml.safe_load(
+            Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+        )
+        data_product = DataProduct.model_validate(
+            request["dataProduct"], context=components_context(lazy=True)
+        )
+        version = data_product.components.version
+
+        data_product.get_output_ports()
+
+        self.assertIsInstance(data_product.components[1], OutputPort)
+        self.assertEqual(data_product.components.version, version)
+
+    def test_the_first_of_duplicate_ids_is_returned(self):
+        duplicate = self.storage.model_copy(update={"name": "duplicate"})
+        self.data_product.components.append(duplicate)
+
+        self.assertIs(
+            self.data_product.get_component_by_id(self.storage.id), self.storage
+        )
+
+    def test_copies_are_indexed_independently(self):
+        copy = self.data_product.model_copy(deep=True)
+        copy.components.pop()
+
+        self.assertEqual(len(copy.get_output_ports()), 0)
+        self.assertEqual(len(self.data_product.get_output_ports()), 1)
+        self.assertNotEqual(copy, self.data_product)
@@ -0,0 +1,90 @@
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+from src.dependencies import parse_component_descriptor
+from src.models.api_models import ValidationError
+from src.models.data_product_descriptor import DataProduct
+from src.utility.descriptor_cache import DescriptorCache, get_descriptor_cache
+
+
+class TestDescriptorCache(unittest.TestCase):
+    def test_hits_skip_parsing_and_return_copies(self):
+        cache = DescriptorCache(max_bytes=1024)
+        parse = Mock(return_value={"tags": []})
+
+        first = cache.get_or_parse("descriptor", parse)
+        first["tags"].append("mutated")
+        second = cache.get_or_parse("descriptor", parse)
+
+        parse.assert_called_once_with("descriptor")
+        self.assertEqual(second, {"tags": []})
+
+    def test_line_endings_and_surrounding_whitespace_are_ignored(self):
+        cache = DescriptorCache(max_bytes=1024)
+        parse = Mock(return_value="parsed")
+
+        cache.get_or_parse("a: 1\nb: 2\n", parse)
+        cache.get_or_parse("a: 1\r\nb: 2", parse)
+
+        parse.assert_called_once()
+
+    def test_least_recently_used_entries_are_evicted_by_size(self):
+        cache = DescriptorCache(max_bytes=20, weight_factor=1)
+        parse = Mock(side_effect=lambda descriptor: descriptor)
+        cache.get_or_parse("a" * 8, parse)
+        cache.get_or_parse("b" * 8, parse)
+        cache.get_or_parse("a" * 8, parse)
+
+        cache.get_or_parse("c" * 8, parse)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.size, 16)
+        cache.get_or_parse("a" * 8, parse)
+        self.assertEqual(parse.call_count, 3)
+        cache.get_or_parse("b" * 8, parse)
+        self.assertEqual(parse.call_count, 4)
+
+    def test_entries_are_bounded(self):
+        cache = DescriptorCache(max_bytes=1024, max_entries=2)
+
+        for descriptor in ("a", "b", "c"):
+            cache.get_or_parse(descriptor, str.upper)
+
+        self.assertEqual(len(cache), 2)
+
+    def test_oversized_descriptors_are_not_cached(self):
+        cache = DescriptorCache(max_bytes=10, weight_factor=1)
+
+        cache.get_or_parse("x" * 11, str.upper)
+
+        self.assertEqual((len(cache), cache.size), (0, 0))
+
+
+class TestParseComponentDescriptor(unittest.TestCase):
+    def setUp(self):
+        get_descriptor_cache().clear()
+        self.addCleanup(get_descriptor_cache().clear)
+
+    def test_data_products_are_isolated_between_requests(self):
+        descriptor = Path(
+            "tests/descriptors/descriptor_output_port_valid.yaml"
+        ).read_text()
+
+        data_product, component_id = parse_component_descriptor(descriptor)
+        data_product.components.clear()
+        cached, cached_component_id = parse_component_descriptor(descriptor)
+
+        self.assertIsInstance(cached, DataProduct)
+        self.assertIsNot(cached, data_product)
+        self.assertEqual(len(cached.components), 2)
+        self.assertEqual(cached_component_id, component_id)
+        self.assertEqual(len(get_descriptor_cache()), 1)
+
+    def test_errors_are_cached(self):
+        first, _ = parse_component_descriptor("dataProduct: {}")
+        second, _ = parse_component_descriptor("dataProduct: {}")
+
+        self.assertIsInstance(first, ValidationError)
+        self.assertEqual(first, second)
+        self.assertEqual(len(get_descriptor_cache()), 1)
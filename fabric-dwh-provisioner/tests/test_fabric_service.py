@@ -0,0 +1,448 @@
+import unittest
+from contextlib import nullcontext
+from unittest.mock import Mock
+
+import requests
+
+from src.models.fabric_models import ColumnDefinition, WarehouseHandle
+from src.services.fabric_service import (
+    FabricItemNotFoundError,
+    FabricService,
+    SchemaConflictError,
+)
+
+WORKSPACES = {"value": [{"id": "ws-id", "name": "workspace"}]}
+WAREHOUSES = {
+    "value": [{"id": "other-id", "displayName": "other"}],
+    "continuationToken": "page-2",
+}
+WAREHOUSES_PAGE_2 = {
+    "value": [
+        {
+            "id": "dwh-id",
+            "displayName": "warehouse",
+            "properties": {"connectionString": "endpoint"},
+        },
+        {"id": "bare-id", "displayName": "bare"},
+    ]
+}
+WAREHOUSE = {
+    "id": "dwh-id",
+    "displayName": "warehouse",
+    "properties": {"connectionString": "endpoint"},
+}
+BARE_WAREHOUSE = {
+    "id": "bare-id",
+    "displayName": "bare",
+    "properties": {"connectionString": "bare-endpoint"},
+}
+
+
+def json_response(payload, status_code=200):
+    response = Mock()
+    response.status_code = status_code
+    response.json.return_value = payload
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(response=response)
+    return response
+
+
+class FakeFabricApi:
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, **kwargs):
+        params = params or {}
+        self.calls.append((url, params))
+        if url.endswith("/groups"):
+            return json_response(WORKSPACES)
+        if "/workspaces/stale-id/" in url:
+            return json_response({}, status_code=404)
+        if url.endswith("/warehouses"):
+            if params.get("continuationToken") == "page-2":
+                return json_response(WAREHOUSES_PAGE_2)
+            return json_response(WAREHOUSES)
+        if url.endswith("/warehouses/dwh-id"):
+            return json_response(WAREHOUSE)
+        if url.endswith("/warehouses/bare-id"):
+            return json_response(BARE_WAREHOUSE)
+        if url.endswith("/warehouses/deleted-id"):
+            return json_response({}, status_code=404)
+        raise AssertionError(f"Unexpected url {url}")
+
+
+class TestFabricServiceResolution(unittest.TestCase):
+    def setUp(self):
+        token_provider = Mock()
+        token_provider.get_token.return_value = "token"
+        self.api = FakeFabricApi()
+        self.service = FabricService(token_provider, http_client=self.api)
+
+    def test_resolve_warehouse_returns_handle(self):
+        handle = self.service.resolve_warehouse("workspace", dwh_name="warehouse")
+
+        self.assertEqual(handle.workspace_id, "ws-id")
+        self.assertEqual(handle.item_id, "dwh-id")
+        self.assertEqual(handle.sql_endpoint, "endpoint")
+        self.assertEqual(handle.database, "warehouse")
+
+    def test_connection_string_is_read_from_the_listing(self):
+        self.service.resolve_warehouse("workspace", dwh_name="warehouse")
+
+        urls = [url for url, _ in self.api.calls]
+        self.assertFalse(any(url.endswith("/warehouses/dwh-id") for url in urls))
+
+    def test_item_without_properties_is_fetched_by_id(self):
+        handle = self.service.resolve_warehouse("workspace", dwh_name="bare")
+
+        self.assertEqual(handle.sql_endpoint, "bare-endpoint")
+        self.assertTrue(self.api.calls[-1][0].endswith("/warehouses/bare-id"))
+
+    def test_known_ids_skip_the_lookups(self):
+        handle = self.service.resolve_warehouse(
+            "workspace", dwh_name="warehouse", workspace_id="ws-id", item_id="dwh-id"
+        )
+
+        self.assertEqual(handle.sql_endpoint, "endpoint")
+        self.assertEqual(len(self.api.calls), 1)
+
+    def test_unknown_id_falls_back_to_name_lookup(self):
+        handle = self.service.resolve_warehouse(
+            "workspace",
+            dwh_name="warehouse",
+            workspace_id="ws-id",
+            item_id="deleted-id",
+        )
+
+        self.assertEqual(handle.item_id, "dwh-id")
+
+    def test_warm_resolution_makes_no_calls(self):
+        first = self.service.resolve_warehouse("workspace", dwh_name="warehouse")
+        calls = len(self.api.calls)
+
+        second = self.service.resolve_warehouse("workspace", dwh_name="warehouse")
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.api.calls), calls)
+
+    def test_not_found_is_cached(self):
+        for _ in range(2):
+            with self.assertRaises(FabricItemNotFoundError):
+                self.service.resolve_warehouse("workspace", dwh_name="missing")
+
+        self.assertEqual(len(self.api.calls), 3)
+
+    def test_stale_workspace_id_is_refreshed(self):
+        self.service._workspaces.set("workspace", {"id": "stale-id"})
+
+        handle = self.service.resolve_warehouse("workspace", dwh_name="warehouse")
+
+        self.assertEqual(handle.workspace_id, "ws-id")
+
+    def test_invalidate_cache(self):
+        self.service.resolve_warehouse("workspace", dwh_name="warehouse")
+        calls = len(self.api.calls)
+
+        self.service.invalidate_cache("workspace")
+        self.service.resolve_warehouse("workspace", dwh_name="warehouse")
+
+        self.assertGreater(len(self.api.calls), calls)
+
+    def test_workspace_lookup_is_filtered_server_side(self):
+        with self.assertRaises(FabricItemNotFoundError):
+            self.service.find_workspace("work'space")
+
+        url, params = self.api.calls[0]
+        self.assertEqual(params["$filter"], "name eq 'work''space'")
+
+    def test_item_lookup_follows_continuation_tokens(self):
+        dwh = self.service.find_dwh("ws-id", "warehouse")
+
+        self.assertEqual(dwh["id"], "dwh-id")
+        self.assertEqual(len(self.api.calls), 2)
+
+    def test_item_lookup_stops_at_first_match(self):
+        dwh = self.service.find_dwh("ws-id", "other")
+
+        self.assertEqual(dwh["id"], "other-id")
+        self.assertEqual(len(self.api.calls), 1)
+
+    def test_missing_item_name_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.service.resolve_warehouse("workspace")
+
+    def test_resolution_leaves_the_service_unchanged(self):
+        state = dict(vars(self.service))
+
+        handle = self.service.resolve_warehouse("workspace", dwh_name="warehouse")
+
+        self.assertEqual(vars(self.service), state)
+        self.assertFalse(hasattr(self.service, "sql_endpoint"))
+        with self.assertRaises(ValueError):
+            handle.sql_endpoint = "other-endpoint"
+
+
+HANDLE = WarehouseHandle(
+    workspace_name="workspace",
+    workspace_id="ws-id",
+    item_name="warehouse",
+    item_id="dwh-id",
+    sql_endpoint="endpoint",
+)
+
+
+class FakeCursor:
+    def __init__(self, grants, failures, columns=()):
+        # Rows returned by the catalog queries, and result sets returned by batches
+        self.grants = grants
+        self.failures = failures
+        self.columns = columns
+        self.executed = []
+        self.result_sets = []
+        self.description = None
+
+    def execute(self, query, *params):
+        self.executed.append(query)
+        if "sys.database_permissions" in query:
+            self.result_sets = [list(self.grants)]
+        elif "INFORMATION_SCHEMA.COLUMNS" in query:
+            self.result_sets = [list(self.columns)]
+        else:
+            self.result_sets = [[failure] for failure in self.failures]
+        self.description = ("principal", "error") if self.result_sets else None
+
+    def fetchall(self):
+        return self.result_sets.pop(0)
+
+    def nextset(self):
+        self.description = ("principal", "error") if self.result_sets else None
+        return bool(self.result_sets)
+
+    def close(self):
+        pass
+
+
+class TestFabricServiceGrants(unittest.TestCase):
+    def setUp(self):
+        self.service = FabricService(Mock(), http_client=Mock())
+
+    def connect(self, grants=(), failures=()):
+        self.cursor = FakeCursor(grants, failures)
+        self.conn = Mock()
+        self.conn.cursor.return_value = self.cursor
+        self.service.connection = lambda handle: nullcontext(self.conn)
+
+    def test_provisioning_grants_are_sent_in_one_batch(self):
+        self.connect()
+
+        applied = self.service.apply_acl_to_dwh_table(
+            HANDLE, ["devs", "data]team"], "dbo.sales", True
+        )
+
+        self.assertTrue(applied)
+        self.assertEqual(len(self.cursor.executed), 1)
+        batch = self.cursor.executed[0]
+        self.assertIn("GRANT ALL PRIVILEGES ON [dbo].[sales] TO [devs];", batch)
+        self.assertIn("GRANT ALL PRIVILEGES ON [dbo].[sales] TO [data]]team];", batch)
+        self.conn.commit.assert_called_once()
+
+    def test_failures_are_reported_per_principal_and_rolled_back(self):
+        self.connect(failures=[("bob@example.com", "Cannot find the user")])
+
+        failures = self.service.grant_on_table(
+            HANDLE, "sales", ["alice@example.com", "bob@example.com"]
+        )
+
+        self.assertEqual(failures, {"bob@example.com": "Cannot find the user"})
+        self.conn.rollback.assert_called_once()
+        self.conn.commit.assert_not_called()
+
+    def test_failed_grants_make_apply_acl_fail(self):
+        self.connect(failures=[("bob@example.com", "Cannot find the user")])
+
+        self.assertFalse(
+            self.service.apply_acl_to_dwh_table(HANDLE, ["bob@example.com"], "sales")
+        )
+
+    def test_no_principals_makes_no_round_trip(self):
+        self.connect()
+
+        self.assertEqual(self.service.grant_on_table(HANDLE, "sales", []), {})
+        self.assertEqual(self.cursor.executed, [])
+
+    def test_unknown_permission_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.service.grant_on_table(HANDLE, "sales", ["devs"], permission="DROP")
+
+    def test_acl_update_grants_and_revokes_the_difference(self):
+        self.connect(
+            grants=[
+                ("alice@example.com", "SELECT"),
+                ("bob@example.com", "SELECT"),
+                ("devs", "SELECT"),
+                ("devs", "INSERT"),
+            ]
+        )
+
+        applied = self.service.apply_acl_to_dwh_table(
+            HANDLE, ["Alice@example.com", "carol@example.com"], "sales"
+        )
+
+        self.assertTrue(applied)
+        self.assertEqual(len(self.cursor.executed), 2)
+        batch = self.cursor.executed[1]
+        self.assertIn("GRANT SELECT ON [sales] TO [carol@example.com];", batch)
+        self.assertIn("REVOKE SELECT ON [sales] FROM [bob@example.com];", batch)
+        self.assertNotIn("alice", batch.lower())
+        self.assertNotIn("devs", batch)
+        self.conn.commit.assert_called_once()
+
+    def test_empty_acl_revokes_every_reader(self):
+        self.connect(
+            grants=[
+                ("alice@example.com", "SELECT"),
+                ("devs", "SELECT"),
+                ("devs", "INSERT"),
+            ]
+        )
+
+        applied = self.service.apply_acl_to_dwh_table(HANDLE, [], "sales")
+
+        self.assertTrue(applied)
+        batch = self.cursor.executed[1]
+        self.assertIn("REVOKE SELECT ON [sales] FROM [alice@example.com];", batch)
+        self.assertNotIn("GRANT", batch)
+        self.assertNotIn("devs", batch)
+        self.conn.commit.assert_called_once()
+
+    def test_unchanged_acl_runs_only_the_catalog_query(self):
+        self.connect(grants=[("alice@example.com", "SELECT")])
+
+        applied = self.service.apply_acl_to_dwh_table(
+            HANDLE, ["alice@example.com"], "sales"
+        )
+
+        self.assertTrue(applied)
+        self.assertEqual(len(self.cursor.executed), 1)
+        self.assertIn("sys.database_permissions", self.cursor.executed[0])
+
+
+COLUMNS = [
+    ColumnDefinition(name="id", data_type="int"),
+    ColumnDefinition(name="name", data_type="varchar", length=50),
+    ColumnDefinition(name="amount", data_type="decimal", precision=10, scale=2),
+]
+# INFORMATION_SCHEMA.COLUMNS rows of a table created with COLUMNS
+COLUMN_ROWS = [
+    ("id", "int", None, 10, 0, "YES"),
+    ("name", "varchar", 50, None, None, "YES"),
+    ("amount", "decimal", None, 10, 2, "YES"),
+]
+
+
+OTHER_HANDLE = HANDLE.model_copy(
+    update={"item_name": "other", "item_id": "other-id", "sql_endpoint": "other"}
+)
+
+
+class TestFabricServiceHandles(unittest.TestCase):
+    def setUp(self):
+        self.service = FabricService(Mock(), http_client=Mock())
+        self.handles = []
+        self.cursor = FakeCursor((), ())
+        conn = Mock()
+        conn.cursor.return_value = self.cursor
+
+        def connection(handle):
+            self.handles.append(handle)
+            return nullcontext(conn)
+
+        self.service.connection = connection
+
+    def test_create_table_connects_to_the_given_warehouse(self):
+        self.service.create_table(OTHER_HANDLE, "sales", COLUMNS)
+
+        self.assertEqual(self.handles, [OTHER_HANDLE])
+
+    def test_drop_table_connects_to_the_given_warehouse(self):
+        self.service.drop_table(OTHER_HANDLE, "sales")
+
+        self.assertEqual(self.handles, [OTHER_HANDLE])
+
+    def test_apply_acl_connects_to_the_given_warehouse(self):
+        self.service.apply_acl_to_dwh_table(HANDLE, ["devs"], "sales", True)
+        self.service.apply_acl_to_dwh_table(OTHER_HANDLE, ["devs"], "sales")
+
+        self.assertEqual(self.handles, [HANDLE, OTHER_HANDLE])
+
+
+class TestFabricServiceTables(unittest.TestCase):
+    def setUp(self):
+        self.service = FabricService(Mock(), http_client=Mock())
+
+    def connect(self, columns=()):
+        self.cursor = FakeCursor((), (), columns)
+        self.conn = Mock()
+        self.conn.cursor.return_value = self.cursor
+        self.service.connection = lambda handle: nullcontext(self.conn)
+
+    def test_missing_table_is_created(self):
+        self.connect()
+
+        self.assertTrue(self.service.create_table(HANDLE, "dbo.sales", COLUMNS))
+
+        self.assertEqual(
+            self.cursor.executed[-1],
+            "CREATE TABLE [dbo].[sales] ([id] [int] NULL, "
+            "[name] [varchar](50) NULL, [amount] [decimal](10,2) NULL)",
+        )
+        self.conn.commit.assert_called_once()
+
+    def test_identical_table_runs_only_the_metadata_query(self):
+        self.connect(COLUMN_ROWS)
+
+        self.assertTrue(self.service.create_table(HANDLE, "sales", COLUMNS))
+
+        self.assertEqual(len(self.cursor.executed), 1)
+        self.conn.commit.assert_not_called()
+
+    def test_new_columns_are_added(self):
+        self.connect(COLUMN_ROWS[:2])
+
+        self.service.create_table(HANDLE, "sales", COLUMNS)
+
+        self.assertEqual(
+            self.cursor.executed[-1],
+            "ALTER TABLE [sales] ADD [amount] [decimal](10,2) NULL",
+        )
+
+    def test_dropped_table_name_is_quoted(self):
+        self.connect()
+
+        self.service.drop_table(HANDLE, "dbo.sales]2024")
+
+        self.assertEqual(
+            self.cursor.executed, ["DROP TABLE IF EXISTS [dbo].[sales]]2024]"]
+        )
+
+    def test_changed_column_is_a_conflict(self):
+        self.connect([COLUMN_ROWS[0], ("name", "varchar", 20, None, None, "YES")])
+
+        with self.assertRaises(SchemaConflictError):
+            self.service.create_table(HANDLE, "sales", COLUMNS)
+        self.assertEqual(len(self.cursor.executed), 1)
+
+    def test_removed_column_is_a_conflict(self):
+        self.connect(COLUMN_ROWS + [("legacy", "int", None, 10, 0, "YES")])
+
+        with self.assertRaises(SchemaConflictError):
+            self.service.create_table(HANDLE, "sales", COLUMNS)
+
+    def test_new_not_null_column_is_a_conflict(self):
+        self.connect(COLUMN_ROWS)
+        columns = COLUMNS + [
+            ColumnDefinition(name="code", data_type="int", nullable=False)
+        ]
+
+        with self.assertRaises(SchemaConflictError):
+            self.service.create_table(HANDLE, "sales", columns)
@@ -0,0 +1,121 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from src.utility.http_client import HttpClient, RetryBudget
+
+
+class ScriptedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._reply()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply()
+
+    def _reply(self):
+        server = self.server
+        server.ports.add(self.client_address[1])
+        status, headers = server.script.pop(0) if server.script else (200, {})
+        body = b'{"ok": true}'
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ScriptedHandler)
+        self.server.script = []
+        self.server.ports = set()
+        thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.01,), daemon=True
+        )
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        self.sleeps = []
+        self.client = HttpClient(sleep=self.sleeps.append, backoff_base=0.1)
+        self.addCleanup(self.client.close)
+
+    def test_connections_are_kept_alive(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_throttled_request_honors_retry_after(self):
+        self.server.script = [(429, {"Retry-After": "2"})]
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.sleeps), 1)
+        self.assertGreaterEqual(self.sleeps[0], 2)
+        self.assertLessEqual(self.sleeps[0], 2.2)
+
+    def test_unavailable_request_backs_off_with_jitter(self):
+        self.server.script = [(503, {}), (503, {})]
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertLessEqual(self.sleeps[0], 0.1)
+        self.assertLessEqual(self.sleeps[1], 0.2)
+
+    def test_retries_are_bounded(self):
+        self.server.script = [(429, {})] * 10
+        client = HttpClient(sleep=self.sleeps.append, max_retries=2)
+
+        response = client.get(self.url)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(len(self.sleeps), 2)
+
+    def test_retry_after_beyond_max_backoff_is_not_waited(self):
+        self.server.script = [(429, {"Retry-After": "3600"})]
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.sleeps, [])
+
+    def test_retry_budget_limits_retries(self):
+        self.server.script = [(503, {})] * 10
+        client = HttpClient(
+            sleep=self.sleeps.append, retry_budget=RetryBudget(max_tokens=1)
+        )
+
+        response = client.get(self.url)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(len(self.sleeps), 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.script = [(404, {})]
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.sleeps, [])
+
+    def test_connection_errors_are_not_retried_for_post(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+        with self.assertRaises(requests.ConnectionError):
+            self.client.post(self.url, json={})
+        self.assertEqual(self.sleeps, [])
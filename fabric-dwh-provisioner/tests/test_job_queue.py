@@ -0,0 +1,322 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import yaml
+
+from src.models.api_models import ProvisioningStatus, Status1
+from src.models.data_product_descriptor import DataProduct, OutputPort
+from src.models.job_models import JobRequest, OperationKind
+from src.services.job_queue import JobQueue, sqlite_connector
+from src.services.job_service import DistributedJobService
+from src.utility.parsing_pydantic_models import parse_yaml_with_model
+
+COMPLETED = ProvisioningStatus(status=Status1.COMPLETED, result="done")
+RUNNING = ProvisioningStatus(status=Status1.RUNNING, result="")
+
+
+def load_request() -> JobRequest:
+    descriptor = yaml.safe_load(
+        Path("tests/descriptors/descriptor_output_port_valid.yaml").read_text()
+    )
+    data_product = parse_yaml_with_model(descriptor["dataProduct"], DataProduct)
+    return JobRequest(
+        operation=OperationKind.UPDATE_ACL,
+        data_product=data_product,
+        component_id="urn:dmb:cmp:healthcare:vaccinations:0:snowflake-output-port",
+        refs=["user:a_b.com"],
+    )
+
+
+class JobQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.connect = sqlite_connector(os.path.join(directory.name, "jobs.db"))
+
+    def create_queue(self, **kwargs) -> JobQueue:
+        queue = JobQueue(self.connect, **kwargs)
+        queue.create_schema()
+        self.addCleanup(queue.close)
+        return queue
+
+
+class TestJobQueue(JobQueueTestCase):
+    def test_create_schema_is_idempotent(self):
+        queue = self.create_queue()
+
+        queue.create_schema()
+
+    def test_schema_created_meanwhile_by_another_replica(self):
+        self.create_queue()
+        queue = JobQueue(self.connect)
+        self.addCleanup(queue.close)
+
+        # The table did not exist yet when this replica looked for it
+        with patch.object(queue, "_table_exists", side_effect=[False, True, True]):
+            queue.create_schema()
+
+        queue.enqueue("token", "request")
+        self.assertEqual(queue.claim("worker-1").token, "token")
+
+    def test_schema_creation_errors_are_raised(self):
+        queue = JobQueue(self.connect)
+        self.addCleanup(queue.close)
+
+        with patch(
+            "src.services.job_queue.CREATE_JOBS_TABLE", "CREATE TABLE broken ("
+        ), self.assertRaises(sqlite3.Error):
+            queue.create_schema()
+
+    def test_claimed_jobs_are_leased_to_one_worker(self):
+        queue = self.create_queue()
+        queue.enqueue("token", "request")
+
+        job = queue.claim("worker-1")
+
+        self.assertEqual(
+            (job.token, job.request, job.attempts), ("token", "request", 1)
+        )
+        self.assertIsNone(queue.claim("worker-2"))
+        self.assertEqual(queue.get("token"), RUNNING)
+
+    def test_complete(self):
+        queue = self.create_queue()
+        queue.enqueue("token", "request")
+        queue.claim("worker-1")
+
+        self.assertTrue(queue.complete("token", "worker-1", COMPLETED))
+
+        self.assertEqual(queue.get("token"), COMPLETED)
+        self.assertIsNone(queue.claim("worker-1"))
+
+    def test_expired_leases_are_taken_over(self):
+        queue = self.create_queue(lease_duration=0.05)
+        queue.enqueue("token", "request")
+        queue.claim("worker-1")
+
+        time.sleep(0.06)
+        job = queue.claim("worker-2")
+
+        self.assertEqual((job.token, job.attempts), ("token", 2))
+        self.assertEqual(queue.heartbeat(["token"], "worker-1"), ["token"])
+        self.assertFalse(queue.complete("token", "worker-1", COMPLETED))
+        self.assertTrue(queue.complete("token", "worker-2", COMPLETED))
+
+    def test_heartbeats_keep_the_lease(self):
+        queue = self.create_queue(lease_duration=0.05)
+        queue.enqueue("token", "request")
+        queue.claim("worker-1")
+
+        for _ in range(3):
+            time.sleep(0.03)
+            self.assertEqual(queue.heartbeat(["token"], "worker-1"), [])
+
+        self.assertIsNone(queue.claim("worker-2"))
+
+    def test_jobs_fail_after_max_attempts(self):
+        queue = self.create_queue(lease_duration=0.01, max_attempts=1)
+        queue.enqueue("token", "request")
+        queue.claim("worker-1")
+
+        time.sleep(0.02)
+
+        self.assertIsNone(queue.claim("worker-2"))
+        status = queue.get("token")
+        self.assertEqual(status.status, Status1.FAILED)
+        self.assertIn("interrupted", status.result)
+
+    def test_concurrent_claims_never_share_a_job(self):
+        queue = self.create_queue()
+        for i in range(50):
+            queue.enqueue(f"token-{i}", "request")
+        claimed = []
+        lock = threading.Lock()
+
+        def work(owner):
+            while (job := queue.claim(owner)) is not None:
+                with lock:
+                    claimed.append(job.token)
+
+        threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(claimed), sorted(f"token-{i}" for i in range(50)))
+
+    def test_outcomes(self):
+        queue = self.create_queue()
+        key = ("component", "provision", "key")
+        other = ("component", "unprovision", "other key")
+        queue.record_outcome(key, COMPLETED, ttl=60.0)
+        queue.record_outcome(other, COMPLETED, ttl=60.0)
+
+        self.assertEqual(queue.get_outcome(key), COMPLETED)
+        self.assertEqual(queue.forget_outcomes(key), 1)
+        self.assertEqual(queue.get_outcome(key), COMPLETED)
+        self.assertIsNone(queue.get_outcome(other))
+
+    def test_outcomes_expire(self):
+        queue = self.create_queue()
+        key = ("component", "provision", "key")
+        queue.record_outcome(key, COMPLETED, ttl=0.01)
+
+        time.sleep(0.02)
+
+        self.assertIsNone(queue.get_outcome(key))
+        self.assertEqual(queue.compact(), 1)
+
+    def test_finished_jobs_expire(self):
+        queue = self.create_queue(retention=0.05)
+        queue.enqueue("token", "request")
+        queue.claim("worker-1")
+        queue.complete("token", "worker-1", COMPLETED)
+
+        time.sleep(0.06)
+
+        self.assertIsNone(queue.get("token"))
+        self.assertEqual(queue.compact(), 1)
+
+
+class TestDistributedJobService(JobQueueTestCase):
+    def create_service(self, execute, **kwargs) -> DistributedJobService:
+        service = DistributedJobService(
+            execute, self.create_queue(**kwargs), max_workers=2, poll_interval=0.01
+        )
+        self.addCleanup(service.close)
+        return service
+
+    def wait_for_end(self, service, token, timeout=5.0) -> ProvisioningStatus:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            status = service.get_status(token)
+            if status.status != Status1.RUNNING:
+                return status
+            time.sleep(0.01)
+        raise AssertionError(f"Job {token} did not end")
+
+    def test_requests_survive_the_queue(self):
+        request = load_request()
+        received = []
+
+        def execute(job_request):
+            received.append(job_request)
+            return COMPLETED
+
+        service = self.create_service(execute)
+
+        token = service.submit(request)
+
+        self.assertEqual(self.wait_for_end(service, token), COMPLETED)
+        (job_request,) = received
+        self.assertEqual(job_request.component_id, request.component_id)
+        # Components are parsed when accessed
+        components = [
+            job_request.data_product.get_component_by_id(component.id)
+            for component in request.data_product.components
+        ]
+        self.assertEqual(components, request.data_product.components)
+        self.assertIsInstance(components[1], OutputPort)
+
+    def test_any_replica_runs_and_reports_jobs(self):
+        request = load_request()
+        replica_1 = self.create_service(Mock(return_value=COMPLETED))
+        replica_2 = self.create_service(Mock(return_value=COMPLETED))
+
+        tokens = [
+            replica_1.submit(request.model_copy(update={"refs": [f"user:u{i}_b.com"]}))
+            for i in range(20)
+        ]
+
+        for token in tokens:
+            self.assertEqual(self.wait_for_end(replica_2, token), COMPLETED)
+        self.assertEqual(
+            replica_1.execute.call_count + replica_2.execute.call_count, 20
+        )
+
+    def test_jobs_of_a_dead_replica_are_taken_over(self):
+        request = load_request()
+        queue = self.create_queue(lease_duration=0.1)
+        queue.enqueue("token", request.to_json())
+        # A replica claims the job and dies without renewing its lease
+        queue.claim("dead-replica")
+
+        service = DistributedJobService(
+            Mock(return_value=COMPLETED), queue, max_workers=1, poll_interval=0.01
+        )
+        self.addCleanup(service.close)
+
+        self.assertEqual(self.wait_for_end(service, "token"), COMPLETED)
+        self.assertFalse(queue.complete("token", "dead-replica", COMPLETED))
+
+    def test_long_jobs_keep_their_lease(self):
+        release = threading.Event()
+
+        def execute(job_request):
+            release.wait()
+            return COMPLETED
+
+        service = self.create_service(execute, lease_duration=0.1)
+        other_replica = JobQueue(service.queue.connect, lease_duration=0.1)
+        self.addCleanup(other_replica.close)
+        token = service.submit(load_request())
+
+        time.sleep(0.3)
+        self.assertIsNone(other_replica.claim("other-replica"))
+        release.set()
+
+        self.assertEqual(self.wait_for_end(service, token), COMPLETED)
+
+    def test_finished_jobs_are_compacted(self):
+        queue = self.create_queue(lease_duration=0.03, retention=0.01)
+        queue.enqueue("token", "request")
+        queue.claim("worker-1")
+        queue.complete("token", "worker-1", COMPLETED)
+
+        service = DistributedJobService(
+            Mock(), queue, max_workers=1, poll_interval=0.01, compaction_interval=0.05
+        )
+        self.addCleanup(service.close)
+
+        deadline = time.monotonic() + 5.0
+        while self.count_jobs() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.count_jobs(), 0)
+
+    def count_jobs(self) -> int:
+        connection = self.connect()
+        try:
+            return connection.execute(
+                "SELECT COUNT(*) FROM provisioning_jobs"
+            ).fetchone()[0]
+        finally:
+            connection.close()
+
+    def test_replicas_share_the_stored_outcomes(self):
+        request = load_request().model_copy(
+            update={"operation": OperationKind.PROVISION}
+        )
+        unprovision = request.model_copy(
+            update={"operation": OperationKind.UNPROVISION}
+        )
+        replica_1 = self.create_service(Mock(return_value=COMPLETED))
+        replica_2 = self.create_service(Mock(return_value=COMPLETED))
+        replica_1.asynchronous = replica_2.asynchronous = False
+
+        replica_1.run(request)
+        self.assertEqual(replica_2.run(request), COMPLETED)
+        self.assertEqual(replica_2.execute.call_count, 0)
+
+        replica_2.run(unprovision)
+        replica_1.run(request)
+
+        # The unprovisioning made the stored provisioning stale on every replica
+        self.assertEqual(replica_1.execute.call_count, 2)
+        self.assertEqual(replica_2.execute.call_count, 1)
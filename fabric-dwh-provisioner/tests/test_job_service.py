@@ -0,0 +1,236 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+from src.models.api_models import ProvisioningStatus, Status1, SystemErr
+from src.models.job_models import OperationKind
+from src.services.job_service import JobService
+
+COMPLETED = ProvisioningStatus(status=Status1.COMPLETED, result="done")
+
+
+def job_request(digest="digest", operation=OperationKind.PROVISION):
+    request = Mock()
+    request.component_id = "component"
+    request.operation = operation
+    request.fingerprint.return_value = digest
+    request.coalescing_key.return_value = ("component", digest)
+    return request
+
+
+REQUEST = job_request()
+
+
+def wait_for_end(service, token, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = service.get_status(token)
+        if status.status != Status1.RUNNING:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"Job {token} did not end")
+
+
+class TestJobService(unittest.TestCase):
+    def test_synchronous_run_returns_the_outcome(self):
+        execute = Mock(return_value=COMPLETED)
+        service = JobService(execute, asynchronous=False)
+        self.addCleanup(service.close)
+
+        self.assertEqual(service.run(REQUEST), COMPLETED)
+        execute.assert_called_once_with(REQUEST)
+
+    def test_asynchronous_run_returns_a_token(self):
+        release = threading.Event()
+
+        def execute(request):
+            release.wait()
+            return COMPLETED
+
+        service = JobService(execute, asynchronous=True)
+        self.addCleanup(service.close)
+
+        token = service.run(REQUEST)
+
+        self.assertIsInstance(token, str)
+        self.assertEqual(service.get_status(token).status, Status1.RUNNING)
+        release.set()
+        self.assertEqual(wait_for_end(service, token), COMPLETED)
+
+    def test_system_errors_are_reported_as_failed(self):
+        service = JobService(lambda request: SystemErr(error="boom"), asynchronous=True)
+        self.addCleanup(service.close)
+
+        token = service.submit(REQUEST)
+
+        status = wait_for_end(service, token)
+        self.assertEqual(status.status, Status1.FAILED)
+        self.assertEqual(status.result, "boom")
+
+    def test_exceptions_are_reported_as_failed(self):
+        def execute(request):
+            raise RuntimeError("boom")
+
+        service = JobService(execute, asynchronous=True)
+        self.addCleanup(service.close)
+
+        token = service.submit(REQUEST)
+
+        status = wait_for_end(service, token)
+        self.assertEqual(status.status, Status1.FAILED)
+        self.assertIn("boom", status.result)
+
+    def test_jobs_cancelled_on_close_are_failed(self):
+        release = threading.Event()
+
+        def execute(request):
+            release.wait()
+            return COMPLETED
+
+        service = JobService(execute, asynchronous=True, max_workers=1)
+        running = service.run(job_request("first"))
+        queued = service.run(job_request("second"))
+
+        closing = threading.Thread(target=service.close)
+        closing.start()
+        time.sleep(0.05)
+        release.set()
+        closing.join()
+
+        self.assertEqual(service.get_status(running), COMPLETED)
+        status = service.get_status(queued)
+        self.assertEqual(status.status, Status1.FAILED)
+        self.assertIn("shutdown", status.result)
+
+    def test_unknown_token(self):
+        service = JobService(Mock())
+        self.addCleanup(service.close)
+
+        self.assertIsNone(service.get_status("unknown"))
+
+    def test_identical_synchronous_requests_are_coalesced(self):
+        release = threading.Event()
+        execute = Mock(side_effect=lambda request: release.wait() and COMPLETED)
+        service = JobService(execute)
+        self.addCleanup(service.close)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(service.run, job_request()) for _ in range(3)]
+            time.sleep(0.05)
+            release.set()
+
+        self.assertEqual([f.result() for f in futures], [COMPLETED] * 3)
+        execute.assert_called_once()
+
+    def test_requests_are_fingerprinted_once(self):
+        for asynchronous in (False, True):
+            service = JobService(Mock(return_value=COMPLETED), asynchronous)
+            self.addCleanup(service.close)
+            request = job_request()
+
+            service.run(request)
+
+            request.fingerprint.assert_called_once()
+            request.coalescing_key.assert_called_once_with("digest")
+
+    def test_identical_asynchronous_requests_share_a_job(self):
+        release = threading.Event()
+        execute = Mock(side_effect=lambda request: release.wait() and COMPLETED)
+        service = JobService(execute, asynchronous=True)
+        self.addCleanup(service.close)
+
+        token = service.run(job_request())
+        duplicate = service.run(job_request())
+        other = service.run(job_request("other digest"))
+        release.set()
+
+        self.assertEqual(duplicate, token)
+        self.assertNotEqual(other, token)
+        wait_for_end(service, token)
+        wait_for_end(service, other)
+        self.assertEqual(execute.call_count, 2)
+
+    def test_finished_jobs_are_not_coalesced(self):
+        service = JobService(Mock(return_value=COMPLETED), asynchronous=True)
+        self.addCleanup(service.close)
+
+        token = service.run(job_request())
+        wait_for_end(service, token)
+
+        self.assertNotEqual(service.run(job_request()), token)
+
+    def test_replays_of_completed_requests_return_the_stored_outcome(self):
+        execute = Mock(return_value=COMPLETED)
+        service = JobService(execute)
+        self.addCleanup(service.close)
+
+        self.assertEqual(service.run(job_request()), COMPLETED)
+        self.assertEqual(service.run(job_request()), COMPLETED)
+
+        execute.assert_called_once()
+
+    def test_failures_are_not_replayed(self):
+        execute = Mock(return_value=SystemErr(error="boom"))
+        service = JobService(execute)
+        self.addCleanup(service.close)
+
+        service.run(job_request())
+        service.run(job_request())
+
+        self.assertEqual(execute.call_count, 2)
+
+    def test_idempotency_keys_identify_replays(self):
+        execute = Mock(return_value=COMPLETED)
+        service = JobService(execute)
+        self.addCleanup(service.close)
+
+        service.run(job_request("first"), idempotency_key="key")
+        service.run(job_request("second"), idempotency_key="key")
+        service.run(job_request("second"), idempotency_key="other key")
+
+        self.assertEqual(execute.call_count, 2)
+
+    def test_other_operations_forget_the_stored_outcomes(self):
+        execute = Mock(return_value=COMPLETED)
+        service = JobService(execute)
+        self.addCleanup(service.close)
+
+        service.run(job_request())
+        service.run(job_request("other", OperationKind.UNPROVISION))
+        service.run(job_request())
+
+        self.assertEqual(execute.call_count, 3)
+
+    def test_other_requests_of_the_same_operation_forget_the_stored_outcomes(self):
+        # e.g. an ACL update removing a reader, then giving it back
+        for operation in (OperationKind.UPDATE_ACL, OperationKind.PROVISION):
+            execute = Mock(return_value=COMPLETED)
+            service = JobService(execute)
+            self.addCleanup(service.close)
+
+            service.run(job_request("a", operation))
+            service.run(job_request("b", operation))
+            service.run(job_request("a", operation))
+
+            self.assertEqual(execute.call_count, 3, operation)
+
+    def test_outcomes_expire(self):
+        execute = Mock(return_value=COMPLETED)
+        service = JobService(execute, idempotency_retention=0.01)
+        self.addCleanup(service.close)
+
+        service.run(job_request())
+        time.sleep(0.02)
+        service.run(job_request())
+
+        self.assertEqual(execute.call_count, 2)
+
+    def test_asynchronous_replays_return_the_stored_outcome(self):
+        service = JobService(Mock(return_value=COMPLETED), asynchronous=True)
+        self.addCleanup(service.close)
+
+        wait_for_end(service, service.run(job_request()))
+
+        self.assertEqual(service.run(job_request()), COMPLETED)
@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+
+from src.models.api_models import ProvisioningStatus, Status1
+from src.services.job_store import InMemoryJobStore, SQLiteJobStore
+
+RUNNING = ProvisioningStatus(status=Status1.RUNNING, result="")
+COMPLETED = ProvisioningStatus(status=Status1.COMPLETED, result="done")
+
+
+class TestInMemoryJobStore(unittest.TestCase):
+    def test_put_and_get(self):
+        store = InMemoryJobStore()
+
+        store.put("token", RUNNING)
+        store.put("token", COMPLETED)
+
+        self.assertEqual(store.get("token"), COMPLETED)
+        self.assertIsNone(store.get("unknown"))
+
+    def test_finished_jobs_expire(self):
+        store = InMemoryJobStore(retention=0.05)
+        store.put("running", RUNNING)
+        store.put("completed", COMPLETED)
+
+        time.sleep(0.06)
+
+        self.assertIsNone(store.get("completed"))
+        self.assertEqual(store.compact(), 1)
+        self.assertEqual(store.get("running"), RUNNING)
+
+
+class TestSQLiteJobStore(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "jobs.db")
+
+    def open(self, **kwargs):
+        store = SQLiteJobStore(self.path, **kwargs)
+        self.addCleanup(store.close)
+        return store
+
+    def rows(self):
+        with sqlite3.connect(self.path) as connection:
+            return connection.execute("SELECT token, state FROM jobs").fetchall()
+
+    def test_uses_wal_mode(self):
+        self.open()
+
+        with sqlite3.connect(self.path) as connection:
+            mode = connection.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, "wal")
+
+    def test_pending_statuses_are_readable_before_being_written(self):
+        store = self.open(flush_interval=60)
+
+        store.put("token", RUNNING)
+
+        self.assertEqual(store.get("token"), RUNNING)
+        self.assertEqual(self.rows(), [])
+
+    def test_statuses_are_written_in_batches(self):
+        store = self.open(flush_interval=60)
+        for i in range(10):
+            store.put(f"token-{i}", RUNNING)
+        store.put("token-0", COMPLETED)
+
+        store.flush()
+
+        rows = dict(self.rows())
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows["token-0"], "COMPLETED")
+        self.assertEqual(store.get("token-0"), COMPLETED)
+
+    def test_jobs_survive_a_restart(self):
+        store = SQLiteJobStore(self.path)
+        store.put("completed", COMPLETED)
+        store.put("running", RUNNING)
+        store.close()
+
+        store = self.open()
+
+        self.assertEqual(store.get("completed"), COMPLETED)
+        # The process running the job is gone
+        self.assertEqual(store.get("running").status, Status1.FAILED)
+
+    def test_compaction_deletes_expired_finished_jobs(self):
+        store = self.open(retention=0.05)
+        store.put("completed", COMPLETED)
+        store.put("running", RUNNING)
+        store.flush()
+
+        time.sleep(0.06)
+
+        self.assertIsNone(store.get("completed"))
+        self.assertEqual(store.compact(), 1)
+        self.assertEqual(self.rows(), [("running", "RUNNING")])
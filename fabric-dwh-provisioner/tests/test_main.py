@@ -1,4 +1,6 @@
+import time
 from pathlib import Path
+from unittest.mock import Mock
 
 from starlette.testclient import TestClient
 
@@ -6,7 +8,13 @@ from src.main import app
 from src.models.api_models import (
     DescriptorKind,
     ProvisioningRequest,
+    ProvisioningStatus,
+    Status1,
 )
+from src.models.job_models import OperationKind
+from src.services.acl_service import AzureFabricApiService
+from src.services.fabric_service import FabricService
+from src.services.job_service import JobService
 
 client = TestClient(app)
 
@@ -35,3 +43,89 @@ def test_validate_valid_descriptor():
 
     assert resp.status_code == 200
     assert resp.json() == {"error": None, "valid": True}
+
+
+def test_lifespan_creates_shared_services():
+    with TestClient(app):
+        fabric_service = app.state.fabric_service
+        azure_service = app.state.azure_service
+        assert isinstance(fabric_service, FabricService)
+        assert isinstance(azure_service, AzureFabricApiService)
+        assert fabric_service.token_provider is azure_service.token_provider
+
+
+def test_status_of_unknown_token():
+    with TestClient(app) as test_client:
+        resp = test_client.get("/v1/provision/unknown/status")
+
+    assert resp.status_code == 400
+    assert resp.json() == {"errors": ["Unknown token unknown"]}
+
+
+def test_asynchronous_provisioning():
+    descriptor_str = Path(
+        "tests/descriptors/descriptor_output_port_valid.yaml"
+    ).read_text()
+    provisioning_request = ProvisioningRequest(
+        descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str
+    )
+
+    with TestClient(app) as test_client:
+        execute = Mock(
+            return_value=ProvisioningStatus(
+                status=Status1.COMPLETED, result="Provisioning completed"
+            )
+        )
+        app.state.job_service.close()
+        app.state.job_service = JobService(execute, asynchronous=True)
+
+        resp = test_client.post("/v1/provision", json=dict(provisioning_request))
+        assert resp.status_code == 202
+        token = resp.text
+
+        for _ in range(100):
+            status = test_client.get(f"/v1/provision/{token}/status")
+            if status.json()["status"] != "RUNNING":
+                break
+            time.sleep(0.01)
+
+    assert status.status_code == 200
+    assert status.json()["status"] == "COMPLETED"
+    assert status.json()["result"] == "Provisioning completed"
+    execute.assert_called_once()
+    request = execute.call_args.args[0]
+    assert request.operation == OperationKind.PROVISION
+    assert request.component_id == (
+        "urn:dmb:cmp:healthcare:vaccinations:0:snowflake-output-port"
+    )
+
+
+def test_replayed_provisioning_returns_the_stored_status():
+    descriptor_str = Path(
+        "tests/descriptors/descriptor_output_port_valid.yaml"
+    ).read_text()
+    provisioning_request = ProvisioningRequest(
+        descriptorKind=DescriptorKind.COMPONENT_DESCRIPTOR, descriptor=descriptor_str
+    )
+
+    with TestClient(app) as test_client:
+        execute = Mock(
+            return_value=ProvisioningStatus(
+                status=Status1.COMPLETED, result="Provisioning completed"
+            )
+        )
+        app.state.job_service.close()
+        app.state.job_service = JobService(execute)
+
+        responses = [
+            test_client.post(
+                "/v1/provision",
+                json=dict(provisioning_request),
+                headers={"Idempotency-Key": "deploy-1"},
+            )
+            for _ in range(2)
+        ]
+
+    assert [resp.status_code for resp in responses] == [200, 200]
+    assert responses[0].json() == responses[1].json()
+    execute.assert_called_once()
@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import Mock
+
+from src.models.api_models import ProvisioningStatus, Status1, SystemErr
+from src.models.data_product_descriptor import SinkKind
+from src.models.job_models import JobRequest, OperationKind
+from src.services.provisioning_service import ProvisioningService
+
+
+class TestProvisioningService(unittest.TestCase):
+    def setUp(self):
+        self.fabric_service = Mock()
+        self.azure_service = Mock()
+        self.azure_service.update_acl.return_value = ["devs"]
+        self.service = ProvisioningService(self.fabric_service, self.azure_service)
+        self.component = Mock()
+        self.component.specific.sink = SinkKind.DWH
+        self.component.specific.table = "sales"
+        self.component.dataContract.schema_ = []
+        self.data_product = Mock()
+        self.data_product.devGroup = "devs"
+        self.data_product.get_typed_component_by_id.return_value = self.component
+
+    def test_provision_creates_the_table_and_grants_the_dev_group(self):
+        resp = self.service.provision(self.data_product, "id")
+
+        self.assertEqual(resp.status, Status1.COMPLETED)
+        self.fabric_service.create_table.assert_called_once()
+        self.azure_service.update_acl.assert_called_once_with(["group:devs"])
+        self.fabric_service.apply_acl_to_dwh_table.assert_called_once()
+
+    def test_provision_rejects_other_sinks(self):
+        self.component.specific.sink = SinkKind.LAKEHOUSE
+
+        resp = self.service.provision(self.data_product, "id")
+
+        self.assertIsInstance(resp, SystemErr)
+        self.fabric_service.create_table.assert_not_called()
+
+    def test_errors_are_returned_as_system_errors(self):
+        self.fabric_service.drop_table.side_effect = RuntimeError("boom")
+
+        resp = self.service.unprovision(self.data_product, "id", False)
+
+        self.assertIsInstance(resp, SystemErr)
+        self.assertIn("boom", resp.error)
+
+    def test_update_acl(self):
+        self.fabric_service.apply_acl_to_dwh_table.return_value = True
+
+        resp = self.service.update_acl(self.data_product, "id", ["user:a_b.com"])
+
+        self.assertEqual(
+            resp, ProvisioningStatus(status=Status1.COMPLETED, result="Acl updated")
+        )
+
+    def test_execute_dispatches_on_the_operation(self):
+        request = JobRequest.model_construct(
+            operation=OperationKind.UNPROVISION,
+            data_product=self.data_product,
+            component_id="id",
+            remove_data=True,
+            refs=[],
+        )
+        self.service.unprovision = Mock(return_value="outcome")
+
+        resp = self.service.execute(request)
+
+        self.assertEqual(resp, "outcome")
+        self.service.unprovision.assert_called_once_with(self.data_product, "id", True)
+
+    def test_unknown_components_are_reported(self):
+        self.data_product.get_typed_component_by_id.return_value = None
+
+        resp = self.service.update_acl(self.data_product, "id", ["user:a_b.com"])
+
+        self.assertEqual(resp, SystemErr(error="Component id not found"))
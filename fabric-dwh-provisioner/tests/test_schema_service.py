@@ -0,0 +1,76 @@
+import unittest
+
+from src.models.data_product_descriptor import OpenMetadataColumn
+from src.models.fabric_models import MAX_LENGTH, ColumnDefinition
+from src.services.schema_service import SQLSchemaMapper
+
+SCHEMA = [
+    OpenMetadataColumn(name="id", dataType="INT"),
+    OpenMetadataColumn(name="name", dataType="TEXT", dataLength=50),
+    OpenMetadataColumn(name="notes", dataType="TEXT"),
+    OpenMetadataColumn(name="amount", dataType="DECIMAL", precision=10, scale=2),
+    OpenMetadataColumn(name="day", dataType="DATE"),
+]
+
+
+class TestSQLSchemaMapper(unittest.TestCase):
+    def test_generate_column_definitions(self):
+        columns = SQLSchemaMapper.generate_column_definitions(SCHEMA, nullable=False)
+
+        self.assertEqual(
+            columns[1],
+            ColumnDefinition(
+                name="name", data_type="varchar", length=50, nullable=False
+            ),
+        )
+        self.assertEqual(columns[2].length, MAX_LENGTH)
+        self.assertEqual((columns[3].precision, columns[3].scale), (10, 2))
+        self.assertEqual(columns[4].data_type, "date")
+
+    def test_generate_sql_schema(self):
+        self.assertEqual(
+            SQLSchemaMapper.generate_sql_schema(SCHEMA),
+            "\t[id] [int] NULL,\n"
+            "\t[name] [varchar](50) NULL,\n"
+            "\t[notes] [varchar](max) NULL,\n"
+            "\t[amount] [decimal](10,2) NULL,\n"
+            "\t[day] [date] NULL",
+        )
+
+    def test_char_and_varbinary_use_the_declared_length(self):
+        schema = [
+            OpenMetadataColumn(name="code", dataType="CHAR"),
+            OpenMetadataColumn(name="country", dataType="CHAR", dataLength=2),
+            OpenMetadataColumn(name="hash", dataType="VARBINARY", dataLength=32),
+            OpenMetadataColumn(name="blob", dataType="VARBINARY"),
+        ]
+
+        self.assertEqual(
+            SQLSchemaMapper.generate_sql_schema(schema),
+            "\t[code] [char] NULL,\n"
+            "\t[country] [char](2) NULL,\n"
+            "\t[hash] [varbinary](32) NULL,\n"
+            "\t[blob] [varbinary] NULL",
+        )
+
+    def test_undeclared_length_matches_default(self):
+        declared = SQLSchemaMapper.generate_column_definitions(
+            [OpenMetadataColumn(name="code", dataType="CHAR")]
+        )[0]
+        read = ColumnDefinition(name="code", data_type="char", length=1)
+
+        self.assertTrue(declared.matches(read))
+        self.assertFalse(declared.matches(read.model_copy(update={"length": 2})))
+
+    def test_column_names_are_quoted(self):
+        column = ColumnDefinition(name="a]b", data_type="int")
+
+        self.assertEqual(SQLSchemaMapper.column_to_sql(column), "[a]]b] [int] NULL")
+
+    def test_decimal_without_precision_matches_default(self):
+        declared = ColumnDefinition(name="amount", data_type="decimal")
+        read = ColumnDefinition(
+            name="AMOUNT", data_type="decimal", precision=18, scale=0
+        )
+
+        self.assertTrue(declared.matches(read))
@@ -0,0 +1,59 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utility.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_the_first_execution(self):
+        flight: SingleFlight[str, int] = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def fn():
+            calls.append(1)
+            release.wait()
+            return 42
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flight.do, "key", fn) for _ in range(5)]
+            while not flight.in_flight("key"):
+                time.sleep(0.001)
+            time.sleep(0.05)
+            release.set()
+
+        self.assertEqual([f.result() for f in futures], [42] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertFalse(flight.in_flight("key"))
+
+    def test_errors_are_shared(self):
+        flight: SingleFlight[str, int] = SingleFlight()
+        release = threading.Event()
+
+        def fn():
+            release.wait()
+            raise RuntimeError("boom")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(flight.do, "key", fn) for _ in range(2)]
+            time.sleep(0.05)
+            release.set()
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result()
+
+    def test_sequential_calls_are_not_cached(self):
+        flight: SingleFlight[str, int] = SingleFlight()
+        results = iter([1, 2])
+
+        self.assertEqual(flight.do("key", lambda: next(results)), 1)
+        self.assertEqual(flight.do("key", lambda: next(results)), 2)
+
+    def test_distinct_keys_run_separately(self):
+        flight: SingleFlight[str, str] = SingleFlight()
+
+        self.assertEqual(flight.do("a", lambda: "a"), "a")
+        self.assertEqual(flight.do("b", lambda: "b"), "b")
@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+
+from azure.core.credentials import AccessToken
+
+from src.utility.token_provider import TokenProvider
+
+
+class FakeCredential:
+    def __init__(self, lifetime: int = 3600, delay: float = 0.0):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.calls = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def get_token(self, scope):
+        time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        return AccessToken(f"{scope}-{calls}", int(time.time()) + self.lifetime)
+
+    def close(self):
+        self.closed = True
+
+
+class TestTokenProvider(unittest.TestCase):
+    def test_token_is_reused_per_scope(self):
+        credential = FakeCredential()
+        provider = TokenProvider(lambda: credential)
+
+        self.assertEqual(provider.get_token("scope-a"), "scope-a-1")
+        self.assertEqual(provider.get_token("scope-a"), "scope-a-1")
+        self.assertEqual(provider.get_token("scope-b"), "scope-b-2")
+        self.assertEqual(credential.calls, 2)
+
+    def test_credential_is_created_lazily(self):
+        created = []
+        provider = TokenProvider(lambda: created.append(1) or FakeCredential())
+
+        self.assertEqual(created, [])
+        provider.get_token("scope")
+        self.assertEqual(created, [1])
+
+    def test_expired_token_is_refreshed_synchronously(self):
+        credential = FakeCredential(lifetime=30)
+        provider = TokenProvider(lambda: credential, expiry_margin=60)
+
+        self.assertEqual(provider.get_token("scope"), "scope-1")
+        self.assertEqual(provider.get_token("scope"), "scope-2")
+
+    def test_token_close_to_expiry_is_refreshed_in_background(self):
+        credential = FakeCredential(lifetime=300)
+        provider = TokenProvider(
+            lambda: credential, refresh_margin=600, expiry_margin=60
+        )
+
+        self.assertEqual(provider.get_token("scope"), "scope-1")
+        # Still valid: served from cache while a refresh starts in the background
+        self.assertEqual(provider.get_token("scope"), "scope-1")
+        for _ in range(100):
+            if credential.calls == 2 and not provider._in_flight:
+                break
+            time.sleep(0.01)
+        self.assertEqual(provider.get_token("scope"), "scope-2")
+
+    def test_concurrent_acquisitions_are_deduplicated(self):
+        credential = FakeCredential(delay=0.1)
+        provider = TokenProvider(lambda: credential)
+        results = []
+
+        threads = [
+            threading.Thread(target=lambda: results.append(provider.get_token("s")))
+            for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(credential.calls, 1)
+        self.assertEqual(results, ["s-1"] * 10)
+
+    def test_failed_acquisition_is_not_cached(self):
+        class FailingOnceCredential(FakeCredential):
+            def get_token(self, scope):
+                if self.calls == 0:
+                    self.calls += 1
+                    raise RuntimeError("boom")
+                return super().get_token(scope)
+
+        provider = TokenProvider(FailingOnceCredential)
+
+        with self.assertRaises(RuntimeError):
+            provider.get_token("scope")
+        self.assertEqual(provider.get_token("scope"), "scope-2")
+
+    def test_close_releases_credential(self):
+        credential = FakeCredential()
+        provider = TokenProvider(lambda: credential)
+        provider.get_token("scope")
+
+        provider.close()
+
+        self.assertTrue(credential.closed)
+        self.assertEqual(provider._tokens, {})
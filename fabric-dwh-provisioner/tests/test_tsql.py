@@ -0,0 +1,40 @@
+import unittest
+
+from src.utility.tsql import (
+    quote_name,
+    quote_qualified_name,
+    quote_string,
+    split_name,
+)
+
+
+class TestTsql(unittest.TestCase):
+    def test_quote_name_escapes_closing_brackets(self):
+        self.assertEqual(quote_name("data team"), "[data team]")
+        self.assertEqual(quote_name("a]; DROP TABLE t; --"), "[a]]; DROP TABLE t; --]")
+
+    def test_quote_name_rejects_invalid_identifiers(self):
+        with self.assertRaises(ValueError):
+            quote_name("")
+        with self.assertRaises(ValueError):
+            quote_name("a" * 129)
+
+    def test_split_name(self):
+        self.assertEqual(split_name("sales"), ["sales"])
+        self.assertEqual(split_name("dbo.sales"), ["dbo", "sales"])
+        self.assertEqual(
+            split_name("[my schema].[my.ta]]ble]"), ["my schema", "my.ta]ble"]
+        )
+
+    def test_split_name_rejects_malformed_names(self):
+        for name in ("[dbo.sales", "[dbo]x.sales"):
+            with self.assertRaises(ValueError):
+                split_name(name)
+
+    def test_quote_qualified_name(self):
+        self.assertEqual(quote_qualified_name("dbo.sales"), "[dbo].[sales]")
+        with self.assertRaises(ValueError):
+            quote_qualified_name("dbo.")
+
+    def test_quote_string(self):
+        self.assertEqual(quote_string("o'brien"), "N'o''brien'")
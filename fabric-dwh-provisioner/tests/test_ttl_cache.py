@@ -0,0 +1,94 @@
+import time
+import unittest
+
+from src.utility.ttl_cache import TTLCache
+
+
+class NotFound(ValueError):
+    pass
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_get_missing_key_raises_key_error(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=60)
+        with self.assertRaises(KeyError):
+            cache.get("a")
+
+    def test_value_expires_after_ttl(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=0.05)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+
+        time.sleep(0.06)
+
+        with self.assertRaises(KeyError):
+            cache.get("a")
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        with self.assertRaises(KeyError):
+            cache.get("b")
+
+    def test_get_or_load_calls_loader_once(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=60)
+        calls = []
+
+        def loader():
+            calls.append(1)
+            return 42
+
+        self.assertEqual(cache.get_or_load("a", loader), 42)
+        self.assertEqual(cache.get_or_load("a", loader), 42)
+        self.assertEqual(len(calls), 1)
+
+    def test_negative_errors_are_cached(self):
+        cache: TTLCache[str, int] = TTLCache(
+            ttl=60, negative_ttl=0.05, negative_errors=(NotFound,)
+        )
+        calls = []
+
+        def loader():
+            calls.append(1)
+            raise NotFound("missing")
+
+        for _ in range(2):
+            with self.assertRaises(NotFound):
+                cache.get_or_load("a", loader)
+        self.assertEqual(len(calls), 1)
+
+        time.sleep(0.06)
+        with self.assertRaises(NotFound):
+            cache.get_or_load("a", loader)
+        self.assertEqual(len(calls), 2)
+
+    def test_other_errors_are_not_cached(self):
+        cache: TTLCache[str, int] = TTLCache(ttl=60, negative_errors=(NotFound,))
+        calls = []
+
+        def loader():
+            calls.append(1)
+            raise RuntimeError("boom")
+
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                cache.get_or_load("a", loader)
+        self.assertEqual(len(calls), 2)
+
+    def test_invalidate_where(self):
+        cache: TTLCache[tuple, int] = TTLCache(ttl=60)
+        cache.set(("ws1", "a"), 1)
+        cache.set(("ws1", "b"), 2)
+        cache.set(("ws2", "a"), 3)
+
+        cache.invalidate_where(lambda key: key[0] == "ws1")
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get(("ws2", "a")), 3)
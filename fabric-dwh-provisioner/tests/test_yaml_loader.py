@@ -0,0 +1,44 @@
+import unittest
+from pathlib import Path
+
+import yaml
+
+from src.utility.yaml_loader import LIBYAML, load_yaml
+
+DESCRIPTORS = sorted(Path("tests/descriptors").glob("*.yaml"))
+
+
+class TestLoadYaml(unittest.TestCase):
+    def test_libyaml_is_used_when_available(self):
+        self.assertEqual(LIBYAML, yaml.__with_libyaml__)
+
+    def test_descriptors_load_as_with_the_pure_python_loader(self):
+        self.assertTrue(DESCRIPTORS)
+        for path in DESCRIPTORS:
+            with self.subTest(descriptor=path.name):
+                descriptor = path.read_text()
+                self.assertEqual(load_yaml(descriptor), yaml.safe_load(descriptor))
+
+    def test_embedded_descriptors_load_as_with_the_pure_python_loader(self):
+        # Witboost nests the descriptor of the provisioning request as a YAML string
+        for path in DESCRIPTORS:
+            with self.subTest(descriptor=path.name):
+                wrapped = yaml.safe_dump({"request": path.read_text()})
+                self.assertEqual(load_yaml(wrapped), yaml.safe_load(wrapped))
+
+    def test_scalars_resolve_as_with_the_pure_python_loader(self):
+        document = """
+        version: 0.1.0
+        enabled: yes
+        count: 010
+        ratio: 1e3
+        date: 2024-01-31
+        empty: ~
+        anchor: &a {x: 1}
+        alias: *a
+        """
+        self.assertEqual(load_yaml(document), yaml.safe_load(document))
+
+    def test_unsafe_tags_are_rejected(self):
+        with self.assertRaises(yaml.YAMLError):
+            load_yaml("!!python/object/apply:os.system ['true']")